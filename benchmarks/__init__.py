@@ -0,0 +1,67 @@
+"""Benchmarks for the performance-sensitive parts of PackageDev.
+
+Run them from the package's root directory, e.g.:
+
+    python -m benchmarks.plist_writer
+
+They do not require Sublime Text. The test data is generated from the
+syntax definitions shipped in "Syntax Definitions".
+"""
+import copy
+import os
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SYNTAX_DIR = os.path.join(ROOT, "Syntax Definitions")
+YAML_SYNTAX_DEF = os.path.join(SYNTAX_DIR, "Sublime Text Syntax Def (YAML).YAML-tmLanguage")
+
+
+def load_syntax_def(path=YAML_SYNTAX_DEF, ordered=False):
+    """Parse one of the shipped syntax definitions.
+    """
+    import yaml
+    from ordereddict_yaml import OrderedDictSafeLoader
+
+    with open(path, 'rb') as f:
+        return yaml.load(f.read().decode('utf-8'),
+                         Loader=OrderedDictSafeLoader if ordered else yaml.SafeLoader)
+
+
+def make_grammar(size, ordered=False):
+    """Returns a syntax definition whose plist representation has about
+    ``size`` bytes, made by copying the YAML syntax definition's repository
+    under new keys.
+    """
+    from fileconv import api
+
+    base = load_syntax_def(ordered=ordered)
+    base_size = len(api.dumps(base, 'plist'))
+    data = copy.deepcopy(base)
+    repository = data['repository']
+    for i in range(max(0, size // base_size - 1)):
+        for key, value in base['repository'].items():
+            repository['%s-%d' % (key, i)] = copy.deepcopy(value)
+    return data
+
+
+def bench(func, repeat=3, number=1):
+    """Returns the best time of ``repeat`` runs of ``number`` calls, in seconds.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        t = (time.perf_counter() - start) / number
+        best = t if best is None else min(best, t)
+    return best
+
+
+def report(name, seconds, baseline=None):
+    line = "%-40s %10.2f ms" % (name, seconds * 1000)
+    if baseline:
+        line += "  (%.2fx)" % (baseline / seconds)
+    print(line)
+
+
+__all__ = ['ROOT', 'SYNTAX_DIR', 'load_syntax_def', 'make_grammar', 'bench', 'report']
@@ -0,0 +1,55 @@
+"""Measure the memory held by the grammars in "Syntax Definitions" (and a
+generated ~1 MB grammar) after loading them as usual, with interned strings
+(fileconv.compact.intern_strings) and in the compact, frozen form
+(fileconv.compact.freeze). Memory is traced with tracemalloc.
+"""
+import gc
+import glob
+import os
+import tracemalloc
+
+from fileconv import api, compact
+
+from . import SYNTAX_DIR, make_grammar, bench
+
+
+def retained(func):
+    """Returns the result of ``func()`` and the memory allocated by it that
+    is still in use afterwards.
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    paths = sorted(glob.glob(os.path.join(SYNTAX_DIR, "*.*-tmLanguage")))
+    loaders = [(os.path.basename(path), lambda path=path: api.load(path)) for path in paths]
+    generated = api.dumps(make_grammar(1024 * 1024), 'json')
+    loaders.append(("generated (~1 MB as plist)", lambda: api.loads(generated, 'json')))
+
+    print("%-48s %10s %10s %10s %9s" % ("", "plain", "interned", "frozen", "freeze"))
+    totals = [0, 0, 0]
+    for name, load in loaders:
+        load()  # Compile regexes etc. first
+        sizes = [retained(load)[1],
+                 retained(lambda: compact.intern_strings(load()))[1],
+                 retained(lambda: compact.freeze(load()))[1]]
+        data = load()
+        t = bench(lambda: compact.freeze(data))
+        totals = [a + b for a, b in zip(totals, sizes)]
+        print("%-48s %10d %10d %10d %7.1fms" % ((name[:48],) + tuple(sizes) + (t * 1000,)))
+
+    # All of them at once, sharing one Freezer
+    freezer = compact.Freezer()
+    shared = retained(lambda: [compact.freeze(load(), freezer) for _, load in loaders])[1]
+    print("%-48s %10d %10d %10d" % (("total",) + tuple(totals)))
+    print("%-48s %10s %10s %10d" % ("total, one shared Freezer", "", "", shared))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Dump a generated grammar of about 20,000 lines of YAML like
+RearrangeYamlSyntaxDefCommand does: in one piece, with a cold
+fileconv.emit_cache.EmitCache, again without changes and again after one
+repository entry changed.
+"""
+import copy
+from collections import OrderedDict
+
+import yaml
+from ordereddict_yaml import OrderedDictSafeDumper
+
+from fileconv import api
+from fileconv.emit_cache import EmitCache
+
+from . import make_grammar, bench, report
+from .sort_keys import SORT_ORDER
+
+
+def main(size=1536 * 1024):
+    data = api.sort_keys(make_grammar(size), SORT_ORDER)
+    params = dict(Dumper=OrderedDictSafeDumper)
+    text = yaml.dump(data, **params)
+    print("%d lines" % text.count('\n'))
+
+    full = bench(lambda: yaml.dump(data, **params), repeat=1)
+    report("yaml.dump", full)
+    report("EmitCache, cold", bench(lambda: EmitCache().dump(data, params, OrderedDict),
+                                    repeat=1), full)
+
+    cache = EmitCache()
+    assert cache.dump(data, params, OrderedDict) == text
+    report("EmitCache, unchanged", bench(lambda: cache.dump(data, params, OrderedDict)), full)
+
+    changed = copy.deepcopy(data)
+    key = next(iter(changed['repository']))
+    changed['repository'][key] = OrderedDict([('match', 'changed'), ('name', 'keyword.test')])
+
+    def dump_changed():
+        cache.dump(data, params, OrderedDict)
+        cache.dump(changed, params, OrderedDict)
+
+    assert cache.dump(changed, params, OrderedDict) == yaml.dump(changed, **params)
+    report("EmitCache, one entry changed (x2)", bench(dump_changed), full)
+
+
+if __name__ == '__main__':
+    main()
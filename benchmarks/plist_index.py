@@ -0,0 +1,45 @@
+"""Look up single repository entries of a ~10 MB grammar with
+fileconv.plist_index, compared to parsing the whole file with plistlib.
+"""
+import io
+import os
+import plistlib
+import shutil
+import tempfile
+
+from fileconv.plist_index import PlistIndex
+from fileconv.plist_writer import PlistWriter
+
+from . import make_grammar, bench, report
+
+
+def main(size=10 * 1024 * 1024):
+    tmp_dir = tempfile.mkdtemp()
+    path = os.path.join(tmp_dir, "big.tmLanguage")
+    with io.open(path, 'w', encoding='utf-8', newline='\n') as f:
+        PlistWriter(f).write(make_grammar(size))
+
+    def with_plistlib():
+        with open(path, 'rb') as f:
+            return plistlib.load(f)['repository'][key]
+
+    try:
+        print("Input: %.1f MB" % (os.path.getsize(path) / 1024.0 / 1024))
+        cache_dir = os.path.join(tmp_dir, "index")
+        report("build index", bench(lambda: PlistIndex(cache_dir).get(path), repeat=1))
+        report("load persisted index", bench(lambda: PlistIndex(cache_dir).get(path)))
+
+        index = PlistIndex(cache_dir)
+        key = sorted(index.keys(path, 'repository'))[-1]
+        assert index.lookup(path, 'repository', key) == with_plistlib()
+
+        baseline = bench(with_plistlib)
+        report("plistlib.load()['repository'][key]", baseline)
+        report("PlistIndex.lookup", bench(lambda: index.lookup(path, 'repository', key),
+                                          number=100), baseline)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
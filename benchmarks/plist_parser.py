@@ -0,0 +1,65 @@
+"""Compare the bundled fileconv.plist_parser with plistlib on a ~10 MB
+grammar, parsing from a file. Also reports the peak memory allocated in
+addition to the result.
+"""
+import io
+import os
+import plistlib
+import tempfile
+import tracemalloc
+
+from fileconv import plist_parser
+from fileconv.plist_writer import PlistWriter
+
+from . import make_grammar, bench, report
+
+
+def peak_memory(func):
+    """Returns the peak memory allocated by ``func`` minus the size of
+    what it keeps allocated (its result), in bytes.
+    """
+    tracemalloc.start()
+    result = func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak - current
+
+
+def main(size=10 * 1024 * 1024):
+    fd, path = tempfile.mkstemp(suffix='.tmLanguage')
+    os.close(fd)
+    with io.open(path, 'w', encoding='utf-8', newline='\n') as f:
+        PlistWriter(f).write(make_grammar(size))
+
+    def with_plistlib():
+        with open(path, 'rb') as f:
+            return plistlib.load(f)
+
+    def with_etree():
+        return plist_parser.parse_file(path)
+
+    def with_sax():
+        with open(path, 'rb') as f:
+            return plist_parser.XmlPropertyListParser()._parse_using_sax_parser(f)
+
+    try:
+        print("Input: %.1f MB" % (os.path.getsize(path) / 1024.0 / 1024))
+        assert with_etree() == with_sax() == with_plistlib()
+
+        baseline = bench(with_plistlib)
+        report("plistlib.load", baseline)
+        report("plist_parser (iterparse)", bench(with_etree), baseline)
+        report("plist_parser (SAX)", bench(with_sax), baseline)
+
+        print()
+        for name, func in (("plistlib.load", with_plistlib),
+                           ("plist_parser (iterparse)", with_etree),
+                           ("plist_parser (SAX)", with_sax)):
+            print("%-40s %10.2f MB peak overhead" % (name, peak_memory(func) / 1024.0 / 1024))
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
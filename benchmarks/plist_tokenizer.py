@@ -0,0 +1,38 @@
+"""Compare fileconv.plist_tokenizer with the iterparse and SAX paths of
+fileconv.plist_parser (and plistlib for reference) on a ~10 MB grammar,
+parsing bytes in memory.
+"""
+import plistlib
+
+from fileconv import api, plist_parser, plist_tokenizer
+
+from . import make_grammar, bench, report
+
+
+def main(size=10 * 1024 * 1024):
+    raw = api.dumps(make_grammar(size), 'plist').encode('utf-8')
+    print("Input: %.1f MB" % (len(raw) / 1024.0 / 1024))
+
+    def with_sax():
+        return plist_parser.XmlPropertyListParser()._parse_using_sax_parser(raw)
+
+    def with_etree():
+        return plist_parser.XmlPropertyListParser()._parse_using_etree(raw)
+
+    def with_tokenizer():
+        return plist_tokenizer.parse(raw)
+
+    def with_plistlib():
+        return plistlib.loads(raw)
+
+    assert with_tokenizer() == with_etree() == with_sax() == with_plistlib()
+
+    baseline = bench(with_sax)
+    report("plist_parser (SAX)", baseline)
+    report("plist_parser (iterparse)", bench(with_etree), baseline)
+    report("plist_tokenizer", bench(with_tokenizer), baseline)
+    report("plistlib (needs expat)", bench(with_plistlib), baseline)
+
+
+if __name__ == '__main__':
+    main()
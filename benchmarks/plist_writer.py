@@ -0,0 +1,41 @@
+"""Compare fileconv.plist_writer.PlistWriter with plistlib on a ~10 MB
+grammar, writing to a file.
+"""
+import io
+import os
+import plistlib
+import tempfile
+
+from fileconv.plist_writer import PlistWriter
+
+from . import make_grammar, bench, report
+
+
+def main(size=10 * 1024 * 1024):
+    data = make_grammar(size, ordered=True)
+    fd, path = tempfile.mkstemp(suffix='.tmLanguage')
+    os.close(fd)
+
+    def with_plistlib():
+        with open(path, 'wb') as f:
+            plistlib.dump(data, f, sort_keys=False)
+
+    def with_writer(indent='\t'):
+        with io.open(path, 'w', encoding='utf-8', newline='\n') as f:
+            PlistWriter(f, indent=indent).write(data)
+
+    try:
+        with_plistlib()
+        print("plistlib output: %.1f MB" % (os.path.getsize(path) / 1024.0 / 1024))
+        baseline = bench(with_plistlib)
+        report("plistlib.dump", baseline)
+        report("PlistWriter (indent='\\t')", bench(with_writer), baseline)
+        report("PlistWriter (indent=None)", bench(lambda: with_writer(None)), baseline)
+        print("PlistWriter (indent=None) output: %.1f MB"
+              % (os.path.getsize(path) / 1024.0 / 1024))
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Latency of the scope name completions of SyntaxDefCompletions for every
+dotted prefix of the naming conventions: walking scope_data's NodeList
+(with NodeList.find and to_completion) compared to the ScopeTrie. Also
+times the prefix and fuzzy lookups.
+"""
+import time
+
+import scope_data
+from scope_data import COMPILED_HEADS, COMPILED_NODES, ScopeTrie
+
+from . import bench, report
+
+
+def legacy_completions(tokens):
+    nodes = COMPILED_HEADS
+    node = None
+    for token in tokens:
+        node = nodes.find(token)
+        if not node:
+            break
+        nodes = node.children
+        if not nodes:
+            break
+    if nodes and node:
+        return nodes.to_completion()
+
+
+def trie_completions(tokens):
+    node = scope_data.get_trie().root
+    for token in tokens:
+        node = node.children.get(token)
+        if not node:
+            break
+        if not node.children:
+            break
+    if node and node.children:
+        return node.completions
+
+
+def main():
+    start = time.perf_counter()
+    trie = ScopeTrie(COMPILED_HEADS)
+    report("build ScopeTrie", time.perf_counter() - start)
+
+    queries = []
+    for node in COMPILED_NODES:
+        tokens = [node.name]
+        while node.parent:
+            node = node.parent
+            tokens.insert(0, node.name)
+        queries.append(tokens)
+    scope_data._trie = trie
+    for tokens in queries:
+        assert legacy_completions(tokens) == trie_completions(tokens), tokens
+    print("%d queries" % len(queries))
+
+    legacy = bench(lambda: [legacy_completions(tokens) for tokens in queries], number=100)
+    report("NodeList walk", legacy)
+    report("ScopeTrie walk", bench(lambda: [trie_completions(tokens) for tokens in queries],
+                                   number=100), legacy)
+
+    prefixes = ['.'.join(tokens)[:-1] for tokens in queries]
+    report("ScopeTrie.complete", bench(lambda: [trie.complete(p) for p in prefixes], number=100))
+    report("ScopeTrie.fuzzy", bench(lambda: [trie.fuzzy(p, 1) for p in prefixes], number=10))
+    report("ScopeTrie.fuzzy (miss)", bench(lambda: [trie.fuzzy(p + "#", 1, 3) for p in prefixes],
+                                           number=10))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Sort the keys of a generated grammar with about 100,000 maps like
+RearrangeYamlSyntaxDefCommand does, with fileconv.api.sort_keys and with
+the previous implementation, which walked the data with validate_data and
+moved the keys of every dict to an OrderedDict one group at a time.
+"""
+import copy
+from collections import OrderedDict
+
+from fileconv import api
+
+from . import make_grammar, bench, report
+
+
+SORT_ORDER = """comment
+    name scopeName contentName fileTypes uuid
+    begin beginCaptures end endCaptures match captures include
+    patterns repository""".split()
+
+
+def legacy_sort_keys(data, sort_order, sort_numeric):
+    def do_sort(obj):
+        od = OrderedDict()
+        if sort_order:
+            for key in sort_order:
+                if key in obj:
+                    od[key] = obj[key]
+                    del obj[key]
+        if sort_numeric:
+            nums = []
+            for key in obj:
+                if key.isdigit():
+                    nums.append(int(key))
+            nums.sort()
+            for num in nums:
+                key = str(num)
+                od[key] = obj[key]
+                del obj[key]
+        keys = sorted(obj.keys())
+        for key in keys:
+            od[key] = obj[key]
+            del obj[key]
+        return od
+
+    return api.validate_data(data, ((lambda x: isinstance(x, dict), do_sort),))
+
+
+def count_maps(obj):
+    if isinstance(obj, dict):
+        return 1 + sum(count_maps(value) for value in obj.values())
+    elif isinstance(obj, list):
+        return sum(count_maps(value) for value in obj)
+    return 0
+
+
+def main(size=14 * 1024 * 1024, legacy_size=1024 * 1024):
+    data = make_grammar(size)
+    print("%d maps" % count_maps(data))
+    new = bench(lambda: api.sort_keys(data, SORT_ORDER))
+    report("api.sort_keys", new)
+
+    # The previous implementation is quadratic (validate_data compares every
+    # object with all objects checked before), so use a smaller tree
+    small = make_grammar(legacy_size)
+    print("%d maps" % count_maps(small))
+    assert (list(api.sort_keys(small, SORT_ORDER).items())
+            == list(legacy_sort_keys(copy.deepcopy(small), SORT_ORDER, True).items()))
+    # It modifies its input
+    small_copy = copy.deepcopy(small)
+    legacy = bench(lambda: legacy_sort_keys(small_copy, SORT_ORDER, True), repeat=1)
+    report("previous implementation", legacy)
+    report("api.sort_keys", bench(lambda: api.sort_keys(small, SORT_ORDER)), legacy)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""Compute the regions RearrangeYamlSyntaxDefCommand replaces in a ~20,000
+line grammar with fileconv.textdiff.line_hunks, compared to replacing the
+whole buffer. The number of characters replaced is what Sublime Text has
+to highlight again and to keep in its undo history.
+"""
+import copy
+from collections import OrderedDict
+
+import yaml
+from ordereddict_yaml import OrderedDictSafeDumper
+
+from fileconv import api
+from fileconv.textdiff import line_hunks
+
+from . import make_grammar, bench
+from .sort_keys import SORT_ORDER
+
+
+def main(size=1536 * 1024):
+    data = make_grammar(size, ordered=True)
+    params = dict(Dumper=OrderedDictSafeDumper)
+    unsorted = yaml.dump(data, **params)
+    data = api.sort_keys(data, SORT_ORDER)
+    text = yaml.dump(data, **params)
+
+    changed = copy.deepcopy(data)
+    repository = changed['repository']
+    for key in list(repository)[::len(repository) // 3]:
+        repository[key] = OrderedDict([('match', 'changed'), ('name', 'keyword.test')])
+    changed_text = yaml.dump(changed, **params)
+
+    print("%d lines" % text.count('\n'))
+    print("%-36s %9s %8s %12s" % ("", "time", "regions", "replaced"))
+    print("%-36s %9s %8d %12d" % ("whole buffer", "", 1, len(text)))
+    for name, old, new in (("unchanged", text, text),
+                           ("3 repository entries changed", text, changed_text),
+                           ("first run (keys not sorted)", unsorted, text)):
+        hunks = line_hunks(old, new)
+        t = bench(lambda: line_hunks(old, new))
+        print("%-36s %7.1fms %8d %12d"
+              % (name, t * 1000, len(hunks), sum(len(h[2]) for h in hunks)))
+
+
+if __name__ == '__main__':
+    main()
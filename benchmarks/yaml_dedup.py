@@ -0,0 +1,39 @@
+"""Dump the syntax definitions in "Syntax Definitions" (and a generated
+~1 MB grammar) to YAML with and without fileconv.dedup and compare the
+size of the output and the time needed to write and to load it.
+"""
+import glob
+import os
+
+import yaml
+
+from fileconv import api
+
+from . import SYNTAX_DIR, make_grammar, bench
+
+
+def main():
+    datas = []
+    for path in sorted(glob.glob(os.path.join(SYNTAX_DIR, "*.tmLanguage"))):
+        data = api.load(path)
+        if isinstance(data, dict):
+            datas.append((os.path.basename(path), data))
+    datas.append(("generated (~1 MB as plist)", make_grammar(1024 * 1024)))
+
+    print("%-48s %10s %10s %9s %9s %9s %9s"
+          % ("", "size", "dedup", "write", "dedup", "load", "dedup"))
+    for name, data in datas:
+        text = api.dumps(data, 'yaml')
+        deduped = api.dumps(data, 'yaml', dedup=True)
+        assert yaml.safe_load(deduped) == yaml.safe_load(text)
+
+        times = [bench(lambda: api.dumps(data, 'yaml')),
+                 bench(lambda: api.dumps(data, 'yaml', dedup=True)),
+                 bench(lambda: yaml.load(text, Loader=yaml.SafeLoader)),
+                 bench(lambda: yaml.load(deduped, Loader=yaml.SafeLoader))]
+        print("%-48s %10d %10d %7.1fms %7.1fms %7.1fms %7.1fms"
+              % ((name[:48], len(text), len(deduped)) + tuple(t * 1000 for t in times)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Convert a generated YAML stream with 100 documents (~2 MB) to JSON and
+plist, once with fileconv.api.convert, which writes every document as soon
+as it is loaded, and once by loading all documents into a list first.
+Compares time and peak memory (traced by tracemalloc, in a separate run).
+"""
+import io
+import os
+import shutil
+import tempfile
+import tracemalloc
+
+import yaml
+
+from fileconv import api
+
+from . import load_syntax_def, bench
+
+
+def make_stream(path, count):
+    doc = yaml.safe_dump(load_syntax_def(), default_flow_style=False)
+    with io.open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            f.write(u"--- # %d\n" % i)
+            f.write(doc)
+
+
+def load_all_then_dump(path, target):
+    with io.open(path, encoding='utf-8') as f:
+        data = list(yaml.load_all(f, Loader=yaml.SafeLoader))
+    with io.open(path + '.all.' + target, 'w', encoding='utf-8') as f:
+        api.dump(data, target, f)
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, "stream.yaml")
+        make_stream(path, 100)
+        print("%d bytes in 100 documents" % os.path.getsize(path))
+        for target in ('json', 'plist'):
+            for name, func in (("convert (lazy)", lambda: api.convert(path, target)),
+                               ("load_all + dump", lambda: load_all_then_dump(path, target))):
+                seconds, peak = bench(func, repeat=1), peak_memory(func)
+                print("%-6s %-16s %7.2fs  peak %6.1f MB"
+                      % (target, name, seconds, peak / 2.0 ** 20))
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
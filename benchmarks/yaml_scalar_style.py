@@ -0,0 +1,110 @@
+"""Choose the scalar styles for the strings of a generated grammar and dump
+it with the dumper of RearrangeYamlSyntaxDefCommand (YAMLLanguageDevDumper),
+once with fileconv.yaml_style.scalar_style and once with the previous
+represent_scalar, which scanned every string several times. Also profiles
+the time both represent_scalar implementations spend choosing styles.
+"""
+import cProfile
+import pstats
+import textwrap
+
+import yaml
+from ordereddict_yaml import OrderedDictSafeDumper
+
+from fileconv.yaml_style import scalar_style
+
+from . import make_grammar, bench, report
+
+
+class _Dumper(OrderedDictSafeDumper):
+    # syntax_def_dev.YAMLLanguageDevDumper without represent_scalar
+    def represent_mapping(self, tag, mapping, flow_style=False):
+        if len(mapping) == 1:
+            if hasattr(mapping, 'items'):
+                flow_style = ('name' in mapping)
+            else:
+                flow_style = (mapping[0][0] == 'name')
+        return super(_Dumper, self).represent_mapping(tag, mapping, flow_style)
+
+
+class Dumper(_Dumper):
+    def represent_scalar(self, tag, value, style=None):
+        if tag == u'tag:yaml.org,2002:str':
+            value, new_style = scalar_style(value)
+            style = new_style or style
+        return super(Dumper, self).represent_scalar(tag, value, style)
+
+
+def legacy_style(value):
+    style = None
+    if any(c in value for c in u"\u000a\u000d\u001c\u001d\u001e\u0085\u2028\u2029"):
+        style = '|'
+    if value.startswith("(?x)") and ('\n' in value or '\r' in value):
+        value = value.strip()
+        lines = value.splitlines()
+        value = lines[0] + '\n' + textwrap.dedent('\n'.join(lines[1:]))
+    elif (value[0] in "[]{#\"'}@,"
+          or any(s in value for s in (' #', ': '))):
+        style = "'"
+    return value, style
+
+
+class LegacyDumper(_Dumper):
+    def represent_scalar(self, tag, value, style=None):
+        if tag == u'tag:yaml.org,2002:str':
+            value, new_style = legacy_style(value)
+            style = new_style or style
+        return super(LegacyDumper, self).represent_scalar(tag, value, style)
+
+
+def strings(obj):
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            yield key
+            for s in strings(value):
+                yield s
+    elif isinstance(obj, list):
+        for value in obj:
+            for s in strings(value):
+                yield s
+    elif isinstance(obj, str):
+        yield obj
+
+
+def profile(dumper, data):
+    profiler = cProfile.Profile()
+    profiler.runcall(yaml.dump, data, Dumper=dumper)
+    stats = pstats.Stats(profiler).stats
+    times = {}
+    for (filename, _, name), entry in stats.items():
+        if name == 'represent_scalar':
+            times[filename == __file__] = entry
+    # The time spent choosing the style: the subclass's represent_scalar
+    # without the representer of the base class it calls
+    calls, total = times[True][1], times[True][3] - times[False][3]
+    print("  %s.represent_scalar: %d calls, %.2f ms choosing styles"
+          % (dumper.__name__, calls, total * 1000))
+
+
+def main(size=2 * 1024 * 1024):
+    data = make_grammar(size, ordered=True)
+    assert yaml.dump(data, Dumper=Dumper) == yaml.dump(data, Dumper=LegacyDumper)
+
+    values = list(strings(data))
+    print("%d strings, %d distinct" % (len(values), len(set(values))))
+    legacy = bench(lambda: [legacy_style(value) for value in values], repeat=5)
+    report("styles: previous implementation", legacy)
+    report("styles: scalar_style", bench(lambda: [scalar_style(value) for value in values],
+                                         repeat=5), legacy)
+
+    legacy = bench(lambda: yaml.dump(data, Dumper=LegacyDumper), repeat=5)
+    report("dump: previous represent_scalar", legacy)
+    report("dump: scalar_style", bench(lambda: yaml.dump(data, Dumper=Dumper), repeat=5),
+           legacy)
+
+    profile(LegacyDumper, data)
+    profile(Dumper, data)
+
+
+if __name__ == '__main__':
+    main()
@@ -10,12 +10,14 @@ if sys.version_info < (3,):
     from sublime_lib.view import OutputPanel, get_text
 
     from fileconv import dumpers, loaders
+    from fileconv.metrics import timed
 else:
     from .sublime_lib import WindowAndTextCommand
     from .sublime_lib.path import file_path_tuple
     from .sublime_lib.view import OutputPanel, get_text
 
     from .fileconv import dumpers, loaders
+    from .fileconv.metrics import timed
 
 
 # build command
@@ -51,8 +53,10 @@ class ConvertFileCommand(WindowAndTextCommand):
                      kwargs={"target_format": "yaml", "default_flow_style": False})
             )
 
+    @timed('ConvertFileCommand.run')
     def run(self, edit=None, source_format=None, target_format=None, ext=None,
-            open_new_file=False, rearrange_yaml_syntax_def=False, _output=None, *args, **kwargs):
+            open_new_file=False, rearrange_yaml_syntax_def=False, documents='array',
+            _output=None, *args, **kwargs):
         """Available parameters:
 
         edit (sublime.Edit) = None
@@ -86,6 +90,11 @@ class ConvertFileCommand(WindowAndTextCommand):
             "rearrange_yaml_syntax_def" command on it, if the target format is "yaml".
             Overrides "open_new_file" parameter.
 
+        documents (str) = "array"
+            How YAML files with several documents are converted: "array" writes one
+            array of all documents, "files" writes every document to a numbered file
+            like "name.1.json" (and opens the first one with "open_new_file").
+
         _output (OutputPanel) = None
             For internal use only.
 
@@ -100,7 +109,7 @@ class ConvertFileCommand(WindowAndTextCommand):
             Functions in question:
                 yaml.dump
                 json.dump
-                plist.writePlist (does not support any parameters)
+                fileconv.plist_writer.PlistWriter
 
             A more detailed description of each supported parameter for the respective dumper can
             be found in `fileconv/dumpers.py`.
@@ -195,7 +204,8 @@ class ConvertFileCommand(WindowAndTextCommand):
                         output.write_line(' %s\n' % target['name'])
 
                         kwargs.update(target['kwargs'])
-                        kwargs.update(dict(source_format=source_format, _output=output))
+                        kwargs.update(dict(source_format=source_format, documents=documents,
+                                           _output=output))
                         self.run(*args, **kwargs)
 
                     # Forward all params to the new command call
@@ -220,13 +230,18 @@ class ConvertFileCommand(WindowAndTextCommand):
             # Note: loader or dumper errors are not caught
             #       in order to receive a nice traceback in the console
             loader_ = Loader(self.window, self.view, output=output)
+            docs = None
             try:
-                data = loader_.load(*args, **kwargs)
+                if hasattr(loader_, 'load_documents'):
+                    # Several documents are parsed while they are written
+                    data, docs = loader_.load_documents(*args, **kwargs)
+                else:
+                    data = loader_.load(*args, **kwargs)
             except:
                 output.write_line("Unexpected error occured while parsing, "
                                   "please see the console for details.")
                 raise
-            if not data:
+            if not data and docs is None:
                 return
 
             # Determine new file name
@@ -243,7 +258,12 @@ class ConvertFileCommand(WindowAndTextCommand):
             dumper = dumpers.get[target_format](self.window, self.view, new_file_path,
                                                 output=output)
             try:
-                dumper.dump(data, *args, **kwargs)
+                if docs is not None:
+                    new_file_path = dumper.dump_documents(docs, documents, *args, **kwargs)
+                    if not new_file_path:
+                        return
+                else:
+                    dumper.dump(data, *args, **kwargs)
             except:
                 output.write_line("Unexpected error occured while dumping, "
                                   "please see the console for details.")
@@ -0,0 +1,41 @@
+"""Conversion between JSON, Property List and YAML files.
+
+``loaders`` and ``dumpers`` integrate with Sublime Text. The functions
+exported here (from ``api``) work without it, see ``python -m fileconv -h``.
+
+``api`` is only imported on first use so that ``python -m fileconv`` can
+hand conversions to a running daemon (see ``daemon``) without paying for
+``yaml`` and ``plistlib``.
+"""
+
+__all__ = ['loads', 'dumps', 'load', 'dump', 'convert']
+
+
+def loads(*args, **kwargs):
+    """See ``fileconv.api.loads``."""
+    from . import api
+    return api.loads(*args, **kwargs)
+
+
+def dumps(*args, **kwargs):
+    """See ``fileconv.api.dumps``."""
+    from . import api
+    return api.dumps(*args, **kwargs)
+
+
+def load(*args, **kwargs):
+    """See ``fileconv.api.load``."""
+    from . import api
+    return api.load(*args, **kwargs)
+
+
+def dump(*args, **kwargs):
+    """See ``fileconv.api.dump``."""
+    from . import api
+    return api.dump(*args, **kwargs)
+
+
+def convert(*args, **kwargs):
+    """See ``fileconv.api.convert``."""
+    from . import api
+    return api.convert(*args, **kwargs)
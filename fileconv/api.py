@@ -0,0 +1,908 @@
+"""Sublime-independent loading, dumping and conversion of JSON, Property List
+and YAML files.
+
+The loaders and dumpers in this package are bound to a ``sublime.View`` and
+an output panel. The functions in here do the actual work and are used by
+them, but they can just as well be used from scripts, CI jobs or
+``python -m fileconv`` where the ``sublime`` module does not exist.
+
+    loads(text_or_bytes, fmt, reporter=None, file_path=None)
+    dumps(obj, fmt, **params)
+    convert(path, target=None, source=None, ext=None, reporter=None, **params)
+
+Problems are written to a *reporter*, see ``fileconv.reporters``, in the same
+format the loaders use so that the ``FILE_REGEX`` patterns match.
+"""
+import collections
+import datetime
+import io
+import itertools
+import os
+import re
+import sys
+
+import json
+import yaml
+import plistlib
+
+from . import yaml_limits
+from .compact import FrozenDict, FrozenList, freeze
+from .plist_writer import PlistWriter
+from .reporters import Reporter
+
+
+__all__ = ['FORMATS', 'NAMES', 'loads', 'dumps', 'load', 'dump', 'convert',
+           'convert_documents', 'load_documents', 'detect_format', 'load_options',
+           'get_ext_appendix', 'new_file_path', 'validate_data', 'sort_keys', 'strip_js_comments']
+
+
+# xml.parsers.expat is not available on certain Linux dists, use plist_tokenizer then.
+# See https://github.com/SublimeText/AAAPackageDev/issues/19
+try:
+    from xml.parsers.expat import ExpatError, ErrorString
+except ImportError:
+    from . import plist_tokenizer
+    use_plistlib = False
+    print("[PackageDev] 'xml.parsers.expat' module not available; "
+          "Falling back to bundled 'plist_tokenizer'...")
+else:
+    use_plistlib = True
+
+# plistlib was reworked in Python 3.4; support both APIs and Python 2's
+_plist_loads = (getattr(plistlib, 'loads', None) or getattr(plistlib, 'readPlistFromBytes', None)
+                or plistlib.readPlistFromString)
+
+# Wraps <data> contents on Python < 3.9, raw bytes are used afterwards
+PlistData = getattr(plistlib, 'Data', None)
+
+
+FORMATS = ('json', 'plist', 'yaml')
+
+# Identifies the parsers' output in parse cache keys (see ``fileconv.cache``).
+# Bump PARSER_VERSION whenever a parser's result changes for the same input.
+PARSER_VERSION = 3
+LOADER_VERSION = "%d;py%d.%d;yaml%s;%s" % (
+    PARSER_VERSION, sys.version_info[0], sys.version_info[1], yaml.__version__,
+    'plistlib' if use_plistlib else 'plist_tokenizer'
+)
+
+NAMES = dict(
+    json="JSON",
+    plist="Property List",
+    yaml="YAML"
+)
+
+DEBUG_BASE = dict(
+    json='Error parsing ' + NAMES['json'] + ' "%s": %s',
+    plist='Error parsing ' + NAMES['plist'] + ' "%s": %s, line %s, column %s',
+    yaml="Error parsing YAML: %s"
+)
+
+FILE_REGEX = dict(
+    json=DEBUG_BASE['json'] % (r'(.*?)', r'.+? line (\d+) column (\d+)'),
+    plist=(re.escape(DEBUG_BASE['plist']).replace(r'\%', '%')
+           % (r'(.*?)', r'.*?', r'(\d+)', r'(\d+)')),
+    yaml=r'^ +in "(.*?)", line (\d+), column (\d+)'
+)
+
+OPT_REGEX = dict(
+    json=r'^\s*//\s+\[PackageDev\]\s+(.+)$',
+    plist=r'^\s*<!--\s+\[PackageDev\]\s+(.+)-->',
+    yaml=r'^\s*#\s+\[PackageDev\]\s+(.+)$'
+)
+
+EXT_REGEX = r'(?i)\.%s(?:-([^\.]+))?$'
+
+PLIST_DOCTYPE = "<!DOCTYPE plist"
+
+
+###############################################################################
+
+re_js_comments_str = r"""
+    (                               # Capture code
+        (?:
+            "(?:\\.|[^"\\])*"           # String literal
+            |
+            '(?:\\.|[^'\\])*'           # String literal
+            |
+            (?:[^/\n"']|/[^/*\n"'])+    # Any code besides newlines or string literals
+            |
+            \n                          # Newline
+        )+                          # Repeat
+    )|
+    (/\* (?:[^*]|\*[^/])* \*/)      # Multi-line comment
+    |
+    (?://(.*)$)                     # Comment
+"""
+re_js_comments = re.compile(re_js_comments_str, re.VERBOSE + re.MULTILINE)
+
+
+def strip_js_comments(string):
+    """Originally obtained from Stackoverflow this function strips JavaScript
+    (and JSON) comments from a string while considering those encapsulated by strings.
+
+    http://stackoverflow.com/questions/2136363/matching-one-line-javascript-comments-with-re
+    """
+    parts = re_js_comments.findall(string)
+    # Stripping the whitespaces is, of course, optional, but the columns are fucked up anyway
+    # with the comments being removed and it doesn't break things.
+    return ''.join(x[0].strip(' ') for x in parts)
+
+
+def _to_text(text_or_bytes):
+    if isinstance(text_or_bytes, bytes):
+        return text_or_bytes.decode('utf-8-sig')
+    return text_or_bytes
+
+
+if sys.version_info < (3,):
+    class _UTF8Writer(object):
+        """Writes unicode to the binary file ``fp`` as UTF-8 and byte strings
+        unchanged. The writers mix both on Python 2, but io's text files only
+        accept unicode.
+        """
+
+        def __init__(self, fp):
+            self.fp = fp
+
+        def write(self, text):
+            if isinstance(text, unicode):  # NOQA
+                text = text.encode('utf-8')
+            self.fp.write(text)
+
+        def __getattr__(self, name):
+            return getattr(self.fp, name)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            self.fp.close()
+
+    def open_text(path):
+        """Opens ``path`` for writing UTF-8 text with ``\\n`` line breaks.
+        """
+        return _UTF8Writer(open(path, 'wb'))
+
+else:
+    def open_text(path):
+        """Opens ``path`` for writing UTF-8 text with ``\\n`` line breaks.
+        """
+        return io.open(path, 'w', encoding='utf-8', newline='\n')
+
+
+###############################################################################
+# Parsing
+
+
+def parse_json(text, file_path, reporter):
+    try:
+        text = strip_js_comments(_to_text(text))
+        data = json.loads(text)
+    except ValueError as e:
+        reporter.write_line(DEBUG_BASE['json'] % (file_path, str(e)))
+    else:
+        return data
+
+
+def parse_plist(text, file_path, reporter):
+    # Note: I hate Plist and XML. And it doesn't help a bit that parsing
+    # plist files is a REAL PITA.
+    if use_plistlib:
+        if not isinstance(text, bytes):
+            text = text.encode('utf-8')
+        try:
+            # This will try `from xml.parsers.expat import ParserCreate`
+            # but since it is already tried above it should succeed.
+            data = _plist_loads(text)
+        except ExpatError as e:
+            reporter.write_line(DEBUG_BASE['plist']
+                                % (file_path, ErrorString(e.code), e.lineno, e.offset))
+        except ValueError as e:
+            # Well-formed XML, but not a plist (Python 3.4+)
+            reporter.write_line(DEBUG_BASE['plist'] % (file_path, str(e), 0, 0))
+        else:
+            return data
+    else:
+        # falling back to plist_tokenizer, which does not need any XML parser
+        try:
+            data = plist_tokenizer.parse(text)
+        except plist_tokenizer.PlistSyntaxError as e:
+            reporter.write_line(DEBUG_BASE['plist'] % (file_path, e.msg, e.lineno, e.colno))
+        else:
+            return data
+
+
+def parse_yaml(text, file_path, reporter, Loader=yaml_limits.SafeLoader):
+    """Parses a YAML stream with a single document. ``convert`` handles
+    streams with several ones, see ``convert_documents``.
+    """
+    try:
+        data = yaml.load(_to_text(text), Loader=Loader)
+    except yaml.YAMLError as e:
+        reporter.write_line(DEBUG_BASE['yaml'] % str(e).replace("<unicode string>", file_path))
+    else:
+        return data
+
+
+# Marks the end of YAMLDocuments
+_NO_DOCUMENT = object()
+
+
+class YAMLDocuments(object):
+    """Lazily iterates over the documents in the YAML ``stream`` (text, or a
+    text file object, which is read in chunks). Errors are written to
+    ``reporter`` and end the iteration; ``failed`` tells if one occured.
+
+    ``is_single`` parses up to the second document; iterating afterwards
+    still yields all of them. The stream can only be iterated once.
+    """
+
+    def __init__(self, stream, reporter=None, file_path=None, Loader=yaml_limits.SafeLoader):
+        self.stream = stream
+        self.reporter = reporter or Reporter()
+        self.file_path = file_path or "<unicode string>"
+        self.Loader = Loader
+        self.failed = False
+        self._items = None
+        # Documents parsed by is_single
+        self._peeked = []
+
+    def is_single(self):
+        """Returns whether the stream has at most one document.
+        """
+        if self._items is None:
+            self._items = self._load()
+        while len(self._peeked) < 2:
+            data = next(self._items, _NO_DOCUMENT)
+            if data is _NO_DOCUMENT:
+                break
+            self._peeked.append(data)
+        return len(self._peeked) < 2
+
+    def __iter__(self):
+        peeked, self._peeked = self._peeked, []
+        items, self._items = self._items or self._load(), None
+        return itertools.chain(peeked, items)
+
+    def _load(self):
+        try:
+            for data in yaml.load_all(self.stream, Loader=self.Loader):
+                yield data
+        except yaml.YAMLError as e:
+            self.failed = True
+            self.reporter.write_line(DEBUG_BASE['yaml']
+                                     % str(e).replace("<file>", self.file_path)
+                                             .replace("<unicode string>", self.file_path))
+
+
+def load_documents(stream, reporter=None, file_path=None, cache=None):
+    """Parses the YAML ``stream`` (see ``YAMLDocuments``) up to its second
+    document. Returns ``(data, None)`` if it has one document, ``(None,
+    docs)`` with the ``YAMLDocuments`` that yield all of them if it has
+    several and ``(None, None)`` on errors.
+
+    ``cache`` is used like in ``loads`` for streams with one document. Its
+    keys need the whole text, so a file is read at once if it is given.
+    """
+    if cache is not None:
+        if hasattr(stream, 'read'):
+            stream = stream.read()
+        data = _cached(stream, 'yaml', cache)
+        if data is not None:
+            return data, None
+    docs = YAMLDocuments(stream, reporter, file_path)
+    single = docs.is_single()
+    if docs.failed:
+        return None, None
+    if not single:
+        return None, docs
+    data = next(iter(docs), None)
+    if cache is not None and data is not None:
+        cache.set(cache.key(stream, 'yaml', LOADER_VERSION), data)
+    return data, None
+
+
+PARSERS = dict(
+    json=parse_json,
+    plist=parse_plist,
+    yaml=parse_yaml
+)
+
+
+def loads(text_or_bytes, fmt, reporter=None, file_path=None, cache=None, compact=False,
+          **kwargs):
+    """Parse ``text_or_bytes`` as ``fmt`` (one of ``FORMATS``) and return the
+    resulting Python object.
+
+    On errors, a message is written to ``reporter`` and ``None`` is returned.
+    ``file_path`` is only used for these messages. Additional keyword
+    arguments are forwarded to the parser (e.g. ``Loader`` for YAML).
+
+    If a ``cache`` (see ``fileconv.cache``) is given, successfully parsed data
+    is stored there and re-used for identical input.
+
+    If ``compact`` is true, the data is returned in the compact, read-only
+    form of ``fileconv.compact.freeze``. A ``compact.Freezer`` can be passed
+    to share strings between several files.
+    """
+    if fmt not in PARSERS:
+        raise ValueError("Loader for '%s' not supported/implemented." % fmt)
+
+    # Custom parser arguments may change the result; don't cache these
+    key = data = None
+    if cache is not None and not kwargs:
+        key = cache.key(text_or_bytes, fmt, LOADER_VERSION)
+        data = cache.get(key)
+
+    if data is None:
+        data = PARSERS[fmt](text_or_bytes, file_path or "<string>", reporter or Reporter(),
+                            **kwargs)
+        if key is not None and data is not None:
+            cache.set(key, data)
+    if compact and data is not None:
+        data = freeze(data, None if compact is True else compact)
+    return data
+
+
+def _cached(raw, fmt, cache):
+    """Returns the data ``loads`` cached for ``raw`` or ``None``.
+    """
+    if cache is None:
+        return None
+    return cache.get(cache.key(raw, fmt, LOADER_VERSION))
+
+
+def load(file_path, fmt=None, reporter=None, cache=None, **kwargs):
+    """Read and parse ``file_path``. The format is detected if ``fmt`` is
+    ``None``. Returns the parsed data or ``None`` on errors.
+    """
+    reporter = reporter or Reporter()
+    try:
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+    except (IOError, OSError) as e:
+        reporter.write_line('Error opening "%s": %s' % (file_path, str(e)))
+        return None
+
+    fmt = fmt or detect_format(file_path, raw)
+    if not fmt:
+        reporter.write_line("Unable to detect file type. (%s)" % file_path)
+        return None
+    return loads(raw, fmt, reporter, file_path, cache, **kwargs)
+
+
+###############################################################################
+# Dumping
+
+
+def validate_data(data, funcs):
+    """Check for incompatible data recursively.
+
+    ``funcs`` is supposed to be a set, or just iterable two times and
+    represents two functions, one to test whether the data is invalid
+    and one to validate it. Both functions accept one parameter:
+    the object to test.
+    The validation value can be a function (is callable) or be a value.
+    In the latter case the value will always be used instead of the
+    previous object.
+
+    Example:
+        funcs = ((lambda x: isinstance(x, float), int),
+                 (lambda x: isinstance(x, datetime.datetime), str),
+                 (lambda x: x is None, False))
+    """
+    checked = []
+
+    def check_recursive(obj):
+        # won't and shouldn't work for immutable types
+        # I mean, why would you even reference objects inside themselves?
+        if obj in checked:
+            return obj
+        checked.append(obj)
+
+        for is_invalid, validate in funcs:
+            if is_invalid(obj):
+                if callable(validate):
+                    obj = validate(obj)
+                else:
+                    obj = validate
+
+        if isinstance(obj, dict):  # dicts are fine
+            for key in obj:
+                obj[key] = check_recursive(obj[key])
+
+        if isinstance(obj, list):  # lists are too
+            for i in range(len(obj)):
+                obj[i] = check_recursive(obj[i])
+
+        if isinstance(obj, FrozenDict):  # see fileconv.compact
+            return obj.map_values(check_recursive)
+
+        if isinstance(obj, tuple):  # tuples are immutable ...
+            new_obj = [check_recursive(sub_obj) for sub_obj in obj]
+            return FrozenList(new_obj) if isinstance(obj, FrozenList) else tuple(new_obj)
+
+        if isinstance(obj, set):  # sets ...
+            for val in obj:
+                new_val = check_recursive(val)
+                if new_val != val:  # a set's components are hashable, no need to "is"
+                    obj.remove(val)
+                    obj.add(new_val)
+
+        return obj
+
+    return check_recursive(data)
+
+
+def key_ranks(sort_order=None, sort_numeric=True):
+    """Returns a function that maps dict keys to sort keys for ``sort_keys``.
+
+    Keys in ``sort_order`` come first (in that order), followed by numeric
+    keys (by value) if ``sort_numeric`` is true and the remaining keys in
+    alphabetical order. Ranks are memoized, grammars use few distinct keys.
+    """
+    ranks = {}
+    for i, key in enumerate(sort_order or ()):
+        ranks.setdefault(key, (0, i, ''))
+
+    def rank(key):
+        r = ranks.get(key)
+        if r is None:
+            if isinstance(key, int):
+                r = (1, key, str(key)) if sort_numeric else (2, 0, str(key))
+            elif sort_numeric and key.isdigit():
+                r = (1, int(key), key)
+            else:
+                r = (2, 0, key)
+            ranks[key] = r
+        return r
+
+    return rank
+
+
+def sort_keys(data, sort_order=None, sort_numeric=True, dict_type=None):
+    """Returns a copy of ``data`` with all dicts replaced by ``dict_type``
+    (``OrderedDict`` by default) instances with their keys sorted by
+    ``key_ranks(sort_order, sort_numeric)``. ``data`` is not modified and
+    shared objects (YAML aliases) remain shared.
+    """
+    dict_type = dict_type or collections.OrderedDict
+    rank = key_ranks(sort_order, sort_numeric)
+    done = {}
+
+    def sort_recursive(obj):
+        if isinstance(obj, dict):
+            new = done.get(id(obj))
+            if new is None:
+                new = done[id(obj)] = dict_type()
+                for key in sorted(obj, key=rank):
+                    new[key] = sort_recursive(obj[key])
+            return new
+        elif isinstance(obj, list):
+            new = done.get(id(obj))
+            if new is None:
+                new = done[id(obj)] = []
+                new.extend(sort_recursive(item) for item in obj)
+            return new
+        return obj
+
+    return sort_recursive(data)
+
+
+def _is_plist_data(x):
+    return PlistData is not None and isinstance(x, PlistData)
+
+
+VALIDATORS = dict(
+    json=(
+        # TOTEST: sets
+        (_is_plist_data, lambda x: x.data),  # plist
+        (lambda x: isinstance(x, datetime.date), str),  # yaml
+        (lambda x: isinstance(x, datetime.datetime), str)  # plist and yaml
+    ),
+    plist=(
+        # TOTEST: sets
+        # yaml; lost of "precision" when converting to datetime.datetime
+        (lambda x: isinstance(x, datetime.date), str),
+        (lambda x: x is None, False)
+    ),
+    yaml=(
+        (_is_plist_data, lambda x: x.data),  # plist
+    )
+)
+
+DEFAULT_PARAMS = dict(
+    json=dict(
+        skipkeys=True,
+        check_circular=False,  # there won't be references here, hopefully
+        indent=4
+    ),
+    plist=dict(
+        indent='\t'
+    ),
+    yaml=dict(Dumper=yaml.SafeDumper)
+)
+
+ALLOWED_PARAMS = dict(
+    json=(
+        'skipkeys',
+        'ensure_ascii',
+        'check_circular',
+        'allow_nan',
+        'sort_keys',
+        'indent',
+        'separators',
+        'encoding'
+    ),
+    plist=(
+        'indent',
+        'sort_keys',
+        'skipkeys'
+    ),
+    yaml=(
+        'default_style',
+        'default_flow_style',
+        'canonical',
+        'indent',
+        'width',
+        'allow_unicode',
+        'line_break',
+        'encoding',
+        'explicit_start',
+        'explicit_end',
+        'version',
+        'tags',
+        'Dumper',
+        'dedup'
+    )
+)
+
+
+def validate_params(fmt, params, default_params=None, allowed_params=None):
+    """Merge ``params`` into the defaults for ``fmt`` and strip everything that
+    is not allowed.
+    """
+    if default_params is None:
+        default_params = DEFAULT_PARAMS[fmt]
+    if allowed_params is None:
+        allowed_params = ALLOWED_PARAMS[fmt]
+
+    new_params = default_params.copy()
+    new_params.update(params)
+    for key in params.keys():
+        if key not in allowed_params:
+            del new_params[key]
+    return new_params
+
+
+def _json_default(obj):
+    if isinstance(obj, FrozenDict):
+        return collections.OrderedDict(obj.items())
+    raise TypeError("%r is not JSON serializable" % (obj,))
+
+
+def write_json(data, fp, params):
+    if sys.version_info >= (3,):
+        # json.dump does not support `encoding` on Python 3
+        params.pop('encoding', None)
+    json.dump(data, fp, default=_json_default, **params)
+
+
+def write_plist(data, fp, params):
+    PlistWriter(fp, **params).write(data)
+
+
+def write_json_array(items, fp, params):
+    """Writes the iterable ``items`` as JSON array, one item at a time.
+    The output is the same as with ``write_json(list(items), fp, params)``.
+    """
+    params = params.copy()
+    if sys.version_info >= (3,):
+        params.pop('encoding', None)
+    indent = params.get('indent')
+    if isinstance(indent, int):
+        indent = ' ' * indent
+    if params.get('separators'):
+        item_separator = params['separators'][0]
+    else:
+        item_separator = ',' if indent is not None else ', '
+
+    fp.write('[')
+    empty = True
+    for item in items:
+        text = json.dumps(item, default=_json_default, **params)
+        if indent is not None:
+            # No raw line breaks in JSON strings, these are all structural
+            text = '\n' + indent + text.replace('\n', '\n' + indent)
+        fp.write(text if empty else item_separator + text)
+        empty = False
+    fp.write(']' if empty or indent is None else '\n]')
+
+
+def write_plist_array(items, fp, params):
+    PlistWriter(fp, **params).write_array(items)
+
+
+def write_yaml(data, fp, params):
+    """Writes ``data`` to ``fp`` or returns it as string if ``fp`` is None.
+
+    With the ``dedup`` parameter (True or the minimum number of nodes),
+    repeated subtrees are written once and referenced with aliases
+    (see ``fileconv.dedup``).
+    """
+    params = params.copy()
+    min_size = params.pop('dedup', None)
+    if min_size:
+        from .dedup import deduplicate, MIN_SIZE
+        data = deduplicate(data, MIN_SIZE if min_size is True else min_size)
+    return yaml.dump(data, fp, **params)
+
+
+WRITERS = dict(
+    json=write_json,
+    plist=write_plist,
+    yaml=write_yaml
+)
+
+# Write an iterable of items as one array
+ARRAY_WRITERS = dict(
+    json=write_json_array,
+    plist=write_plist_array
+)
+
+
+def dump(obj, fmt, fp, validate=True, **params):
+    """Write ``obj`` as ``fmt`` to the text stream ``fp``.
+
+    The data is checked for values that can not be represented in the target
+    format (see ``VALIDATORS``) unless ``validate`` is false and ``params``
+    are filtered according to ``ALLOWED_PARAMS``.
+    """
+    if fmt not in WRITERS:
+        raise ValueError("Dumper for '%s' not supported/implemented." % fmt)
+    if validate:
+        obj = validate_data(obj, VALIDATORS[fmt])
+    WRITERS[fmt](obj, fp, validate_params(fmt, params))
+
+
+def dumps(obj, fmt, **params):
+    """Return ``obj`` serialized as ``fmt`` (one of ``FORMATS``) as string.
+    See ``dump``.
+    """
+    if sys.version_info < (3,):
+        fp = io.BytesIO()
+        dump(obj, fmt, _UTF8Writer(fp), **params)
+        return fp.getvalue().decode('utf-8')
+    fp = io.StringIO()
+    dump(obj, fmt, fp, **params)
+    return fp.getvalue()
+
+
+###############################################################################
+# Conversion
+
+
+def get_ext_appendix(file_path, fmt):
+    """Returns the appendix part of a file_name in style ".json-Appendix",
+    "json" being ``fmt`` respectively, or ``None``.
+    """
+    if file_path:
+        ret = re.search(EXT_REGEX % fmt, file_path)
+        if ret and ret.group(1):
+            return ret.group(1)
+    return None
+
+
+def file_is_valid(file_path, fmt, head=None):
+    """Returns a boolean whether ``file_path`` is a valid file for ``fmt``.
+
+    ``head`` can be the first few lines of the file (str or bytes) and is
+    used to detect Property Lists with a non-default extension.
+    """
+    if (get_ext_appendix(file_path, fmt) is not None
+            or os.path.splitext(file_path)[1] == '.' + fmt):
+        return True
+
+    # Plists have no scope (syntax definition) since they are XML.
+    # Instead, check for the DOCTYPE in the first three lines.
+    if fmt == 'plist' and head:
+        for line in _to_text(head[:1024]).splitlines()[:3]:
+            if line.startswith(PLIST_DOCTYPE):
+                return True
+    return False
+
+
+def detect_format(file_path, head=None):
+    """Returns the format of ``file_path`` or ``None``. See ``file_is_valid``.
+    """
+    for fmt in FORMATS:
+        if file_is_valid(file_path, fmt, head):
+            return fmt
+    return None
+
+
+def load_options(text, fmt):
+    """Search for a line comment in the first few lines which starts with
+    ``"[PackageDev]"`` and parse the following things using ``yaml.safe_load``
+    after wrapping them in "{}".
+    """
+    for line in _to_text(text[:1024]).splitlines()[:3]:
+        optstr = re.search(OPT_REGEX[fmt], line)
+        if not optstr:
+            continue
+        try:
+            return yaml.safe_load('{%s}' % optstr.group(1))
+        except yaml.YAMLError:
+            continue
+
+    return None
+
+
+def new_file_path(file_path, source, target, ext=None, opts=None, head=None):
+    """Determine the path of the converted file.
+
+    The extension is taken from ``ext``, the inline options or derived from
+    the source file's extension using "appendixes":
+
+        ".YAML-ppplist" yaml  -> plist ".ppplist"
+        ".json"         json  -> yaml  ".yaml"
+        ".tmplist"      plist -> json  ".JSON-tmplist"
+    """
+    no_ext, old_ext = os.path.splitext(file_path)
+    if ext:
+        new_ext = '.' + ext
+    elif opts and 'ext' in opts:
+        new_ext = '.' + opts['ext']
+    else:
+        appendix = get_ext_appendix(file_path, source)
+        if appendix:
+            new_ext = '.' + appendix
+        elif old_ext != '.' + source and file_is_valid(file_path, source, head):
+            new_ext = ".%s-%s" % (target.upper(), old_ext[1:])
+        else:
+            new_ext = '.' + target
+
+    return no_ext + new_ext
+
+
+def _make_dirs(new_path, reporter):
+    new_dir = os.path.dirname(new_path)
+    if new_dir and not os.path.exists(new_dir):
+        try:
+            os.makedirs(new_dir)
+        except OSError:
+            reporter.write_line("Could not create folder '%s'" % new_dir)
+            return False
+    return True
+
+
+def _validated(documents, fmt):
+    for data in documents:
+        yield validate_data(data, VALIDATORS[fmt])
+
+
+def convert_documents(path, target, new_path, reporter=None, documents='array', **params):
+    """Convert the YAML stream at ``path`` with multiple documents.
+
+    The file is parsed lazily and every document is written as soon as it
+    has been loaded, so only one document is in memory at a time.
+    ``documents`` selects the output:
+
+        'array'   One file with an array of all documents at ``new_path``.
+        'files'   One file per document, numbered starting with 1 like
+                  "name.1.json". Returns the path of the first file.
+    """
+    reporter = reporter or Reporter()
+    with io.open(path, encoding='utf-8') as f:
+        docs = YAMLDocuments(f, reporter, path)
+        return _write_documents(docs, target, new_path, reporter, documents, params)
+
+
+def _write_documents(docs, target, new_path, reporter, documents, params):
+    """Writes the documents of the ``YAMLDocuments`` ``docs``, see
+    ``convert_documents``.
+    """
+    if documents not in ('array', 'files'):
+        raise ValueError("'documents' must be 'array' or 'files', not %r" % documents)
+    params = validate_params(target, params)
+
+    if documents == 'array':
+        if not _make_dirs(new_path, reporter):
+            return None
+        reporter.write_line("Writing %s array... (%s)" % (NAMES[target], new_path))
+        with open_text(new_path) as out:
+            ARRAY_WRITERS[target](_validated(docs, target), out, params)
+        return None if docs.failed else new_path
+
+    no_ext, new_ext = os.path.splitext(new_path)
+    first = None
+    for i, data in enumerate(_validated(docs, target), 1):
+        doc_path = "%s.%d%s" % (no_ext, i, new_ext)
+        if not _make_dirs(doc_path, reporter):
+            return None
+        reporter.write_line("Writing %s... (%s)" % (NAMES[target], doc_path))
+        with open_text(doc_path) as out:
+            WRITERS[target](data, out, params)
+        first = first or doc_path
+    return None if docs.failed else first
+
+
+def convert(path, target=None, source=None, ext=None, reporter=None, cache=None,
+            documents='array', **params):
+    """Convert the file at ``path`` to ``target`` and return the new file's
+    path or ``None`` if the conversion failed.
+
+    ``source`` is detected automatically if omitted. ``target`` and ``ext``
+    are taken from the file's inline options (e.g.
+    ``# [PackageDev] target_format: plist, ext: tmLanguage``) if omitted.
+    ``cache`` is passed to ``loads`` and ``params`` are forwarded to the dumper.
+
+    YAML files with more than one document are converted lazily with
+    ``convert_documents``, see there for ``documents``.
+    """
+    reporter = reporter or Reporter()
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(1024)
+    except (IOError, OSError) as e:
+        reporter.write_line('Error opening "%s": %s' % (path, str(e)))
+        return None
+
+    source = source or detect_format(path, head)
+    if not source:
+        reporter.write_line("Unable to detect file type. (%s)" % path)
+        return None
+    if source not in PARSERS:
+        reporter.write_line("Loader for '%s' not supported/implemented." % source)
+        return None
+
+    opts = load_options(head, source)
+    if not target:
+        if not opts or 'target_format' not in opts:
+            reporter.write_line("Could not detect target format. (%s)" % path)
+            return None
+        target = opts['target_format']
+
+    if target == source:
+        reporter.write_line("Target and source file format are identical. (%s)" % target)
+        return None
+    if target not in WRITERS:
+        reporter.write_line("Dumper for '%s' not supported/implemented." % target)
+        return None
+
+    new_path = new_file_path(path, source, target, ext, opts, head)
+    reporter.write_line("Parsing %s... (%s)" % (NAMES[source], path))
+    if source == 'yaml':
+        with io.open(path, encoding='utf-8-sig') as f:
+            data, docs = load_documents(f, reporter, path, cache)
+            if docs is not None:
+                reporter.write_line("Found multiple documents, converting them one by one.")
+                return _write_documents(docs, target, new_path, reporter, documents, params)
+    else:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        data = loads(raw, source, reporter, path, cache)
+    if not data:
+        return None
+
+    if not _make_dirs(new_path, reporter):
+        return None
+
+    reporter.write_line("Writing %s... (%s)" % (NAMES[target], new_path))
+    with open_text(new_path) as f:
+        dump(data, target, f, **params)
+
+    return new_path
+
+
+# Dump the compact representation like regular dicts and lists
+yaml.SafeDumper.add_representer(FrozenDict, yaml.SafeDumper.represent_dict)
+yaml.SafeDumper.add_representer(FrozenList, yaml.SafeDumper.represent_list)
+
+# Add the internal plistlib dict wrapper to the safe dumper (Python < 3.4)
+if hasattr(plistlib, '_InternalDict'):
+    yaml.SafeDumper.add_representer(
+        plistlib._InternalDict,
+        yaml.SafeDumper.represent_dict
+    )
@@ -0,0 +1,257 @@
+"""Caches for parsed files, keyed by a hash of the source's contents and the
+version of the parser that produced them.
+
+Parsing is by far the most expensive part of a conversion, especially for
+big YAML files. Since the loaders' results are mutated by the dumpers
+(see ``api.validate_data``), cached entries are stored serialized and every
+``get`` returns a fresh copy.
+
+Entries are serialized with ``marshal`` where possible, which handles the
+plain dicts, lists and strings of a parsed syntax definition several times
+faster than ``pickle``. Everything else (dates, ``OrderedDict``s, ...) falls
+back to ``pickle``. Each entry carries a header with a checksum that is
+verified when the entry is read; broken entries are treated as misses.
+"""
+import hashlib
+import marshal
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+
+
+__all__ = ['CacheError', 'cache_key', 'serialize', 'deserialize',
+           'ParseCache', 'DiskParseCache']
+
+
+class CacheError(Exception):
+    """Raised when a cache entry can not be deserialized.
+    """
+    pass
+
+
+# magic, serializer, crc32 of the payload, length of the payload
+HEADER = struct.Struct('<4scIQ')
+MAGIC = b'FCPC'
+MARSHAL, PICKLE = b'm', b'p'
+
+
+def cache_key(raw, fmt, version=''):
+    """Returns the cache key for the source ``raw`` (str or bytes) parsed as
+    ``fmt`` by a loader identified by ``version``.
+
+    Since ``marshal``'s format is specific to the Python version, it should
+    be part of ``version``.
+    """
+    h = hashlib.sha1(("%s\0%s\0" % (fmt, version)).encode('utf-8'))
+    h.update(raw if isinstance(raw, bytes) else raw.encode('utf-8'))
+    return h.hexdigest()
+
+
+def serialize(data):
+    try:
+        kind, payload = MARSHAL, marshal.dumps(data)
+    except ValueError:
+        # Unmarshallable object somewhere in there
+        kind, payload = PICKLE, pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+    return HEADER.pack(MAGIC, kind, zlib.crc32(payload) & 0xffffffff, len(payload)) + payload
+
+
+def deserialize(blob):
+    if len(blob) < HEADER.size:
+        raise CacheError("Truncated header")
+    magic, kind, crc, length = HEADER.unpack_from(blob)
+    payload = blob[HEADER.size:]
+    if magic != MAGIC or len(payload) != length:
+        raise CacheError("Invalid header")
+    if zlib.crc32(payload) & 0xffffffff != crc:
+        raise CacheError("Checksum mismatch")
+
+    try:
+        if kind == MARSHAL:
+            return marshal.loads(payload)
+        elif kind == PICKLE:
+            return pickle.loads(payload)
+    except Exception as e:
+        raise CacheError(str(e))
+    raise CacheError("Unknown serializer %r" % kind)
+
+
+class ParseCache(object):
+    """Thread-safe in-memory cache of parsed data with LRU eviction.
+
+        ParseCache(max_size=32 * 1024 * 1024)
+
+            * max_size (int)
+                Upper bound for the summed size of all serialized entries,
+                in bytes.
+
+        Defines the following methods:
+
+            key(raw, fmt, version='')
+            get(key)
+            set(key, data)
+            clear()
+    """
+    key = staticmethod(cache_key)
+
+    def __init__(self, max_size=32 * 1024 * 1024):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns a copy of the data stored for ``key`` or ``None``.
+        """
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return deserialize(blob)
+
+    def set(self, key, data):
+        blob = serialize(data)
+        if len(blob) > self.max_size:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = blob
+            self.size += len(blob)
+            while self.size > self.max_size:
+                self.size -= len(self._entries.popitem(last=False)[1])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class DiskParseCache(ParseCache):
+    """Persistent cache storing one file per entry in ``directory``.
+
+        DiskParseCache(directory, max_size=64 * 1024 * 1024)
+
+            * directory (str)
+                Created on first write.
+
+            * max_size (int)
+                Upper bound for the size of all entries on disk, in bytes.
+                When it is exceeded, the least recently used entries are
+                removed. Usage is tracked through the files' modification
+                times, so several processes can share a directory.
+
+    Has the same interface as ``ParseCache``. Invalid entries are removed
+    when they are read.
+    """
+    ext = '.fcpc'
+
+    def __init__(self, directory, max_size=64 * 1024 * 1024):
+        super(DiskParseCache, self).__init__(max_size)
+        self.directory = directory
+        # Unknown until we scanned the directory
+        self.size = None
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.ext)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                blob = f.read()
+        except (IOError, OSError):
+            self.misses += 1
+            return None
+
+        try:
+            data = deserialize(blob)
+        except CacheError:
+            self.misses += 1
+            self._remove(path)
+            return None
+
+        self.hits += 1
+        try:
+            os.utime(path, None)  # mark as recently used
+        except OSError:
+            pass
+        return data
+
+    def set(self, key, data):
+        blob = serialize(data)
+        if len(blob) > self.max_size:
+            return
+        # Write atomically; readers must never see a partial entry
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        except OSError:
+            # Created concurrently or not writable; try again next time
+            return
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            self._remove(tmp_path)
+            return
+
+        with self._lock:
+            if self.size is not None:
+                self.size += len(blob)
+            if self.size is None or self.size > self.max_size:
+                self._evict()
+
+    def _entries_on_disk(self):
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(self.ext):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue  # removed by another process
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def _evict(self):
+        entries = self._entries_on_disk()
+        size = sum(e[1] for e in entries)
+        if size > self.max_size:
+            # Shrink a bit further so we don't have to rescan on every write
+            target = self.max_size * 3 // 4
+            for mtime, file_size, path in sorted(entries):
+                if size <= target:
+                    break
+                if self._remove(path):
+                    size -= file_size
+        self.size = size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            return False
+        return True
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._entries_on_disk():
+                self._remove(path)
+            self.size = 0
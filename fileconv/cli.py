@@ -0,0 +1,157 @@
+"""Command line interface for ``fileconv``. Run ``python -m fileconv -h``
+from the package's root directory for usage information.
+
+Does not import ``sublime`` and can be used to rebuild syntax definitions in
+CI or shell scripts, e.g.:
+
+    python -m fileconv --jobs 4 "Syntax Definitions"/*.YAML-tmLanguage
+
+If a conversion daemon is running (``python -m fileconv --serve``), the files
+are converted by it. ``fileconv.api`` is only imported when they are not.
+"""
+import argparse
+import os
+import sys
+import time
+
+from . import client
+from .reporters import StreamReporter, BufferReporter
+
+# Same as `api.FORMATS`, but without importing it
+FORMATS = ('json', 'plist', 'yaml')
+
+
+def _convert_job(path, target, source, ext, params, cache_dir=None):
+    """Run one conversion with a buffered reporter so that the output of
+    parallel jobs can be printed in one piece.
+    """
+    from . import api
+
+    cache = None
+    if cache_dir:
+        from .cache import DiskParseCache
+        cache = DiskParseCache(cache_dir)
+
+    reporter = BufferReporter()
+    try:
+        new_path = api.convert(path, target, source, ext, reporter, cache, **params)
+    except Exception as e:
+        reporter.write_line("Unexpected error occured while converting \"%s\": %r"
+                            % (path, e))
+        new_path = None
+    return path, new_path, reporter.getvalue()
+
+
+def _iter_jobs(paths, jobs, *args):
+    if not jobs or jobs == 1 or len(paths) < 2:
+        for path in paths:
+            yield _convert_job(path, *args)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(_convert_job, path, *args) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m fileconv",
+        description="Convert between JSON, Property List and YAML files. "
+                    "Target format and extension are read from the files' "
+                    "[PackageDev] options if not specified."
+    )
+    parser.add_argument('paths', metavar='FILE', nargs='*',
+                        help="file to convert")
+    parser.add_argument('-t', '--target', dest='target_format', choices=FORMATS,
+                        help="target format")
+    parser.add_argument('-s', '--source', dest='source_format', choices=FORMATS,
+                        help="source format (detected if omitted)")
+    parser.add_argument('-e', '--ext',
+                        help="extension of the new file, without leading dot")
+    parser.add_argument('-j', '--jobs', type=int,
+                        help="number of files to convert in parallel; "
+                             "0 uses one process per CPU (default: 1)")
+    parser.add_argument('--block-style', action='store_true',
+                        help="use block style when dumping YAML")
+    parser.add_argument('--dedup', nargs='?', type=int, const=True, metavar='MIN_SIZE',
+                        help="write repeated subtrees once as YAML anchors and aliases, "
+                             "optionally only those with at least MIN_SIZE nodes")
+    parser.add_argument('--documents', choices=('array', 'files'),
+                        help="how to write YAML files with multiple documents: as one array "
+                             "(default) or to numbered files like NAME.1.json")
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="only report errors")
+    parser.add_argument('--cache-dir', metavar='PATH',
+                        default=os.environ.get('FILECONV_CACHE_DIR'),
+                        help="keep parsed files in a persistent cache in this directory "
+                             "(default: $FILECONV_CACHE_DIR)")
+
+    daemon = parser.add_argument_group("conversion daemon")
+    daemon.add_argument('--serve', action='store_true',
+                        help="run the conversion daemon in the foreground; "
+                             "--jobs is the number of workers (default: one per CPU)")
+    daemon.add_argument('--stop', action='store_true',
+                        help="stop a running conversion daemon")
+    daemon.add_argument('--socket', metavar='PATH',
+                        help="UNIX socket of the daemon (default: $FILECONV_SOCKET or %s)"
+                             % client.default_socket_path())
+    daemon.add_argument('--no-daemon', action='store_true',
+                        help="always convert in this process")
+    return parser
+
+
+def main(argv=None, reporter=None):
+    """Entry point of ``python -m fileconv``. Returns the exit code.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    reporter = reporter or StreamReporter()
+
+    if args.serve:
+        from .daemon import serve, DaemonRunningError
+        try:
+            serve(args.socket, args.jobs or None, reporter, args.cache_dir)
+        except DaemonRunningError as e:
+            reporter.write_line(str(e))
+            return 1
+        return 0
+    if args.stop:
+        return 0 if client.shutdown(args.socket) else 1
+    if not args.paths:
+        parser.error("no files to convert")
+
+    params = {}
+    if args.block_style:
+        params['default_flow_style'] = False
+    if args.dedup:
+        params['dedup'] = args.dedup
+    if args.documents:
+        params['documents'] = args.documents
+    jobs = args.jobs if args.jobs != 0 else (os.cpu_count() or 1)
+    convert_args = (args.target_format, args.source_format, args.ext, params)
+
+    start_time = time.time()
+    results = None
+    if not args.no_daemon:
+        results = client.convert_many(args.paths, *convert_args, socket_path=args.socket)
+    if results is None:
+        results = _iter_jobs(args.paths, jobs, *(convert_args + (args.cache_dir,)))
+
+    failed = 0
+    for path, new_path, text in results:
+        if new_path is None:
+            failed += 1
+            reporter.write(text)
+        elif not args.quiet:
+            reporter.write(text)
+
+    if not args.quiet:
+        reporter.write_line("[Finished %d file(s) in %.3fs, %d failed]"
+                            % (len(args.paths), time.time() - start_time, failed))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Thin client for the conversion daemon (see ``fileconv.daemon``).
+
+Only uses the standard library's ``socket`` and ``json`` modules so that it
+can be imported cheaply. When no daemon is listening, conversions are run
+in-process with ``fileconv.api`` instead.
+
+The protocol is line-based: each request and each response is one JSON
+object followed by ``"\\n"``. Requests carry an ``id`` that is repeated in
+the response, since responses are sent in order of completion.
+
+    {"id": 0, "path": "/abs/file.YAML-tmLanguage", "target": null,
+     "source": null, "ext": null, "params": {}}
+    {"id": 0, "path": "...", "new_path": "/abs/file.tmLanguage", "output": "..."}
+"""
+import json
+import os
+import socket
+import tempfile
+
+
+__all__ = ['default_socket_path', 'Client', 'convert_many', 'convert']
+
+
+def default_socket_path():
+    """Returns the value of the ``FILECONV_SOCKET`` environment variable or a
+    per-user path in the temporary directory.
+    """
+    path = os.environ.get('FILECONV_SOCKET')
+    if path:
+        return path
+    uid = os.getuid() if hasattr(os, 'getuid') else 0
+    return os.path.join(tempfile.gettempdir(), 'fileconv-%d.sock' % uid)
+
+
+class Client(object):
+    """A connection to a running conversion daemon.
+
+    ``Client.connect(socket_path=None)`` returns ``None`` if no daemon is
+    listening (or UNIX sockets are not supported on this platform).
+    """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.stream = sock.makefile('rwb')
+
+    @classmethod
+    def connect(cls, socket_path=None):
+        if not hasattr(socket, 'AF_UNIX'):
+            return None
+        socket_path = socket_path or default_socket_path()
+        if not os.path.exists(socket_path):
+            return None
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(socket_path)
+        except (IOError, OSError):
+            # Stale socket file; the daemon is not running anymore
+            sock.close()
+            return None
+        return cls(sock)
+
+    def send(self, request):
+        self.stream.write(json.dumps(request).encode('utf-8') + b'\n')
+        self.stream.flush()
+
+    def receive(self):
+        line = self.stream.readline()
+        if not line:
+            raise EOFError("Conversion daemon closed the connection")
+        return json.loads(line.decode('utf-8'))
+
+    def request(self, request):
+        """Send a single request and wait for its response.
+        """
+        self.send(request)
+        return self.receive()
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+def _make_request(i, path, target, source, ext, params):
+    return dict(id=i, path=os.path.abspath(path), target=target, source=source, ext=ext,
+                params=params)
+
+
+def convert_many(paths, target=None, source=None, ext=None, params=None, socket_path=None):
+    """Let the daemon convert all ``paths`` concurrently and yield tuples of
+    ``(path, new_path, output)`` in order of completion.
+
+    Returns ``None`` if no daemon is running.
+    """
+    client = Client.connect(socket_path)
+    if client is None:
+        return None
+    return _iter_responses(client, paths, target, source, ext, params or {})
+
+
+def _iter_responses(client, paths, target, source, ext, params):
+    with client:
+        for i, path in enumerate(paths):
+            client.send(_make_request(i, path, target, source, ext, params))
+        for _ in paths:
+            response = client.receive()
+            yield paths[response['id']], response['new_path'], response['output']
+
+
+def convert(path, target=None, source=None, ext=None, reporter=None, socket_path=None,
+            **params):
+    """Same as ``fileconv.api.convert``, but served by the daemon if one is
+    running.
+    """
+    results = convert_many([path], target, source, ext, params, socket_path)
+    if results is None:
+        from . import api
+        return api.convert(path, target, source, ext, reporter, **params)
+
+    for _, new_path, output in results:
+        if reporter is not None and output:
+            reporter.write(output)
+        return new_path
+
+
+def shutdown(socket_path=None):
+    """Ask a running daemon to exit. Returns whether one was running.
+    """
+    client = Client.connect(socket_path)
+    if client is None:
+        return False
+    with client:
+        client.request(dict(id=0, command='shutdown'))
+    return True
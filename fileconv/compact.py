@@ -0,0 +1,244 @@
+"""A compact, read-only representation of parsed data.
+
+A big grammar holds the same strings many times
+(``punctuation.definition.string.begin``, ``#comments``, ``$self``) and a
+dict for every rule. ``freeze`` returns a copy that needs a lot less
+memory:
+
+    * equal strings (keys and values) are the same object,
+    * dicts become ``FrozenDict``s, which store a tuple of values and a
+      reference to their ``KeyLayout``. All dicts with the same keys in the
+      same order share one layout, like the key-sharing dicts CPython uses
+      for instance attributes.
+    * lists become ``FrozenList``s, a tuple subclass.
+
+    data = freeze(api.load(path))
+
+Frozen data can be passed to ``fileconv.api.dump`` and the dumpers like
+any other data and ``thaw`` converts it back to dicts and lists. A
+``Freezer`` can be re-used for several files, so that they share their
+strings and layouts as well. ``intern_strings`` only de-duplicates the
+strings and keeps the data mutable.
+"""
+import sys
+
+if sys.version_info < (3,):
+    from collections import Mapping
+    str_types = (str, unicode)  # NOQA
+else:
+    from collections.abc import Mapping
+    str_types = (str,)
+
+
+__all__ = ['FrozenDict', 'FrozenList', 'KeyLayout', 'Freezer', 'freeze', 'thaw',
+           'intern_strings']
+
+
+class KeyLayout(object):
+    """The keys of a ``FrozenDict`` and their indexes.
+
+    Small layouts, which most rules have, are searched linearly and don't
+    need a dict of indexes.
+    """
+    __slots__ = ('keys', 'index')
+
+    # Build a dict of indexes for layouts with more keys
+    MAX_LINEAR = 8
+
+    def __init__(self, keys):
+        self.keys = tuple(keys)
+        self.index = None
+        if len(self.keys) > self.MAX_LINEAR:
+            self.index = dict((key, i) for i, key in enumerate(self.keys))
+
+    def find(self, key):
+        """Returns the index of ``key`` or -1.
+        """
+        if self.index is not None:
+            return self.index.get(key, -1)
+        try:
+            return self.keys.index(key)
+        except ValueError:
+            return -1
+
+    def __reduce__(self):
+        return (KeyLayout, (self.keys,))
+
+
+class FrozenDict(Mapping):
+    """A read-only mapping that keeps the order of its keys.
+
+        FrozenDict(items)
+        FrozenDict(layout, values)
+    """
+    __slots__ = ('_layout', '_values')
+
+    def __init__(self, layout, values=None):
+        if values is None:
+            items = list(layout.items() if isinstance(layout, Mapping) else layout)
+            layout = KeyLayout(key for key, _ in items)
+            values = (value for _, value in items)
+        self._layout = layout
+        self._values = tuple(values)
+
+    @property
+    def layout(self):
+        return self._layout
+
+    def __getitem__(self, key):
+        i = self._layout.find(key)
+        if i < 0:
+            raise KeyError(key)
+        return self._values[i]
+
+    def __iter__(self):
+        return iter(self._layout.keys)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, key):
+        return self._layout.find(key) >= 0
+
+    def keys(self):
+        return list(self._layout.keys)
+
+    def values(self):
+        return list(self._values)
+
+    def items(self):
+        return list(zip(self._layout.keys, self._values))
+
+    def get(self, key, default=None):
+        i = self._layout.find(key)
+        return default if i < 0 else self._values[i]
+
+    def map_values(self, func):
+        """Returns a ``FrozenDict`` with the same layout and ``func`` applied
+        to every value, or ``self`` if ``func`` returned all values unchanged.
+        """
+        values = [func(value) for value in self._values]
+        if all(new is old for new, old in zip(values, self._values)):
+            return self
+        return FrozenDict(self._layout, values)
+
+    def __eq__(self, other):
+        if isinstance(other, FrozenDict):
+            if self._layout is other._layout:
+                return self._values == other._values
+        elif not isinstance(other, Mapping):
+            return NotImplemented
+        if len(self) != len(other):
+            return False
+        return dict(self.items()) == dict(other.items())
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "FrozenDict(%r)" % (self.items(),)
+
+    def __reduce__(self):
+        return (FrozenDict, (self._layout, self._values))
+
+
+class FrozenList(tuple):
+    """A tuple that is dumped like a list.
+    """
+    __slots__ = ()
+
+    def __eq__(self, other):
+        # Equal to lists with equal items, like the list it was made of
+        if isinstance(other, list):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = tuple.__hash__
+
+    def __repr__(self):
+        return "FrozenList(%s)" % tuple.__repr__(self)
+
+
+class Freezer(object):
+    """Converts data to its compact representation. Strings and key layouts
+    are shared between all data frozen by one instance.
+    """
+
+    def __init__(self):
+        self.strings = {}
+        # keys tuple -> KeyLayout
+        self.layouts = {}
+
+    def intern(self, obj):
+        """Returns the first string equal to ``obj`` seen by this instance.
+        """
+        return self.strings.setdefault(obj, obj)
+
+    def layout(self, keys):
+        keys = tuple(keys)
+        # Keep 1 and True apart, they are equal
+        layout_key = keys if all(type(key) in str_types for key in keys) \
+            else (keys, tuple(type(key) for key in keys))
+        layout = self.layouts.get(layout_key)
+        if layout is None:
+            layout = self.layouts[layout_key] = KeyLayout(keys)
+        return layout
+
+    def freeze(self, obj):
+        if isinstance(obj, str_types):
+            return self.strings.setdefault(obj, obj)
+        elif isinstance(obj, (dict, FrozenDict)):
+            intern = self.intern
+            layout = self.layout(intern(key) if isinstance(key, str_types) else key
+                                 for key in obj)
+            return FrozenDict(layout, [self.freeze(value) for value in obj.values()])
+        elif isinstance(obj, (list, tuple)):
+            return FrozenList([self.freeze(value) for value in obj])
+        return obj
+
+    def intern_strings(self, obj):
+        if isinstance(obj, str_types):
+            return self.strings.setdefault(obj, obj)
+        elif isinstance(obj, dict):
+            new = type(obj)()
+            intern = self.intern
+            for key, value in obj.items():
+                if isinstance(key, str_types):
+                    key = intern(key)
+                new[key] = self.intern_strings(value)
+            return new
+        elif isinstance(obj, list):
+            return [self.intern_strings(value) for value in obj]
+        return obj
+
+
+def freeze(data, freezer=None):
+    """Returns a compact, read-only copy of ``data``. See the module's
+    documentation.
+    """
+    return (freezer or Freezer()).freeze(data)
+
+
+def thaw(data, dict_type=dict):
+    """Returns a mutable copy of frozen ``data`` with ``dict_type`` instances
+    instead of ``FrozenDict``s and lists instead of ``FrozenList``s.
+    """
+    if isinstance(data, FrozenDict):
+        return dict_type((key, thaw(value, dict_type)) for key, value in data.items())
+    elif isinstance(data, FrozenList):
+        return [thaw(value, dict_type) for value in data]
+    return data
+
+
+def intern_strings(data, freezer=None):
+    """Returns a copy of ``data`` (dicts and lists) in which equal strings
+    are the same object.
+    """
+    return (freezer or Freezer()).intern_strings(data)
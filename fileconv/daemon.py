@@ -0,0 +1,217 @@
+"""A long-lived conversion server listening on a local UNIX socket.
+
+Start it with ``python -m fileconv --serve``; ``python -m fileconv`` and
+``fileconv.client`` will then send their conversions to it instead of
+importing and parsing everything in a fresh interpreter.
+
+Requests are processed by a pool of worker processes. Each worker keeps a
+``ParseCache`` of its own, and requests for the same path are always routed
+to the same worker so that unchanged files are not parsed twice. With a
+``cache_dir``, the workers share a persistent ``DiskParseCache`` instead.
+
+See ``fileconv.client`` for the protocol. Requires Python 3.5+.
+"""
+import asyncio
+import json
+import os
+import signal
+import socket
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from . import api
+from .cache import ParseCache, DiskParseCache
+from .client import default_socket_path
+from .reporters import BufferReporter
+
+
+__all__ = ['ConversionServer', 'DaemonRunningError', 'serve']
+
+
+class DaemonRunningError(Exception):
+    """Raised when another daemon is listening on the socket.
+    """
+    pass
+
+
+# The cache of the current worker process, created on the first request
+# (ProcessPoolExecutor's initializer is new in Python 3.7)
+_cache = None
+
+
+def _get_cache(cache_size, cache_dir=None):
+    global _cache
+    if _cache is None:
+        if cache_dir:
+            _cache = DiskParseCache(cache_dir, cache_size)
+        else:
+            _cache = ParseCache(cache_size)
+    return _cache
+
+
+def _convert_request(request, cache_size, cache_dir=None):
+    """Runs in a worker process.
+    """
+    reporter = BufferReporter()
+    try:
+        new_path = api.convert(request['path'], request.get('target'), request.get('source'),
+                               request.get('ext'), reporter, _get_cache(cache_size, cache_dir),
+                               **(request.get('params') or {}))
+    except Exception as e:
+        reporter.write_line("Unexpected error occured while converting \"%s\": %r"
+                            % (request['path'], e))
+        new_path = None
+    return dict(id=request.get('id'), path=request['path'], new_path=new_path,
+                output=reporter.getvalue())
+
+
+class ConversionServer(object):
+    """Accepts conversion requests on ``socket_path`` and distributes them to
+    ``jobs`` single-process workers.
+
+        ConversionServer(socket_path=None, jobs=None, cache_size=32 * 1024 * 1024,
+                         cache_dir=None)
+
+            * socket_path (str)
+                Defaults to ``client.default_socket_path()``.
+
+            * jobs (int)
+                Number of worker processes, defaults to the number of CPUs.
+
+            * cache_size (int)
+                Maximum size of each worker's parse cache in bytes.
+
+            * cache_dir (str)
+                Directory for a persistent parse cache shared by all workers.
+                ``cache_size`` then applies to the whole directory.
+    """
+
+    def __init__(self, socket_path=None, jobs=None, cache_size=32 * 1024 * 1024,
+                 cache_dir=None):
+        self.socket_path = socket_path or default_socket_path()
+        self.cache_size = cache_size
+        self.cache_dir = cache_dir
+        jobs = jobs or os.cpu_count() or 1
+        self.executors = [ProcessPoolExecutor(1) for _ in range(jobs)]
+        self.server = None
+        self.stopped = None
+        # (st_dev, st_ino) of the socket file this server created
+        self.socket_id = None
+
+    def _executor_for(self, path):
+        # Same path, same worker, same cache
+        return self.executors[zlib.crc32(path.encode('utf-8')) % len(self.executors)]
+
+    async def _process(self, request, writer):
+        loop = asyncio.get_event_loop()
+        try:
+            response = await loop.run_in_executor(self._executor_for(request['path']),
+                                                  _convert_request, request,
+                                                  self.cache_size, self.cache_dir)
+        except Exception as e:
+            response = dict(id=request.get('id'), path=request.get('path'), new_path=None,
+                            output="Invalid request: %r\n" % e)
+        writer.write(json.dumps(response).encode('utf-8') + b'\n')
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        tasks = []
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = json.loads(line.decode('utf-8'))
+                if request.get('command') == 'shutdown':
+                    writer.write(json.dumps(dict(id=request.get('id'))).encode('utf-8') + b'\n')
+                    await writer.drain()
+                    self.stop()
+                    break
+                tasks.append(asyncio.ensure_future(self._process(request, writer)))
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            writer.close()
+
+    def _remove_stale_socket(self):
+        """Removes the socket file if no daemon is listening on it anymore
+        (otherwise we could not bind). Raises ``DaemonRunningError`` if one
+        is.
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+        except FileNotFoundError:
+            return
+        except ConnectionRefusedError:
+            os.remove(self.socket_path)
+            return
+        finally:
+            sock.close()
+        raise DaemonRunningError("A conversion daemon is already running on %s"
+                                 % self.socket_path)
+
+    def _remove_socket(self):
+        # Only if it was not replaced by another daemon's
+        try:
+            st = os.stat(self.socket_path)
+        except FileNotFoundError:
+            return
+        if (st.st_dev, st.st_ino) == self.socket_id:
+            os.remove(self.socket_path)
+
+    async def start(self):
+        self._remove_stale_socket()
+        # Spawn the workers now rather than on the first request, and
+        # before binding so that they do not inherit the listening socket
+        for executor in self.executors:
+            executor.submit(_warm_up)
+
+        self.stopped = asyncio.Event()
+        self.server = await asyncio.start_unix_server(self.handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        st = os.stat(self.socket_path)
+        self.socket_id = (st.st_dev, st.st_ino)
+
+    def stop(self):
+        if self.stopped is not None:
+            self.stopped.set()
+
+    async def serve_forever(self):
+        try:
+            await self.start()
+            await self.stopped.wait()
+        finally:
+            if self.server is not None:
+                self.server.close()
+                await self.server.wait_closed()
+                self._remove_socket()
+            for executor in self.executors:
+                executor.shutdown()
+
+
+def _warm_up():
+    # Touch the lazily initialized parts of the libraries
+    api.loads(b'a: [1]', 'yaml')
+
+
+def serve(socket_path=None, jobs=None, reporter=None, cache_dir=None):
+    """Run a ``ConversionServer`` until it receives a shutdown request,
+    SIGINT or SIGTERM. Raises ``DaemonRunningError`` if another daemon is
+    listening on the socket.
+    """
+    server = ConversionServer(socket_path, jobs, cache_dir=cache_dir)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, server.stop)
+        except (NotImplementedError, RuntimeError):
+            pass
+    if reporter is not None:
+        reporter.write_line("Serving fileconv on %s with %d worker(s)"
+                            % (server.socket_path, len(server.executors)))
+    try:
+        loop.run_until_complete(server.serve_forever())
+    finally:
+        loop.close()
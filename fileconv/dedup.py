@@ -0,0 +1,87 @@
+"""Structural deduplication of parsed data.
+
+Grammars converted from Property Lists often contain the same subtree many
+times: identical ``captures`` maps, ``patterns`` lists and so on. YAML can
+write each of them once and refer back to it with an alias, and PyYAML's
+dumpers do so for every object that occurs more than once in the data.
+
+``deduplicate`` returns a copy of the data in which equal dicts and lists
+of at least ``min_size`` nodes are the same object, so dumping it with
+YAML writes them as anchors and aliases. Loading the result gives data
+equal to the input.
+
+Subtrees are compared by type (``dict`` vs. ``OrderedDict``), key order
+and values. Every subtree is hashed only once: the hash of a container is
+computed from the ids assigned to its children, not from the children
+themselves.
+"""
+from .compact import FrozenDict
+
+
+__all__ = ['deduplicate', 'MIN_SIZE']
+
+
+# The default threshold. Smaller subtrees like ``{include: '#main'}`` are
+# more readable when written in full.
+MIN_SIZE = 6
+
+
+class _Deduplicator(object):
+
+    def __init__(self, min_size):
+        self.min_size = min_size
+        # structural key -> (id, canonical object, size)
+        self.table = {}
+
+    def visit(self, obj):
+        """Returns ``(key, new_obj, size)`` for ``obj``.
+        """
+        if isinstance(obj, (dict, FrozenDict)):
+            items = []
+            values = []
+            size = 1
+            for k, v in obj.items():
+                v_key, v_new, v_size = self.visit(v)
+                items.append((k, v_key))
+                values.append(v_new)
+                size += 1 + v_size
+            key = (type(obj), tuple(items))
+            if isinstance(obj, FrozenDict):
+                new = FrozenDict(obj.layout, values)
+            else:
+                new = type(obj)()
+                for k, v in zip(obj, values):
+                    new[k] = v
+        elif isinstance(obj, (list, tuple)):
+            keys = []
+            new = []
+            size = 1
+            for v in obj:
+                v_key, v_new, v_size = self.visit(v)
+                keys.append(v_key)
+                new.append(v_new)
+                size += v_size
+            key = (list, tuple(keys))
+        else:
+            try:
+                # Keep 1, 1.0 and True apart
+                key = (type(obj), obj)
+                hash(key)
+            except TypeError:
+                key = (type(obj), id(obj))
+            return key, obj, 1
+
+        entry = self.table.get(key)
+        if entry is None:
+            entry = self.table[key] = (len(self.table), new, size)
+        elif size >= self.min_size:
+            new = entry[1]
+        # Parents only need the id
+        return entry[0], new, size
+
+
+def deduplicate(data, min_size=MIN_SIZE):
+    """Returns a copy of ``data`` where equal dicts and lists with at least
+    ``min_size`` nodes (containers, keys and scalars) are the same object.
+    """
+    return _Deduplicator(min_size).visit(data)[1]
@@ -1,15 +1,12 @@
-import datetime
 import sys
 
-import json
-import yaml
-import plistlib
-
 if sys.version_info < (3,):
     from sublime_lib.view import OutputPanel
 else:
     from ..sublime_lib.view import OutputPanel
 
+from . import api
+
 
 class DumperProto(object):
     """Prototype class for data dumpers of different types.
@@ -119,54 +116,13 @@ class DumperProto(object):
                      (lambda x: isinstance(x, datetime.datetime), str),
                      (lambda x: x is None, False))
         """
-        checked = []
-
-        def check_recursive(obj):
-            # won't and shouldn't work for immutable types
-            # I mean, why would you even reference objects inside themselves?
-            if obj in checked:
-                return obj
-            checked.append(obj)
-
-            for is_invalid, validate in funcs:
-                if is_invalid(obj):
-                    if callable(validate):
-                        obj = validate(obj)
-                    else:
-                        obj = validate
-
-            if isinstance(obj, dict):  # dicts are fine
-                for key in obj:
-                    obj[key] = check_recursive(obj[key])
-
-            if isinstance(obj, list):  # lists are too
-                for i in range(len(obj)):
-                    obj[i] = check_recursive(obj[i])
-
-            if isinstance(obj, tuple):  # tuples are immutable ...
-                return tuple([check_recursive(sub_obj) for sub_obj in obj])
-
-            if isinstance(obj, set):  # sets ...
-                for val in obj:
-                    new_val = check_recursive(val)
-                    if new_val != val:  # a set's components are hashable, no need to "is"
-                        obj.remove(val)
-                        obj.add(new_val)
-
-            return obj
-
-        return check_recursive(data)
+        return api.validate_data(data, funcs)
 
     def validate_params(self, params):
         """Validate the parameters according to self.default_params and
         self.allowed_params.
         """
-        new_params = self.default_params.copy()
-        new_params.update(params)
-        for key in params.keys():
-            if key not in self.allowed_params:
-                del new_params[key]
-        return new_params
+        return api.validate_params(self.ext, params, self.default_params, self.allowed_params)
 
     def dump(self, data, *args, **kwargs):
         """Wraps the ``self.write`` function.
@@ -180,37 +136,29 @@ class DumperProto(object):
 
         self.write(data, params, *args, **kwargs)
 
+    def dump_documents(self, docs, documents='array', *args, **kwargs):
+        """Writes the documents of the ``api.YAMLDocuments`` ``docs`` one
+        at a time, as one array or to numbered files (see
+        ``api.convert_documents`` for ``documents``). Returns the path of
+        the (first) new file or ``None`` if parsing failed.
+        """
+        self.output.show()
+        return api._write_documents(docs, self.ext, self.new_file_path, self.output, documents,
+                                    self.validate_params(kwargs))
+
     def write(self, data, *args, **kwargs):
         """To be implemented."""
         pass
 
 
 class JSONDumper(DumperProto):
-    name = "JSON"
+    name = api.NAMES['json']
     ext  = "json"
-    default_params = dict(
-        skipkeys=True,
-        check_circular=False,  # there won't be references here, hopefully
-        indent=4
-    )
-    allowed_params = (
-        'skipkeys',
-        'ensure_ascii',
-        'check_circular',
-        'allow_nan',
-        'sort_keys',
-        'indent',
-        'separators',
-        'encoding'
-    )
+    default_params = api.DEFAULT_PARAMS['json']
+    allowed_params = api.ALLOWED_PARAMS['json']
 
     def validate_data(self, data):
-        return self._validate_data(data, (
-            # TOTEST: sets
-            (lambda x: isinstance(x, plistlib.Data), lambda x: x.data),  # plist
-            (lambda x: isinstance(x, datetime.date), str),  # yaml
-            (lambda x: isinstance(x, datetime.datetime), str)  # plist and yaml
-        ))
+        return self._validate_data(data, api.VALIDATORS['json'])
 
     def write(self, data, params, *args, **kwargs):
         """Parameters:
@@ -270,49 +218,51 @@ class JSONDumper(DumperProto):
                 Character encoding for str instances, default is UTF-8.
         """
         with open(self.new_file_path, "w") as f:
-            json.dump(data, f, **params)
+            api.write_json(data, f, params)
 
 
 class PlistDumper(DumperProto):
-    name = "Property List"
+    name = api.NAMES['plist']
     ext  = "plist"
 
     def validate_data(self, data):
-        return self._validate_data(data, (
-            # TOTEST: sets
-            # yaml; lost of "precision" when converting to datetime.datetime
-            (lambda x: isinstance(x, datetime.date), str),
-            (lambda x: x is None, False)
-        ))
+        return self._validate_data(data, api.VALIDATORS['plist'])
 
     def write(self, data, params, *args, **kwargs):
-        plistlib.writePlist(data, self.new_file_path)
+        """Parameters:
+
+            indent (str, int or None)
+                Default: "\t"
+
+                The string to indent nested elements with, or a number of
+                spaces. None writes no indentation and line breaks at all.
+
+            sort_keys (bool or None)
+                Default: None
+
+                Sort the keys of all dicts (True), none (False) or only
+                those of unordered dicts (None). OrderedDicts keep their
+                order unless this is True.
+
+            skipkeys (bool)
+                Default: False
+
+                Skip dict keys that are not strings instead of raising a
+                TypeError.
+        """
+        # The XML declaration says UTF-8
+        with api.open_text(self.new_file_path) as f:
+            api.write_plist(data, f, params)
 
 
 class YAMLDumper(DumperProto):
-    name = "YAML"
+    name = api.NAMES['yaml']
     ext  = "yaml"
-    default_params = dict(Dumper=yaml.SafeDumper)
-    allowed_params = (
-        'default_style',
-        'default_flow_style',
-        'canonical',
-        'indent',
-        'width',
-        'allow_unicode',
-        'line_break',
-        'encoding',
-        'explicit_start',
-        'explicit_end',
-        'version',
-        'tags',
-        'Dumper'
-    )
+    default_params = api.DEFAULT_PARAMS['yaml']
+    allowed_params = api.ALLOWED_PARAMS['yaml']
 
     def validate_data(self, data):
-        return self._validate_data(data, (
-            (lambda x: isinstance(x, plistlib.Data), lambda x: x.data),  # plist
-        ))
+        return self._validate_data(data, api.VALIDATORS['yaml'])
 
     def write(self, data, params, *args, **kwargs):
         """Parameters:
@@ -372,20 +322,20 @@ class YAMLDumper(DumperProto):
 
                 ???
 
+            dedup (bool or int)
+                Default: None (-> False)
+
+                Write repeated dicts and lists once and refer to them with
+                aliases. An int sets the minimum number of nodes a subtree
+                needs to have, see ``fileconv.dedup``.
+
             ===========================
 
             Dumper (supposedly derived from yaml.BaseDumper)
                 You should know what you are doing when passing this.
         """
         with open(self.new_file_path, "w") as f:
-            yaml.dump(data, f, **params)
-
-
-# Add the internal plistlib dict wrapper to the safe dumper
-yaml.SafeDumper.add_representer(
-    plistlib._InternalDict,
-    yaml.SafeDumper.represent_dict
-)
+            api.write_yaml(data, f, params)
 
 
 ###############################################################################
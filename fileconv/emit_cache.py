@@ -0,0 +1,157 @@
+"""Re-use the YAML text of unchanged parts of a syntax definition.
+
+Rearranging a YAML syntax definition dumps the whole file again, although
+usually only one repository entry changed since the last time. An
+``EmitCache`` keeps the text of every top-level item of the last dump and
+of every entry of the top-level ``repository`` dict, together with a hash
+of the dumped data. The next ``dump`` only emits the items whose hash
+changed and joins the result from the cached fragments:
+
+    cache = EmitCache()
+    text = cache.dump(data, params, OrderedDict)
+
+A fragment is the part of the text a subtree produces in the complete
+document. It is cut out of a small document that places the subtree at
+the same position (and column), followed by a marker item, so the result
+is identical to ``yaml.dump(data, **params)``. Data and parameters where
+this does not hold (aliases, flow style for the whole document, explicit
+document markers, ``dedup``, ...) are dumped in one piece.
+"""
+import hashlib
+
+import yaml
+
+from .api import write_yaml
+
+
+__all__ = ['EmitCache']
+
+
+# Dumped at the end of every fragment's document to find where it ends.
+# The NUL character forces a double-quoted key that no grammar contains.
+MARKER_KEY = u'\0'
+
+# Parameters that don't prevent splitting the document
+SPLIT_PARAMS = frozenset(('Dumper', 'default_style', 'default_flow_style', 'indent', 'width',
+                          'allow_unicode', 'line_break'))
+
+# Never aliased by PyYAML's representers
+SCALAR_TYPES = frozenset((type(None), bool, int, float, bytes, type(u'')))
+
+
+def _digest(value):
+    # The repr of the data types YAML produces describes them completely
+    return hashlib.sha1(repr(value).encode('utf-8')).digest()
+
+
+def _has_shared_objects(data):
+    """Returns whether an object occurs more than once in ``data`` and would
+    be dumped as alias.
+    """
+    seen = set()
+    stack = [data]
+    while stack:
+        obj = stack.pop()
+        for child in (obj.values() if isinstance(obj, dict) else obj):
+            if type(child) in SCALAR_TYPES:
+                continue
+            if id(child) in seen:
+                return True
+            seen.add(id(child))
+            if isinstance(child, (dict, list, tuple)):
+                stack.append(child)
+    return False
+
+
+class EmitCache(object):
+    """Caches the YAML text of the parts of a syntax definition, see the
+    module's documentation. ``emitted`` and ``reused`` count the fragments
+    of the last ``dump``.
+    """
+
+    def __init__(self, nested=('repository',)):
+        self.nested = frozenset(nested)
+        self.signature = None
+        # path -> (digest, text)
+        self.fragments = {}
+        self.emitted = self.reused = 0
+
+    def clear(self):
+        self.signature = None
+        self.fragments.clear()
+
+    def can_split(self, data, params, dict_type):
+        return (type(data) is dict_type and data and MARKER_KEY not in data
+                and set(params) <= SPLIT_PARAMS
+                and not params.get('default_flow_style')
+                # A document with only scalars may be written in flow style
+                and any(isinstance(value, (dict, list)) for value in data.values())
+                and not _has_shared_objects(data))
+
+    def dump(self, data, params, dict_type=dict):
+        """Returns ``data`` dumped like ``api.write_yaml(data, None, params)``.
+
+        ``dict_type`` must be a dict type whose order the ``Dumper`` keeps
+        (e.g. ``OrderedDict``); ``data`` is only split if it is of this
+        type.
+        """
+        self.emitted = self.reused = 0
+        if not self.can_split(data, params, dict_type):
+            self.clear()
+            self.emitted = 1
+            return write_yaml(data, None, params)
+
+        signature = repr(sorted(params.items()))
+        if signature != self.signature:
+            self.fragments.clear()
+            self.signature = signature
+
+        self._dump = lambda obj: yaml.dump(obj, **params)
+        self._dict_type = dict_type
+        self._nl = params.get('line_break') or '\n'
+        self._marker = self._dump(dict_type([(MARKER_KEY, [0])])).split(':', 1)[0] + ':'
+
+        used = {}
+        parts = []
+        for key, value in data.items():
+            if (key in self.nested and type(value) is dict_type and value
+                    and any(isinstance(v, (dict, list)) for v in value.values())
+                    and MARKER_KEY not in value):
+                parts.append(self._fragment(used, (key,), key, None, header=True))
+                for sub_key, sub_value in value.items():
+                    parts.append(self._fragment(used, (key, sub_key), sub_key, sub_value,
+                                                parent=key))
+            else:
+                parts.append(self._fragment(used, (key,), key, value))
+
+        self.fragments = used
+        return ''.join(parts)
+
+    def _fragment(self, used, path, key, value, parent=None, header=False):
+        digest = None if header else _digest(value)
+        entry = self.fragments.get(path)
+        if entry is not None and entry[0] == digest:
+            self.reused += 1
+        else:
+            self.emitted += 1
+            entry = (digest, self._emit(key, value, parent, header))
+        used[path] = entry
+        return entry[1]
+
+    def _emit(self, key, value, parent, header):
+        dict_type, nl = self._dict_type, self._nl
+        if header:
+            # Only the "repository:" line
+            text = self._dump(dict_type([(key, dict_type([(MARKER_KEY, [0])]))]))
+            return text[:text.index(nl) + len(nl)]
+
+        items = dict_type([(key, value), (MARKER_KEY, [0])])
+        if parent is None:
+            text = self._dump(items)
+            start = indent = 0
+        else:
+            text = self._dump(dict_type([(parent, items)]))
+            start = text.index(nl) + len(nl)
+            indent = len(text) - start - len(text[start:].lstrip(' '))
+        end = text.rindex(nl + ' ' * indent + self._marker) + len(nl)
+        return text[start:end]
@@ -0,0 +1,412 @@
+"""An index of the repository keys of all grammars below a folder.
+
+Grammars include the repositories of other grammars by scope name
+(``include: source.js#expression``). A ``GrammarIndex`` maps every
+``scopeName`` to the files that define it and their repository keys with
+the positions where they are defined:
+
+    index = GrammarIndex(path)
+    index.update(packages_dir)
+    index.keys('source.js')                # ['expression', ...]
+    index.find('source.js', 'expression')  # (file, row, col)
+
+None of the grammars is parsed completely; ``index_grammar`` only scans
+the text for the keys. Files are scanned in a process pool, or in the
+calling thread with ``workers=0`` (e.g. where no processes can be started;
+threads would not scan faster than that). ``GrammarFiles`` implements the
+scanning: results are stored per file together with its modification time
+and size, so the next ``update`` only scans new and changed files, and are
+persisted in ``path`` if given.
+
+Grammars in ``.sublime-package`` archives are scanned as well. Their path
+is the one of the archive joined with their name in it (see
+``archive_member``) and they take the archive's modification time and
+size, so all of them are scanned again when the archive changes.
+"""
+import bisect
+import os
+import re
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from .cache import CacheError, serialize, deserialize
+from .key_index import KeyIndex
+from .plist_index import build_index
+from . import plist_tokenizer
+
+
+__all__ = ['GrammarFiles', 'GrammarIndex', 'index_grammar', 'grammar_format',
+           'archive_member']
+
+
+GRAMMAR_FORMATS = (('.yaml-tmlanguage', 'yaml'),
+                   ('.json-tmlanguage', 'json'),
+                   ('.tmlanguage', 'plist'))
+
+ARCHIVE_EXT = '.sublime-package'
+
+
+def grammar_format(path):
+    """Returns the format of a grammar file by its extension or ``None``.
+    """
+    lower = path.lower()
+    for ext, fmt in GRAMMAR_FORMATS:
+        if lower.endswith(ext):
+            return fmt
+    return None
+
+
+def archive_member(path):
+    """Returns ``(archive, name)`` if ``path`` is a file in a
+    ``.sublime-package`` archive, ``None`` otherwise. ``name`` uses forward
+    slashes.
+    """
+    head, sep, tail = path.partition(ARCHIVE_EXT + os.sep)
+    if not sep:
+        return None
+    return head + ARCHIVE_EXT, tail.replace(os.sep, '/')
+
+
+def _read_files(paths, members):
+    """Yields the contents of ``paths``, or ``None`` for the ones that can
+    not be read. ``members`` maps the paths of files in archives to their
+    ``(archive, name)``; consecutive files of an archive share its
+    ``ZipFile``.
+    """
+    archive = None
+    try:
+        for path in paths:
+            try:
+                if path in members:
+                    archive_path, name = members[path]
+                    if archive is None or archive.filename != archive_path:
+                        if archive is not None:
+                            archive.close()
+                            archive = None
+                        archive = zipfile.ZipFile(archive_path)
+                    raw = archive.read(name)
+                else:
+                    with open(path, 'rb') as f:
+                        raw = f.read()
+            except (IOError, OSError, KeyError, zipfile.BadZipfile):
+                raw = None
+            yield raw
+    finally:
+        if archive is not None:
+            archive.close()
+
+
+class GrammarFiles(object):
+    """Scans the grammar files below a folder with ``scan(path, raw)`` and
+    keeps the results. See the module's documentation.
+
+        GrammarFiles(path=None, workers=4, executor_class=None)
+
+            * path (str)
+                File the results are persisted in. Its directory is created
+                on the first write.
+
+            * workers (int)
+                Number of workers scanning files. ``0`` scans them in the
+                calling thread.
+
+            * executor_class (class)
+                A ``concurrent.futures.Executor`` subclass for the workers.
+                Defaults to the class's ``executor_class``.
+
+    Subclasses define ``scan`` (a module-level function, so it can be sent
+    to worker processes), ``version`` and ``executor_class``. ``scan`` gets
+    the file's contents as ``raw`` (``None`` if they can not be read).
+
+    The results can be read while ``update`` scans files; they are only
+    locked while they are changed.
+    """
+    scan = None
+    # Bump when the results of scan change
+    version = 1
+    executor_class = ProcessPoolExecutor
+
+    def __init__(self, path=None, workers=4, executor_class=None):
+        self.path = path
+        self.workers = workers
+        if executor_class is not None:
+            self.executor_class = executor_class
+        # grammar path -> (mtime, size, result)
+        self.files = {}
+        self._loaded = path is None
+        # Protects files; _update_lock serializes updates
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+
+    def _load(self):
+        self._loaded = True
+        try:
+            with open(self.path, 'rb') as f:
+                stored = deserialize(f.read())
+        except (IOError, OSError, CacheError):
+            return
+        if isinstance(stored, dict) and stored.get('version') == self.version:
+            self.files = stored['files']
+
+    def _save(self):
+        blob = serialize({'version': self.version, 'files': self.files})
+        directory = os.path.dirname(self.path)
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def find_grammars(root):
+        """Yields the paths of all grammar files and ``.sublime-package``
+        archives below ``root``.
+        """
+        for dir_path, _, file_names in os.walk(root):
+            for file_name in file_names:
+                if grammar_format(file_name) or file_name.endswith(ARCHIVE_EXT):
+                    yield os.path.join(dir_path, file_name)
+
+    @staticmethod
+    def archive_grammars(archive):
+        """Returns the names of the grammar files in ``archive``.
+        """
+        try:
+            zf = zipfile.ZipFile(archive)
+        except (IOError, OSError, zipfile.BadZipfile):
+            return []
+        try:
+            return [name for name in zf.namelist() if grammar_format(name)]
+        finally:
+            zf.close()
+
+    def update(self, root):
+        """Scans the grammars below ``root`` that are new or changed since
+        the last update and forgets the removed ones. Returns the number of
+        files that changed.
+        """
+        with self._update_lock:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+                known = dict((path, tuple(entry[:2])) for path, entry in self.files.items())
+            # archive -> known paths of its grammars
+            by_archive = {}
+            for path in known:
+                member = archive_member(path)
+                if member:
+                    by_archive.setdefault(member[0], []).append(path)
+
+            # Paths of grammars in archives -> (archive, name)
+            stats, members = {}, {}
+            for path in self.find_grammars(root):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                stat = (st.st_mtime, st.st_size)
+                if not path.endswith(ARCHIVE_EXT):
+                    stats[path] = stat
+                    continue
+                paths = by_archive.get(path)
+                if paths and all(known[p] == stat for p in paths):
+                    stats.update(dict.fromkeys(paths, stat))
+                    continue
+                for name in self.archive_grammars(path):
+                    member_path = os.path.join(path, *name.split('/'))
+                    stats[member_path] = stat
+                    members[member_path] = (path, name)
+
+            stale = sorted(path for path, stat in stats.items() if known.get(path) != stat)
+            removed = [path for path in known if path not in stats and path.startswith(root)]
+            results = []
+            if stale:
+                raws = _read_files(stale, members)
+                if self.workers:
+                    with self.executor_class(self.workers) as executor:
+                        results = list(zip(stale, executor.map(self.scan, stale, raws)))
+                else:
+                    results = [(path, self.scan(path, raw)) for path, raw in zip(stale, raws)]
+
+            changed = len(stale) + len(removed)
+            if changed:
+                with self._lock:
+                    for path in removed:
+                        del self.files[path]
+                    for path, result in results:
+                        self.files[path] = stats[path] + (result,)
+                    self._changed()
+                    if self.path:
+                        self._save()
+            return changed
+
+    def _changed(self):
+        """Called after ``update`` changed ``files``.
+        """
+        pass
+
+
+###############################################################################
+# Scanning
+
+
+# A plain or quoted scalar, without a comment
+YAML_SCOPE_NAME_RE = re.compile(r'''^scopeName:[ \t]*(["']?)([^\s"'#]+)\1[ \t]*(?:#.*)?$''',
+                                re.M)
+
+JSON_TOKEN_RE = re.compile(r'''
+    (?P<string> "(?:[^"\\]|\\.)*" ) (?P<colon> \s*: )?
+  | (?P<open> [{\[] )
+  | (?P<close> [}\]] )
+  | //[^\n]* | /\*.*?\*/
+''', re.S | re.X)
+
+
+def _positions(text, offsets, newline='\n'):
+    """Returns the 1-based ``(row, col)`` of each of the sorted ``offsets``
+    in ``text``.
+    """
+    result = []
+    row, pos = 1, 0
+    for offset in offsets:
+        row += text.count(newline, pos, offset)
+        pos = offset
+        result.append((row, offset - text.rfind(newline, 0, offset)))
+    return result
+
+
+def _scan_yaml(raw):
+    text = raw.decode('utf-8')
+    match = YAML_SCOPE_NAME_RE.search(text)
+    keys = KeyIndex(text).repository_keys()
+    positions = _positions(text, [begin for begin, _, _ in keys])
+    return match and match.group(2), [key for _, _, key in keys], positions
+
+
+def _scan_json(raw):
+    text = raw.decode('utf-8')
+    scope_name = None
+    names, offsets = [], []
+    # The key of each open object and the key before the value that follows
+    stack, key = [], None
+    for m in JSON_TOKEN_RE.finditer(text):
+        if m.group('string'):
+            if m.group('colon'):
+                key = m.group('string')[1:-1]
+                if len(stack) == 2 and stack[1] == 'repository':
+                    names.append(key)
+                    offsets.append(m.start() + 1)
+                continue
+            elif len(stack) == 1 and key == 'scopeName':
+                scope_name = m.group('string')[1:-1]
+        elif m.group('open'):
+            stack.append(key)
+        elif m.group('close') and stack:
+            stack.pop()
+        key = None
+    return scope_name, names, _positions(text, offsets)
+
+
+def _scan_plist(raw):
+    index = build_index(raw)
+    encoding = index['encoding']
+    scope_name = None
+    span = index['keys'].get('scopeName')
+    if span:
+        value = plist_tokenizer.parse(raw[span[0]:span[1]].decode(encoding))
+        if isinstance(value, str):
+            scope_name = value
+    entries = sorted(index['nested'].get('repository', {}).items(), key=lambda item: item[1])
+    positions = _positions(raw, [start for _, (start, _) in entries], b'\n')
+    return scope_name, [key for key, _ in entries], positions
+
+
+SCANNERS = dict(yaml=_scan_yaml, json=_scan_json, plist=_scan_plist)
+
+
+def index_grammar(path, raw=None):
+    """Returns ``(scope_name, {key: (row, col)})`` for the repository keys
+    of the grammar at ``path``, which is read unless its contents are given
+    as ``raw``. ``scope_name`` is ``None`` if it can not be found. Positions
+    of plist keys are those of their values; columns count bytes there.
+    """
+    try:
+        if raw is None:
+            with open(path, 'rb') as f:
+                raw = f.read()
+        scope_name, names, positions = SCANNERS[grammar_format(path)](raw)
+    except Exception:
+        # Not readable, not decodable or malformed
+        return None, {}
+    return scope_name, dict(zip(names, positions))
+
+
+class GrammarIndex(GrammarFiles):
+    """The scope names and repository keys of the grammars below a folder.
+    See the module's documentation.
+    """
+    scan = staticmethod(index_grammar)
+    version = 1
+
+    def __init__(self, path=None, workers=4, executor_class=None):
+        super(GrammarIndex, self).__init__(path, workers, executor_class)
+        # scope name -> sorted list of paths
+        self._by_scope = None
+
+    def _changed(self):
+        self._by_scope = None
+
+    def _scopes(self):
+        by_scope = self._by_scope
+        if by_scope is None:
+            by_scope = {}
+            for path, (_, _, (scope_name, _)) in self.files.items():
+                if scope_name:
+                    bisect.insort(by_scope.setdefault(scope_name, []), path)
+            self._by_scope = by_scope
+        return by_scope
+
+    def scope_names(self):
+        """Returns the sorted scope names of all grammars.
+        """
+        with self._lock:
+            return sorted(self._scopes())
+
+    def paths(self, scope_name):
+        """Returns the paths of the grammars with ``scope_name``.
+        """
+        with self._lock:
+            return list(self._scopes().get(scope_name, ()))
+
+    def keys(self, scope_name):
+        """Returns the sorted repository keys of the grammars with
+        ``scope_name``.
+        """
+        with self._lock:
+            keys = set()
+            for path in self._scopes().get(scope_name, ()):
+                keys.update(self.files[path][2][1])
+            return sorted(keys)
+
+    def find(self, scope_name, key):
+        """Returns ``(path, row, col)`` of the definition of ``key`` in the
+        grammars with ``scope_name`` or ``None``.
+        """
+        with self._lock:
+            for path in self._scopes().get(scope_name, ()):
+                position = self.files[path][2][1].get(key)
+                if position is not None:
+                    return (path,) + tuple(position)
+        return None
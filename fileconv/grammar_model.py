@@ -0,0 +1,249 @@
+"""A position index of a YAML syntax definition's repository keys,
+includes and scope names.
+
+Go-to-definition, finding references and highlighting unused repository
+keys need to know what is where in the buffer. A ``GrammarModel`` composes
+the YAML text and keeps the positions of
+
+    * the keys of the ``repository`` dict (``DEFINITION``),
+    * the values of ``include`` keys (``INCLUDE``),
+    * the values of ``name`` and ``contentName`` keys of rules and of the
+      top-level ``scopeName`` (``SCOPE``)
+
+from the nodes' marks:
+
+    model = GrammarModel(text)
+    model.at(offset)            # (begin, end, kind, value) or None
+    model.definition('main')    # (begin, end) or None
+    model.references('main')    # [(begin, end), ...]
+    model.unused_keys()         # [(begin, end, key), ...]
+
+The text is split into entries at the top-level keys and the keys of the
+top-level ``repository`` dict (see ``KeyIndex.entries``) and each entry is
+composed on its own. ``update`` only composes the entries whose text
+changed; the others keep their results, which are stored relative to the
+entry's beginning. Lookups bisect the entries' offsets and then the sorted
+items of an entry.
+
+An entry that can not be composed, e.g. while it is being edited, has no
+items and is counted in ``errors``. Aliases of anchors in other entries
+can not be resolved and are errors as well.
+"""
+import bisect
+
+import yaml
+from yaml.nodes import MappingNode, ScalarNode, SequenceNode
+
+from .key_index import KeyIndex
+from .yaml_limits import SafeLoader
+
+
+__all__ = ['GrammarModel', 'DEFINITION', 'INCLUDE', 'SCOPE']
+
+
+DEFINITION = 'definition'
+INCLUDE = 'include'
+SCOPE = 'scope'
+
+SCOPE_KEYS = frozenset(('name', 'contentName'))
+
+
+def _item(node, kind):
+    """Returns the ``(begin, end, kind, value)`` of a scalar node, without
+    the quotes.
+    """
+    begin, end = node.start_mark.index, node.end_mark.index
+    if node.style in ('"', "'"):
+        begin, end = begin + 1, end - 1
+    return begin, end, kind, node.value
+
+
+class _Entry(object):
+    """The items of a top-level or repository entry, relative to its
+    beginning.
+    """
+    __slots__ = ('begins', 'items', 'definitions', 'includes', 'error', 'scope_name')
+
+    def __init__(self, text, repository_entry):
+        self.error = False
+        self.scope_name = None
+        items = []
+        try:
+            node = yaml.compose(text, Loader=SafeLoader)
+        except yaml.YAMLError:
+            self.error = True
+            node = None
+        if isinstance(node, MappingNode):
+            self._walk(node, 'repository' if repository_entry else 'top', items)
+        items.sort()
+        self.begins = [item[0] for item in items]
+        self.items = items
+        self.definitions = [(begin, end, value)
+                            for begin, end, kind, value in items if kind == DEFINITION]
+        self.includes = frozenset(value for _, _, kind, value in items if kind == INCLUDE)
+
+    def _walk(self, root, context, items):
+        stack = [(root, context)]
+        while stack:
+            node, context = stack.pop()
+            if isinstance(node, SequenceNode):
+                stack.extend((child, 'rule') for child in node.value)
+                continue
+            elif not isinstance(node, MappingNode):
+                continue
+            for key_node, value_node in node.value:
+                if not isinstance(key_node, ScalarNode):
+                    continue
+                key = key_node.value
+                if context == 'repository':
+                    items.append(_item(key_node, DEFINITION))
+                    stack.append((value_node, 'rule'))
+                elif not isinstance(value_node, ScalarNode):
+                    if context == 'top' and key == 'repository':
+                        stack.append((value_node, 'repository'))
+                    else:
+                        stack.append((value_node, 'rule'))
+                elif context == 'top':
+                    # The top-level name is the grammar's display name
+                    if key == 'scopeName':
+                        items.append(_item(value_node, SCOPE))
+                        self.scope_name = value_node.value
+                elif key == 'include':
+                    items.append(_item(value_node, INCLUDE))
+                elif key in SCOPE_KEYS:
+                    items.append(_item(value_node, SCOPE))
+
+
+class GrammarModel(object):
+    """The positions of a YAML syntax definition's repository keys,
+    includes and scope names. See the module's documentation.
+    """
+
+    def __init__(self, text=''):
+        self._keys = KeyIndex()
+        # Sorted beginnings of the entries and their _Entry
+        self._starts = []
+        self._entries = []
+        self._cache = {}
+        self.errors = 0
+        self._index = None
+        self.update(text)
+
+    @property
+    def text(self):
+        return self._keys.text
+
+    def update(self, text):
+        """Updates the model for the new ``text``. Returns the number of
+        entries that were composed again.
+        """
+        if self._starts and text == self.text:
+            return 0
+        self._keys.update(text)
+        entries = self._keys.entries()
+        starts = [begin for begin, _, _ in entries]
+        top_level = [top for _, _, top in entries]
+        if not starts or starts[0] != 0:
+            # Comments and the document start before the first key
+            starts.insert(0, 0)
+            top_level.insert(0, True)
+
+        # (text, top_level) -> _Entry of the previous and the new text
+        cache, self._cache = self._cache, {}
+        composed = 0
+        self._entries = []
+        for start, end, top in zip(starts, starts[1:] + [len(text)], top_level):
+            key = (text[start:end], top)
+            entry = self._cache.get(key) or cache.get(key)
+            if entry is None:
+                entry = _Entry(key[0], not top)
+                composed += 1
+            self._cache[key] = entry
+            self._entries.append(entry)
+        self._starts = starts
+        self.errors = sum(1 for entry in self._entries if entry.error)
+        self._index = None
+        return composed
+
+    def at(self, offset):
+        """Returns the ``(begin, end, kind, value)`` of the item at
+        ``offset`` or ``None``.
+        """
+        i = bisect.bisect_right(self._starts, offset) - 1
+        if i < 0:
+            return None
+        start, entry = self._starts[i], self._entries[i]
+        j = bisect.bisect_right(entry.begins, offset - start) - 1
+        if j >= 0:
+            begin, end, kind, value = entry.items[j]
+            if offset - start <= end:
+                return begin + start, end + start, kind, value
+        return None
+
+    def items(self):
+        """Yields the ``(begin, end, kind, value)`` of all items, sorted.
+        """
+        for start, entry in zip(self._starts, self._entries):
+            for begin, end, kind, value in entry.items:
+                yield begin + start, end + start, kind, value
+
+    def scope_name(self):
+        """Returns the grammar's ``scopeName`` or ``None``.
+        """
+        for entry in self._entries:
+            if entry.scope_name is not None:
+                return entry.scope_name
+        return None
+
+    def target(self, include):
+        """Returns the repository key of this grammar an include's value
+        refers to (``#key`` or ``<scopeName>#key``) or ``None``.
+        """
+        scope_name, _, key = include.partition('#')
+        if key and (not scope_name or scope_name == self.scope_name()):
+            return key
+        return None
+
+    def _get_index(self):
+        index = self._index
+        if index is None:
+            # key -> (begin, end) and the keys that are included
+            definitions, included = {}, set()
+            for start, entry in zip(self._starts, self._entries):
+                for begin, end, key in entry.definitions:
+                    definitions.setdefault(key, (begin + start, end + start))
+                included.update(entry.includes)
+            targets = set(self.target(value) for value in included)
+            index = self._index = (definitions, targets)
+        return index
+
+    def definition(self, key):
+        """Returns the ``(begin, end)`` of the repository key ``key`` or
+        ``None``.
+        """
+        return self._get_index()[0].get(key)
+
+    def references(self, key):
+        """Returns the ``(begin, end)`` of the includes that refer to the
+        repository key ``key``, sorted.
+        """
+        result = []
+        if key not in self._get_index()[1]:
+            return result
+        for start, entry in zip(self._starts, self._entries):
+            if not entry.includes:
+                continue
+            for begin, end, kind, value in entry.items:
+                if kind == INCLUDE and self.target(value) == key:
+                    result.append((begin + start, end + start))
+        return result
+
+    def unused_keys(self):
+        """Returns the ``(begin, end, key)`` of the repository keys that no
+        include of this grammar refers to, sorted.
+        """
+        targets = self._get_index()[1]
+        return [(begin + start, end + start, key)
+                for start, entry in zip(self._starts, self._entries)
+                for begin, end, key in entry.definitions
+                if key not in targets]
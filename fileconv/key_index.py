@@ -0,0 +1,160 @@
+"""An index of the keys of a YAML syntax definition's text.
+
+Completing ``include: '#...'`` values needs the keys of the ``repository``
+dict. Finding them through Sublime Text's API (``find_by_selector`` and
+``substr`` for every match) costs time proportional to the size of the
+file on every keystroke. A ``KeyIndex`` finds them in the text once and
+afterwards only parses the lines that changed:
+
+    index = KeyIndex(text)
+    index.update(new_text)
+    index.repository_keys()  # [(begin, end, key), ...]
+
+``update`` finds the changed part by comparing the new text to the old
+one, which is much faster than parsing it. Keys are recognized like the
+``variable.other.repository-key`` scope of the YAML syntax definition does:
+keys at the beginning of a line at the top level and keys with two leading
+spaces in the top-level ``repository`` dict. Flow-style dicts are not
+indexed.
+"""
+import bisect
+import re
+
+
+__all__ = ['KeyIndex']
+
+
+# Top-level keys and keys with two leading spaces. Group 3 is the key
+# without quotes.
+KEY_RE = re.compile(r'''^(  )?(["']?)([-\w]+)\2:''', re.M)
+
+# Compare this many characters at once when looking for the changed part
+CHUNK_SIZE = 4096
+
+
+def _common_prefix(a, b):
+    """Returns the length of the common prefix of ``a`` and ``b``.
+    """
+    n = min(len(a), len(b))
+    i = 0
+    while i + CHUNK_SIZE <= n and a[i:i + CHUNK_SIZE] == b[i:i + CHUNK_SIZE]:
+        i += CHUNK_SIZE
+    # The first difference is in the next chunk
+    lo, hi = i, min(i + CHUNK_SIZE, n)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[i:mid] == b[i:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix(a, b, limit):
+    """Returns the length of the common suffix of ``a`` and ``b``, at most
+    ``limit``.
+    """
+    la, lb = len(a), len(b)
+    i = 0
+    while (i + CHUNK_SIZE <= limit
+           and a[la - i - CHUNK_SIZE:la - i] == b[lb - i - CHUNK_SIZE:lb - i]):
+        i += CHUNK_SIZE
+    lo, hi = i, min(i + CHUNK_SIZE, limit)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[la - mid:la - i] == b[lb - mid:lb - i]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+class KeyIndex(object):
+    """The top-level and repository keys of a syntax definition's text and
+    their offsets. See the module's documentation.
+    """
+
+    def __init__(self, text=''):
+        self.text = ''
+        # Sorted offsets of the keys and (top_level, key) for each of them
+        self._offsets = []
+        self._keys = []
+        self._repository_keys = None
+        self._entries = None
+        self.update(text)
+
+    def update(self, text):
+        """Updates the index for the new ``text``. Returns the number of
+        characters that were parsed again.
+        """
+        old = self.text
+        if text == old:
+            return 0
+        prefix = _common_prefix(old, text)
+        suffix = _common_suffix(old, text, min(len(old), len(text)) - prefix)
+        delta = len(text) - len(old)
+
+        # Whole lines of the old text that were changed
+        start = old.rfind('\n', 0, prefix) + 1
+        old_end = old.find('\n', len(old) - suffix)
+        if old_end < 0:
+            old_end = len(old)
+        new_end = old_end + delta
+
+        first = bisect.bisect_left(self._offsets, start)
+        last = bisect.bisect_left(self._offsets, old_end, first)
+        offsets, keys = [], []
+        for m in KEY_RE.finditer(text, start, new_end):
+            offsets.append(m.start(3))
+            keys.append((m.group(1) is None, m.group(3)))
+        self._offsets[first:] = offsets + [offset + delta for offset in self._offsets[last:]]
+        self._keys[first:last] = keys
+
+        self.text = text
+        self._repository_keys = None
+        self._entries = None
+        return new_end - start
+
+    def repository_keys(self):
+        """Returns the keys of the top-level ``repository`` dict as a list of
+        ``(begin, end, key)`` tuples.
+        """
+        result = self._repository_keys
+        if result is None:
+            result = []
+            in_repository = False
+            for offset, (top_level, key) in zip(self._offsets, self._keys):
+                if top_level:
+                    in_repository = key == 'repository'
+                elif in_repository:
+                    result.append((offset, offset + len(key), key))
+            self._repository_keys = result
+        return result
+
+    def entries(self):
+        """Returns the top-level entries and those of the top-level
+        ``repository`` dict as a list of ``(begin, key, top_level)`` tuples.
+        ``begin`` is the offset of the line the entry starts on.
+        """
+        result = self._entries
+        if result is None:
+            result = []
+            text = self.text
+            in_repository = False
+            for offset, (top_level, key) in zip(self._offsets, self._keys):
+                if top_level:
+                    in_repository = key == 'repository'
+                elif not in_repository:
+                    continue
+                result.append((text.rfind('\n', 0, offset) + 1, key, top_level))
+            self._entries = result
+        return result
+
+    def find(self, key):
+        """Returns the ``(begin, end)`` offsets of a repository key or
+        ``None``.
+        """
+        for begin, end, name in self.repository_keys():
+            if name == key:
+                return begin, end
+        return None
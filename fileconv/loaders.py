@@ -2,65 +2,89 @@ import re
 import os
 import sys
 
-import json
 import yaml
-import plistlib
 
 import sublime
 
 if sys.version_info < (3,):
     from sublime_lib.view import OutputPanel, coorded_substr, base_scope, get_text
-    from sublime_lib.path import file_path_tuple
+    from sublime_lib.path import file_path_tuple, root_at_cache, get_package_name
     ST2 = True
 else:
     from ..sublime_lib.view import OutputPanel, coorded_substr, base_scope, get_text
-    from ..sublime_lib.path import file_path_tuple
+    from ..sublime_lib.path import file_path_tuple, root_at_cache, get_package_name
     ST2 = False
 
+from . import api
+from .api import strip_js_comments  # NOQA
 
-# xml.parsers.expat is not available on certain Linux dists, use plist_parser then.
-# See https://github.com/SublimeText/AAAPackageDev/issues/19
-try:
-    from xml.parsers.expat import ExpatError, ErrorString
-except ImportError:
-    from . import plist_parser
-    use_plistlib = False
-    print("[PackageDev] 'xml.parsers.expat' module not available; "
-          "Falling back to bundled 'plist_parser'...")
-else:
-    use_plistlib = True
+PLUGIN_NAME = get_package_name()
 
-###############################################################################
+# Upper bound for the size of the persistent parse cache, in bytes
+PARSE_CACHE_SIZE = 64 * 1024 * 1024
+
+_parse_cache = None
+
+
+def get_parse_cache():
+    """Returns the persistent parse cache that is shared by all loaders,
+    located in Sublime's ``Cache`` folder. ``None`` on ST2.
+    """
+    global _parse_cache
+    if _parse_cache is None and not ST2:
+        from .cache import DiskParseCache
+        _parse_cache = DiskParseCache(root_at_cache(PLUGIN_NAME, "parse"), PARSE_CACHE_SIZE)
+    return _parse_cache
+
+
+_plist_index = None
 
-re_js_comments_str = r"""
-    (                               # Capture code
-        (?:
-            "(?:\\.|[^"\\])*"           # String literal
-            |
-            '(?:\\.|[^'\\])*'           # String literal
-            |
-            (?:[^/\n"']|/[^/*\n"'])+    # Any code besides newlines or string literals
-            |
-            \n                          # Newline
-        )+                          # Repeat
-    )|
-    (/\* (?:[^*]|\*[^/])* \*/)      # Multi-line comment
-    |
-    (?://(.*)$)                     # Comment
-"""
-re_js_comments = re.compile(re_js_comments_str, re.VERBOSE + re.MULTILINE)
-
-
-def strip_js_comments(string):
-    """Originally obtained from Stackoverflow this function strips JavaScript
-    (and JSON) comments from a string while considering those encapsulated by strings.
-
-    http://stackoverflow.com/questions/2136363/matching-one-line-javascript-comments-with-re
+
+def get_plist_index():
+    """Returns the ``PlistIndex`` for random access to plist files, which
+    persists its indexes next to the parse cache (in memory only on ST2).
     """
-    parts = re_js_comments.findall(string)
-    # Stripping the whitespaces is, of course, optional, but the columns are fucked up anyway
-    # with the comments being removed and it doesn't break things.
-    return ''.join(x[0].strip(' ') for x in parts)
+    global _plist_index
+    if _plist_index is None:
+        from .plist_index import PlistIndex
+        _plist_index = PlistIndex(None if ST2 else root_at_cache(PLUGIN_NAME, "index"))
+    return _plist_index
+
+
+_scope_corpus = None
+
+
+def get_scope_corpus():
+    """Returns the ``ScopeCorpus`` of the installed grammars' scope names,
+    persisted in Sublime's ``Cache`` folder. ``None`` on ST2.
+
+    Parses files in the calling thread; the plugin host can't start worker
+    processes.
+    """
+    global _scope_corpus
+    if _scope_corpus is None and not ST2:
+        from .scope_corpus import ScopeCorpus
+        _scope_corpus = ScopeCorpus(root_at_cache(PLUGIN_NAME, "scopes", "corpus.fcpc"),
+                                    workers=0)
+    return _scope_corpus
+
+
+_grammar_index = None
+
+
+def get_grammar_index():
+    """Returns the ``GrammarIndex`` of the installed grammars' repository
+    keys, persisted in Sublime's ``Cache`` folder. ``None`` on ST2.
+
+    Scans files in the calling thread; the plugin host can't start worker
+    processes.
+    """
+    global _grammar_index
+    if _grammar_index is None and not ST2:
+        from .grammar_index import GrammarIndex
+        _grammar_index = GrammarIndex(root_at_cache(PLUGIN_NAME, "grammars", "index.fcpc"),
+                                      workers=0)
+    return _grammar_index
 
 ###############################################################################
 
@@ -160,6 +184,8 @@ class LoaderProto(object):
             is_valid(self)
 
             load(self, *args, **kwargs)
+
+            get_cache(self)
     """
     name    = ""
     ext     = ""
@@ -301,36 +327,39 @@ class LoaderProto(object):
     def parse(self, *args, **kwargs):
         """To be implemented. Should return the parsed data from
         ``self.file_path`` as a Python object.
+
+        The ``compact`` keyword argument returns the data in the compact,
+        read-only form of ``fileconv.compact`` (see ``api.loads``).
         """
         pass
 
+    def get_cache(self):
+        """Returns the cache for parsed data (see ``fileconv.cache``) or
+        ``None`` to always parse.
+        """
+        return get_parse_cache()
+
 
 class JSONLoader(LoaderProto):
-    name    = "JSON"
+    name    = api.NAMES['json']
     ext     = "json"
     comment = "//"
     scope   = "source.json"
-    debug_base = 'Error parsing ' + name + ' "%s": %s'
-    file_regex = debug_base % (r'(.*?)', r'.+? line (\d+) column (\d+)')
+    debug_base = api.DEBUG_BASE['json']
+    file_regex = api.FILE_REGEX['json']
 
     def parse(self, *args, **kwargs):
-        text = get_text(self.view)
-        try:
-            text = strip_js_comments(text)
-            data = json.loads(text)
-        except ValueError as e:
-            self.output.write_line(self.debug_base % (self.file_path, str(e)))
-        else:
-            return data
+        return api.loads(get_text(self.view), self.ext, self.output, self.file_path,
+                         self.get_cache(), compact=kwargs.get('compact', False))
 
 
 class PlistLoader(LoaderProto):
-    name = "Property List"
+    name = api.NAMES['plist']
     ext  = "plist"
-    debug_base = 'Error parsing ' + name + ' "%s": %s, line %s, column %s'
-    file_regex = re.escape(debug_base).replace(r'\%', '%') % (r'(.*?)', r'.*?', r'(\d+)', r'(\d+)')
-    opt_regex = r'^\s*<!--\s+\[PackageDev\]\s+(.+)-->'
-    DOCTYPE = "<!DOCTYPE plist"
+    debug_base = api.DEBUG_BASE['plist']
+    file_regex = api.FILE_REGEX['plist']
+    opt_regex = api.OPT_REGEX['plist']
+    DOCTYPE = api.PLIST_DOCTYPE
 
     @classmethod
     def file_is_valid(cls, view, file_path=None):
@@ -352,77 +381,40 @@ class PlistLoader(LoaderProto):
         return False
 
     def parse(self, *args, **kwargs):
-        # Note: I hate Plist and XML. And it doesn't help a bit that parsing
-        # plist files is a REAL PITA.
-        text = get_text(self.view)
-
-        # Parsing will fail if `<?xml version="1.0" encoding="UTF-8"?>` encoding is in the first
-        # line, so strip it.
-        # XXX: Find a better way to fix this misbehaviour of xml stuff in Python
-        #      (I mean, plistliv even "writes" that line)
-        if text.startswith('<?xml version="1.0" encoding="UTF-8"?>'):
-            text = text[38:]
-
-        # See https://github.com/SublimeText/AAAPackageDev/issues/34
-        if ST2 and isinstance(text, unicode):  # NOQA
-            text = text.encode('utf-8')
-
-        if use_plistlib:
-            try:
-                # This will try `from xml.parsers.expat import ParserCreate`
-                # but since it is already tried above it should succeed.
-                if ST2:
-                    data = plistlib.readPlistFromString(text)
-                else:
-                    data = plistlib.readPlistFromBytes(text.encode('utf-8'))
-            except ExpatError as e:
-                self.output.write_line(self.debug_base
-                                       % (self.file_path,
-                                          ErrorString(e.code),
-                                          e.lineno,
-                                          e.offset)
-                                       )
-            # except BaseException as e:
-            #     # Whatever could happen here ...
-            #     self.output.write_line(self.debug_base % (self.file_path, str(e), 0, 0))
-            else:
-                return data
-        else:
-            # falling back to plist_parser
-            from xml.sax._exceptions import SAXReaderNotAvailable
-            try:
-                data = plist_parser.parse_string(text)
-            except plist_parser.PropertyListParseError as e:
-                self.output.write_line(self.debug_base % (self.file_path, str(e), 0, 0))
-            except SAXReaderNotAvailable:
-                # https://github.com/SublimeText/AAAPackageDev/issues/48
-                self.output.write_line("Unable to parse Property List because of missing XML "
-                                       "parsers in your Python environment.\n"
-                                       "Please use Sublime Text 3 or reinstall Python 2.6 "
-                                       "on your system.")
-            else:
-                return data
+        return api.loads(get_text(self.view), self.ext, self.output, self.file_path,
+                         self.get_cache(), compact=kwargs.get('compact', False))
 
 
 class YAMLLoader(LoaderProto):
-    name    = "YAML"
+    name    = api.NAMES['yaml']
     ext     = "yaml"
     comment = "#"
     scope   = "source.yaml"
-    debug_base = "Error parsing YAML: %s"
-    file_regex = r'^ +in "(.*?)", line (\d+), column (\d+)'
+    debug_base = api.DEBUG_BASE['yaml']
+    file_regex = api.FILE_REGEX['yaml']
 
     def parse(self, *args, **kwargs):
-        text = get_text(self.view)
-        try:
-            data = yaml.safe_load(text)
-        except yaml.YAMLError as e:
-            out = self.debug_base % str(e).replace("<unicode string>", self.file_path)
-            self.output.write_line(out)
-        except IOError as e:
-            self.output.write_line('Error opening "%s": %s' % (self.file_path, str(e)))
-        else:
-            return data
+        return api.loads(get_text(self.view), self.ext, self.output, self.file_path,
+                         self.get_cache(), compact=kwargs.get('compact', False))
+
+    def load_documents(self, *args, **kwargs):
+        """Like ``load``, but the file may have several documents.
+
+        Returns ``(data, None)`` for a single document and ``(None, docs)``
+        with the ``api.YAMLDocuments`` that yield all of them otherwise (see
+        ``api.load_documents``), or ``(None, None)`` on errors. Documents are
+        parsed while they are iterated.
+        """
+        if not self.is_valid():
+            self.output.write_line("Not a %s file." % self.name)
+            return None, None
+
+        self.output.write_line("Parsing %s... (%s)" % (self.name, self.file_path))
+        data, docs = api.load_documents(get_text(self.view), self.output, self.file_path,
+                                        self.get_cache())
+        if docs is not None:
+            self.output.write_line("Found multiple documents, converting them one by one.")
+        return data, docs
 
 
 ###############################################################################
@@ -0,0 +1,199 @@
+"""Opt-in latency histograms for plugin entry points.
+
+Entry points are wrapped with ``timed`` and branches inside them with
+``timer``; both record into the default ``Metrics`` registry, ``metrics``:
+
+    @timed('ConvertFileCommand.run')
+    def run(self, ...):
+        with timer('completions.trie_walk'):
+            ...
+
+    metrics.enabled = True
+    print('\\n'.join(metrics.report()))
+
+Nothing is recorded unless ``metrics.enabled`` is set; a disabled ``timed``
+function only checks the flag before calling the wrapped one.
+
+A ``Histogram`` counts durations in buckets like an HDR histogram does:
+the values are microseconds and each power of two is split into
+``2 ** SUB_BUCKET_BITS`` linear buckets. Recording is O(1) and needs memory
+proportional to the number of different magnitudes, while percentiles are
+accurate to about 3%. The slowest samples are kept with their times.
+"""
+import functools
+import heapq
+import threading
+import time
+
+if hasattr(time, 'perf_counter'):
+    clock = time.perf_counter
+else:
+    clock = time.time
+
+
+__all__ = ['Histogram', 'Metrics', 'metrics', 'timed', 'timer']
+
+
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+# Number of slowest samples to keep per histogram
+SLOWEST = 5
+
+
+def bucket_index(value):
+    """Returns the bucket of ``value``, a non-negative int.
+    """
+    if value < 2 * SUB_BUCKETS:
+        return value
+    # int.bit_length is new in Python 2.7
+    shift = len(bin(value)) - 2 - SUB_BUCKET_BITS - 1
+    return shift * SUB_BUCKETS + (value >> shift)
+
+
+def bucket_range(index):
+    """Returns the lowest and the highest value of a bucket.
+    """
+    if index < 2 * SUB_BUCKETS:
+        return index, index
+    shift = index // SUB_BUCKETS - 1
+    mantissa = index % SUB_BUCKETS + SUB_BUCKETS
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+class Histogram(object):
+    """Durations of one entry point or branch. See the module's
+    documentation.
+    """
+
+    def __init__(self):
+        # bucket index -> count
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # (seconds, wall clock time) of the slowest samples, a min-heap
+        self.slowest = []
+
+    def record(self, seconds):
+        index = bucket_index(int(seconds * 1e6))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if len(self.slowest) < SLOWEST:
+            heapq.heappush(self.slowest, (seconds, time.time()))
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (seconds, time.time()))
+
+    def percentile(self, percent):
+        """Returns the duration in seconds that ``percent`` percent of the
+        samples do not exceed (the upper end of its bucket, at most the
+        maximum) or ``0.0`` without samples.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, percent / 100.0 * self.count)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                break
+        return min(bucket_range(index)[1] / 1e6, self.max)
+
+
+class Metrics(object):
+    """Histograms by name. Recording and reporting are thread-safe.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.record(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+
+    def report(self):
+        """Returns lines with the percentiles and slowest samples of all
+        histograms, sorted by name.
+        """
+        lines = []
+        with self._lock:
+            for name, histogram in sorted(self.histograms.items()):
+                lines.append("%s: %d calls, p50 %s, p95 %s, p99 %s, max %s" % (
+                    name, histogram.count,
+                    _ms(histogram.percentile(50)), _ms(histogram.percentile(95)),
+                    _ms(histogram.percentile(99)), _ms(histogram.max)))
+                for seconds, when in sorted(histogram.slowest, reverse=True):
+                    when = time.strftime("%H:%M:%S", time.localtime(when))
+                    lines.append("    %s at %s" % (_ms(seconds), when))
+        return lines
+
+
+def _ms(seconds):
+    return "%.2fms" % (seconds * 1000)
+
+
+class _Timer(object):
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.record(self.name, clock() - self.start)
+
+
+class _NullTimer(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_null_timer = _NullTimer()
+
+
+def timer(name, registry=None):
+    """Returns a context manager that records the duration of its block as
+    ``name`` if the registry (``metrics`` by default) is enabled.
+    """
+    registry = registry or metrics
+    if registry.enabled:
+        return _Timer(registry, name)
+    return _null_timer
+
+
+def timed(name, registry=None):
+    """Decorator that records the duration of each call as ``name`` if the
+    registry (``metrics`` by default) is enabled. Calls that raise are
+    recorded as well.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            reg = registry or metrics
+            if not reg.enabled:
+                return func(*args, **kwargs)
+            with _Timer(reg, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+metrics = Metrics()
@@ -0,0 +1,221 @@
+"""Random access to parts of big XML Property Lists.
+
+Looking up a single repository entry of a grammar, for example to complete
+a ``source.x#key`` include, does not require parsing the whole file. A
+``PlistIndex`` scans a file once and records the byte offsets of the values
+of all top-level keys and of the entries of some top-level dicts
+(``repository`` by default). A lookup then only parses the slice of the
+file it needs, read from an mmap:
+
+    index = PlistIndex(directory)
+    index.lookup(path, "repository", "string")
+
+Offsets are found with ``plist_tokenizer``'s regular expression, compiled
+for bytes; ElementTree's ``iterparse`` does not provide offsets. Indexes
+are persisted in a ``DiskParseCache`` in ``directory`` (if given), keyed by
+the file's path, size and modification time.
+"""
+import contextlib
+import mmap
+import os
+import re
+import threading
+
+from . import plist_tokenizer
+from .cache import DiskParseCache, cache_key
+
+
+__all__ = ['PlistIndex', 'build_index']
+
+
+# Bump when the index's layout changes
+INDEX_VERSION = 1
+
+TOKEN_RE = re.compile(plist_tokenizer.TOKEN_PATTERN.encode('ascii'), re.S | re.X)
+
+ENCODING_RE = plist_tokenizer.ENCODING_RE
+
+
+def _element_end(m):
+    """Returns the offset after the element closed or completed by the
+    token ``m``, excluding the whitespace that follows it.
+    """
+    return m.start() + len(m.group().rstrip())
+
+
+@contextlib.contextmanager
+def _mapped(path):
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Can't mmap empty files
+            yield b''
+            return
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield buf
+        finally:
+            buf.close()
+
+
+def build_index(buf, nested=('repository',)):
+    """Scans the XML plist in ``buf`` (bytes or mmap), which must contain a
+    dict at the top level, and returns its index:
+
+        {'encoding': str,
+         'keys': {key: (start, end)},
+         'nested': {key: {sub_key: (start, end)}}}
+
+    ``start`` and ``end`` delimit the value element of ``key``.
+    ``nested`` names the top-level keys whose (dict) values are indexed as
+    well. Keys with markup in them are ignored.
+    """
+    match = ENCODING_RE.match(buf[:256])
+    encoding = match.group(1).decode('ascii') if match else 'utf-8'
+
+    keys, nested_keys = {}, {}
+    depth = 0
+    # The contents of the top-level dict and of the nested dict that is
+    # currently open are at these depths. ``tables`` maps them to the dict
+    # of offsets and the current key.
+    top = sub = None
+    tables = {}
+    # Depth -> (table, key, start) of the values that are open
+    open_values = {}
+
+    for m in TOKEN_RE.finditer(buf):
+        kind = m.lastgroup
+        if kind == 'SIMPLE':
+            if depth in tables:
+                table = tables[depth]
+                if m.group('stag') == b'key':
+                    key = m.group('stext').decode(encoding)
+                    if '&' in key:
+                        key = plist_tokenizer._unescape(key, key, 0)
+                    table[1] = key
+                elif table[1] is not None:
+                    table[0][table[1]] = (m.start(), _element_end(m))
+                    table[1] = None
+
+        elif kind == 'OPEN':
+            tag = m.group('otag')
+            table = tables.get(depth)
+            if table is not None:
+                if tag == b'key':
+                    # Can't decode keys with markup
+                    table[1] = None
+                elif table[1] is not None:
+                    if m.group('empty'):
+                        table[0][table[1]] = (m.start(), _element_end(m))
+                        table[1] = None
+                    else:
+                        open_values[depth] = (table[0], table[1], m.start())
+                        if depth == top and tag == b'dict' and table[1] in nested:
+                            sub = depth + 1
+                            tables[sub] = [nested_keys.setdefault(table[1], {}), None]
+                        table[1] = None
+
+            if not m.group('empty'):
+                depth += 1
+                if top is None and tag == b'dict':
+                    top = depth
+                    tables[top] = [keys, None]
+
+        elif kind == 'CLOSE':
+            if depth == sub:
+                del tables[sub]
+                sub = None
+            elif depth == top:
+                break
+            depth -= 1
+            value = open_values.pop(depth, None)
+            if value is not None:
+                table, key, start = value
+                table[key] = (start, _element_end(m))
+
+    return dict(encoding=encoding, keys=keys, nested=nested_keys)
+
+
+class PlistIndex(object):
+    """Builds, caches and uses indexes of plist files.
+
+        PlistIndex(directory=None, nested=('repository',))
+
+            * directory (str)
+                Persist indexes in this directory. In memory only if
+                ``None``.
+
+            * nested (tuple)
+                Top-level keys whose dict values are indexed as well.
+    """
+
+    def __init__(self, directory=None, nested=('repository',)):
+        self.nested = tuple(nested)
+        self.disk_cache = DiskParseCache(directory, 8 * 1024 * 1024) if directory else None
+        # path -> (signature, index)
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def _signature(self, path):
+        st = os.stat(path)
+        return (st.st_size, st.st_mtime)
+
+    def get(self, path):
+        """Returns the index of the file at ``path``, building it if it does
+        not exist or the file was modified.
+        """
+        path = os.path.abspath(path)
+        signature = self._signature(path)
+        with self._lock:
+            entry = self._indexes.get(path)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        index = None
+        if self.disk_cache is not None:
+            key = cache_key("%s\0%r" % (path, signature), 'plist-index',
+                            "%d;%r" % (INDEX_VERSION, self.nested))
+            index = self.disk_cache.get(key)
+        if index is None:
+            with _mapped(path) as buf:
+                index = build_index(buf, self.nested)
+            if self.disk_cache is not None:
+                self.disk_cache.set(key, index)
+
+        with self._lock:
+            self._indexes[path] = (signature, index)
+        return index
+
+    def lookup(self, path, *keys):
+        """Returns the value at ``keys`` in the plist at ``path``, e.g.
+        ``lookup(path, "repository", "string")``.
+
+        Only the slice of the file with the deepest indexed value is parsed.
+        Raises ``KeyError`` if there is no such value and
+        ``plist_tokenizer.PlistSyntaxError`` for malformed slices.
+        """
+        if not keys:
+            raise TypeError("lookup() needs at least one key")
+        index = self.get(path)
+        if len(keys) > 1 and keys[0] in index['nested']:
+            span = index['nested'][keys[0]][keys[1]]
+            rest = keys[2:]
+        else:
+            span = index['keys'][keys[0]]
+            rest = keys[1:]
+
+        with _mapped(path) as buf:
+            value = plist_tokenizer.parse(buf[span[0]:span[1]].decode(index['encoding']))
+        for key in rest:
+            value = value[key]
+        return value
+
+    def keys(self, path, *keys):
+        """Returns the indexed keys of the top-level dict, or of the nested
+        dict at ``keys[0]``, without parsing anything.
+        """
+        index = self.get(path)
+        return list(index['nested'][keys[0]] if keys else index['keys'])
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
@@ -6,19 +6,38 @@ boolean, and container object.
 This file contains a class ``XmlPropertyListParser`` for parse
 a property list file and get back a python native data structure.
 
+It uses ElementTree's ``iterparse`` or SAX, which both need
+``xml.parsers.expat``; ``api`` falls back to ``plist_tokenizer`` where that
+is missing. ``parse_file`` streams the file and only holds the path to the
+current element besides the result. ``plist_tokenizer`` shares
+``PropertyListParseError`` and the ``<date>`` conversion with this module.
+
     :copyright: 2008 by Takanori Ishikawa <takanori.ishikawa@gmail.com>
     :license: MIT (See LICENSE file for more details)
 
 .. _Property Lists: http://developer.apple.com/documentation/Cocoa/Conceptual/PropertyLists/
 """
 
+import base64
+import datetime
+import io
 import re
 import sys
 
 
 if sys.version_info >= (3,):
-    # Some forwards compatability
-    basestring = str
+    text_type = str
+else:
+    text_type = unicode  # NOQA
+
+try:
+    from xml.etree.cElementTree import iterparse
+except ImportError:
+    # Removed in Python 3.9, the default implementation is the C one anyway
+    try:
+        from xml.etree.ElementTree import iterparse
+    except ImportError:
+        iterparse = None
 
 
 class PropertyListParseError(Exception):
@@ -32,6 +51,11 @@ class XmlPropertyListParser(object):
     Property list objects include ``string``, ``unicode``,
     ``list``, ``dict``, ``datetime``, and ``int`` or ``float``.
 
+    Input may be ``bytes``, text or a (binary or text) file-like object.
+    Files are read incrementally and elements are discarded as soon as
+    their value has been stored, so parsing a file does not need more
+    memory than the resulting objects.
+
         :copyright: 2008 by Takanori Ishikawa <takanori.ishikawa@gmail.com>
         :license: MIT License
 
@@ -42,6 +66,22 @@ class XmlPropertyListParser(object):
         if not test:
             raise PropertyListParseError(message)
 
+    def __init__(self):
+        # Bind the callbacks once instead of looking them up for every element
+        self.__start_callbacks = dict((tag, getattr(self, name))
+                                      for tag, name in self.START_CALLBACKS.items())
+        self.__end_callbacks = dict((tag, getattr(self, name))
+                                    for tag, name in self.END_CALLBACKS.items())
+        # Convert the text of scalar elements (except for <string>) to their value
+        self.__converters = {
+            'true': lambda content: True,
+            'false': lambda content: False,
+            'integer': int,
+            'real': float,
+            'data': base64.b64decode,
+            'date': self._to_datetime,
+        }
+
     # ------------------------------------------------
     # SAX2: ContentHandler
     # ------------------------------------------------
@@ -78,30 +118,26 @@ class XmlPropertyListParser(object):
 
     def endDocument(self):
         self._assert(self.__plist is not None, "A top level element must be <plist>.")
-        self._assert(
-            len(self.__stack) is 0,
-            "multiple objects at top level.")
+        self._assert(not self.__stack, "multiple objects at top level.")
 
     def startElement(self, name, attributes):
-        if name in XmlPropertyListParser.START_CALLBACKS:
-            XmlPropertyListParser.START_CALLBACKS[name](self, name, attributes)
-        if name in XmlPropertyListParser.PARSE_CALLBACKS:
+        callback = self.__start_callbacks.get(name)
+        if callback is not None:
+            callback(attributes)
+        if name in self.TEXT_ELEMENTS:
             self.__characters = []
 
     def endElement(self, name):
-        if name in XmlPropertyListParser.END_CALLBACKS:
-            XmlPropertyListParser.END_CALLBACKS[name](self, name)
-        if name in XmlPropertyListParser.PARSE_CALLBACKS:
+        callback = self.__end_callbacks.get(name)
+        if callback is None:
+            return
+        if name in self.TEXT_ELEMENTS:
             # Creates character string from buffered characters.
             content = ''.join(self.__characters)
-            # For compatibility with ``xml.etree`` and ``plistlib``,
-            # convert text string to ascii, if possible
-            try:
-                content = content.encode('ascii')
-            except (UnicodeError, AttributeError):
-                pass
-            XmlPropertyListParser.PARSE_CALLBACKS[name](self, name, content)
             self.__characters = None
+        else:
+            content = ''
+        callback(content)
 
     def characters(self, content):
         if self.__characters is not None:
@@ -114,17 +150,14 @@ class XmlPropertyListParser(object):
         if not self.__stack:
             self._assert(self.__plist is None, "Multiple objects at top level")
             self.__plist = value
+        elif self.__in_dict:
+            k = self.__key
+            if k is None:
+                raise PropertyListParseError("Missing key for dictionary.")
+            self.__stack[-1][k] = value
+            self.__key = None
         else:
-            top = self.__stack[-1]
-            #assert isinstance(top, (dict, list))
-            if self.__in_dict:
-                k = self.__key
-                if k is None:
-                    raise PropertyListParseError("Missing key for dictionary.")
-                top[k] = value
-                self.__key = None
-            else:
-                top.append(value)
+            self.__stack[-1].append(value)
 
     def _push_stack(self, value):
         self.__stack.append(value)
@@ -132,47 +165,46 @@ class XmlPropertyListParser(object):
 
     def _pop_stack(self):
         self.__stack.pop()
-        self.__in_dict = self.__stack and isinstance(self.__stack[-1], dict)
+        self.__in_dict = bool(self.__stack) and isinstance(self.__stack[-1], dict)
 
-    def _start_plist(self, name, attrs):
+    def _start_plist(self, attrs):
         self._assert(not self.__stack and self.__plist is None, "<plist> more than once.")
         self._assert(attrs.get('version', '1.0') == '1.0',
                      "version 1.0 is only supported, but was '%s'." % attrs.get('version'))
 
-    def _start_array(self, name, attrs):
+    def _start_array(self, attrs):
         v = list()
         self._push_value(v)
         self._push_stack(v)
 
-    def _start_dict(self, name, attrs):
+    def _start_dict(self, attrs):
         v = dict()
         self._push_value(v)
         self._push_stack(v)
 
-    def _end_array(self, name):
+    def _end_array(self, content):
         self._pop_stack()
 
-    def _end_dict(self, name):
+    def _end_dict(self, content):
         if self.__key is not None:
             raise PropertyListParseError("Missing value for key '%s'" % self.__key)
         self._pop_stack()
 
-    def _start_true(self, name, attrs):
+    def _start_true(self, attrs):
         self._push_value(True)
 
-    def _start_false(self, name, attrs):
+    def _start_false(self, attrs):
         self._push_value(False)
 
-    def _parse_key(self, name, content):
+    def _parse_key(self, content):
         if not self.__in_dict:
             raise PropertyListParseError("<key> element must be in <dict> element.")
         self.__key = content
 
-    def _parse_string(self, name, content):
+    def _parse_string(self, content):
         self._push_value(content)
 
-    def _parse_data(self, name, content):
-        import base64
+    def _parse_data(self, content):
         self._push_value(base64.b64decode(content))
 
     # http://www.apple.com/DTDs/PropertyList-1.0.dtd says:
@@ -180,19 +212,17 @@ class XmlPropertyListParser(object):
     # Contents should conform to a subset of ISO 8601
     # (in particular, YYYY '-' MM '-' DD 'T' HH ':' MM ':' SS 'Z'.
     # Smaller units may be omitted with a loss of precision)
-    DATETIME_PATTERN = re.compile(r"(?P<year>\d\d\d\d)(?:-(?P<month>\d\d)(?:-(?P<day>\d\d)(?:T(?P<hour>\d\d)(?::(?P<minute>\d\d)(?::(?P<second>\d\d))?)?)?)?)?Z$")
-
-    def _parse_date(self, name, content):
-        import datetime
+    DATETIME_PATTERN = re.compile(r"(?P<year>\d\d\d\d)(?:-(?P<month>\d\d)(?:-(?P<day>\d\d)"
+                                  r"(?:T(?P<hour>\d\d)(?::(?P<minute>\d\d)(?::(?P<second>\d\d))?)?)?)?)?Z$")
+    DATETIME_UNITS = ('year', 'month', 'day', 'hour', 'minute', 'second')
 
-        units = ('year', 'month', 'day', 'hour', 'minute', 'second', )
-        pattern = XmlPropertyListParser.DATETIME_PATTERN
-        match = pattern.match(content)
+    def _to_datetime(self, content):
+        match = self.DATETIME_PATTERN.match(content)
         if not match:
             raise PropertyListParseError("Failed to parse datetime '%s'" % content)
 
         groups, components = match.groupdict(), []
-        for key in units:
+        for key in self.DATETIME_UNITS:
             value = groups[key]
             if value is None:
                 break
@@ -200,72 +230,129 @@ class XmlPropertyListParser(object):
         while len(components) < 3:
             components.append(1)
 
-        d = datetime.datetime(*components)
-        self._push_value(d)
+        return datetime.datetime(*components)
 
-    def _parse_real(self, name, content):
+    def _parse_date(self, content):
+        self._push_value(self._to_datetime(content))
+
+    def _parse_real(self, content):
         self._push_value(float(content))
 
-    def _parse_integer(self, name, content):
+    def _parse_integer(self, content):
         self._push_value(int(content))
 
+    # Called with the element's attributes
     START_CALLBACKS = {
-        'plist': _start_plist,
-        'array': _start_array,
-        'dict': _start_dict,
-        'true': _start_true,
-        'false': _start_false,
+        'plist': '_start_plist',
+        'array': '_start_array',
+        'dict': '_start_dict',
+        'true': '_start_true',
+        'false': '_start_false',
     }
 
+    # Called with the element's text content
     END_CALLBACKS = {
-        'array': _end_array,
-        'dict': _end_dict,
+        'array': '_end_array',
+        'dict': '_end_dict',
+        'key': '_parse_key',
+        'string': '_parse_string',
+        'data': '_parse_data',
+        'date': '_parse_date',
+        'real': '_parse_real',
+        'integer': '_parse_integer',
     }
 
-    PARSE_CALLBACKS = {
-        'key': _parse_key,
-        'string': _parse_string,
-        'data': _parse_data,
-        'date': _parse_date,
-        'real': _parse_real,
-        'integer': _parse_integer,
-    }
+    TEXT_ELEMENTS = frozenset(('key', 'string', 'data', 'date', 'real', 'integer'))
 
     # ------------------------------------------------
     # XmlPropertyListParser
     # ------------------------------------------------
     def _to_stream(self, io_or_string):
-        if isinstance(io_or_string, basestring):
-            # Creates a string stream for in-memory contents.
-            from cStringIO import StringIO
-            return StringIO(io_or_string)
-        elif hasattr(io_or_string, 'read') and callable(getattr(io_or_string, 'read')):
+        if isinstance(io_or_string, bytes):
+            return io.BytesIO(io_or_string)
+        elif isinstance(io_or_string, text_type):
+            # The XML parsers read bytes
+            return io.BytesIO(io_or_string.encode('utf-8'))
+        elif callable(getattr(io_or_string, 'read', None)):
             return io_or_string
         else:
             raise TypeError('Can\'t convert %s to file-like-object' % type(io_or_string))
 
     def _parse_using_etree(self, xml_input):
-        from xml.etree.cElementTree import iterparse
+        # This is the fast path. It does the same as the SAX callbacks above
+        # but keeps all state in local variables.
+        converters = self.__converters
+        elements = []  # open elements
+        stack = []  # open containers
+        container = plist = key = None
+        in_dict = False
 
-        parser = iterparse(self._to_stream(xml_input), events=('start', 'end'))
-        self.startDocument()
         try:
-            for action, element in parser:
-                name = element.tag
+            for action, element in iterparse(self._to_stream(xml_input),
+                                             events=('start', 'end')):
+                tag = element.tag
+                if action == 'start':
+                    elements.append(element)
+                    if tag == 'dict':
+                        value = {}
+                    elif tag == 'array':
+                        value = []
+                    else:
+                        if tag == 'plist':
+                            self._assert(not elements[:-1] and plist is None,
+                                         "<plist> more than once.")
+                            version = element.attrib.get('version', '1.0')
+                            self._assert(version == '1.0', "version 1.0 is only supported, "
+                                         "but was '%s'." % version)
+                        continue
+                else:
+                    elements.pop()
+                    # The value has been stored, discard the element so the tree
+                    # never holds more than the path to the current element
+                    if elements:
+                        elements[-1].remove(element)
+
+                    if tag == 'key':
+                        if not in_dict:
+                            raise PropertyListParseError("<key> element must be in "
+                                                         "<dict> element.")
+                        key = element.text or ''
+                        continue
+                    elif tag == 'dict' or tag == 'array':
+                        if key is not None:
+                            raise PropertyListParseError("Missing value for key '%s'" % key)
+                        stack.pop()
+                        container = stack[-1] if stack else None
+                        in_dict = isinstance(container, dict)
+                        continue
+                    elif tag == 'string':
+                        value = element.text or ''
+                    elif tag in converters:
+                        value = converters[tag](element.text or '')
+                    else:
+                        continue
+
+                if in_dict:
+                    if key is None:
+                        raise PropertyListParseError("Missing key for dictionary.")
+                    container[key] = value
+                    key = None
+                elif container is not None:
+                    container.append(value)
+                else:
+                    self._assert(plist is None, "Multiple objects at top level")
+                    plist = value
+
                 if action == 'start':
-                    if name in XmlPropertyListParser.START_CALLBACKS:
-                        XmlPropertyListParser.START_CALLBACKS[name](self, element.tag, element.attrib)
-                elif action == 'end':
-                    if name in XmlPropertyListParser.END_CALLBACKS:
-                        XmlPropertyListParser.END_CALLBACKS[name](self, name)
-                    if name in XmlPropertyListParser.PARSE_CALLBACKS:
-                        XmlPropertyListParser.PARSE_CALLBACKS[name](self, name, element.text or "")
-                    element.clear()
+                    stack.append(value)
+                    container = value
+                    in_dict = tag == 'dict'
         except SyntaxError as e:
             raise PropertyListParseError(e)
 
-        self.endDocument()
-        return self.__plist
+        self._assert(plist is not None, "A top level element must be <plist>.")
+        self._assert(not stack, "multiple objects at top level.")
+        return plist
 
     def _parse_using_sax_parser(self, xml_input):
         from xml.sax import make_parser, xmlreader, SAXParseException
@@ -290,11 +377,13 @@ class XmlPropertyListParser(object):
         ...              r'</plist>')
         {'Python': '.py'}
         """
-        try:
-            return self._parse_using_etree(xml_input)
-        except ImportError:
-            # No xml.etree.ccElementTree found.
-            return self._parse_using_sax_parser(xml_input)
+        if iterparse is not None:
+            try:
+                return self._parse_using_etree(xml_input)
+            except ImportError:
+                # ElementTree is there, but not the expat module it uses
+                pass
+        return self._parse_using_sax_parser(xml_input)
 
 
 def parse_string(io_or_string):
@@ -306,5 +395,5 @@ def parse_string(io_or_string):
 def parse_file(file_path):
     """Parse the specified file and return the resulting object.
     """
-    with open(file_path) as f:
+    with open(file_path, 'rb') as f:
         return XmlPropertyListParser().parse(f)
@@ -0,0 +1,311 @@
+"""A parser for XML Property Lists that does not need an XML library.
+
+``xml.parsers.expat`` is missing on some Linux distributions and every
+XML parser in the standard library (plistlib, ElementTree, SAX) depends on
+it. Since the plist grammar is tiny and regular, this module scans the
+whole document with a single compiled regular expression and builds the
+values with an explicit stack.
+
+    parse(text_or_bytes)
+
+Simple elements like ``<key>name</key>`` are matched as one token, so a
+typical syntax definition needs roughly one regex match per line. Errors are
+raised as ``PlistSyntaxError`` with the line (1-based) and column (0-based,
+like expat) of the offending token.
+
+Only what plists use is supported: elements, attributes, comments,
+processing instructions, a doctype without internal subset declarations,
+CDATA sections and the predefined and numeric character references.
+"""
+import base64
+import binascii
+import re
+import sys
+
+from .plist_parser import PropertyListParseError, XmlPropertyListParser
+
+
+__all__ = ['PlistSyntaxError', 'parse']
+
+
+if sys.version_info < (3,):
+    unichr_ = unichr  # NOQA
+else:
+    unichr_ = chr
+
+
+class PlistSyntaxError(PropertyListParseError):
+    """Raised for malformed documents.
+
+    ``msg``, ``lineno`` and ``colno`` hold the details; the string
+    representation is formatted like an ``ExpatError``.
+    """
+
+    def __init__(self, msg, text, pos):
+        self.msg = msg
+        self.pos = pos
+        self.lineno = text.count('\n', 0, pos) + 1
+        self.colno = pos - (text.rfind('\n', 0, pos) + 1)
+        super(PlistSyntaxError, self).__init__("%s: line %d, column %d"
+                                               % (msg, self.lineno, self.colno))
+
+
+NAME = r'[A-Za-z_][\w.:-]*'
+
+# Every alternative is wrapped in a group of its own so that
+# ``match.lastgroup`` tells which one matched. Together they match every
+# possible input, so ``finditer`` never skips anything.
+TOKEN_PATTERN = r'''
+    # A complete element without markup in its content, the common case.
+    # Whitespace following it can not be content.
+    (?P<SIMPLE>
+        <(?P<stag>key|string|integer|real|date|data)>
+        (?P<stext>[^<]*)
+        </(?P=stag)>
+        \s*
+    )
+  | (?P<OPEN>
+        <(?P<otag>%(name)s)
+        (?P<attrs>(?:\s+%(name)s\s*=\s*(?:"[^"<]*"|'[^'<]*'))*)
+        \s*(?P<empty>/)?>
+        (?P<otail>\s*)
+    )
+  | (?P<CLOSE>
+        </(?P<ctag>%(name)s)\s*>
+        \s*
+    )
+  | (?P<TEXT>[^<]+)
+  | (?P<CDATA><!\[CDATA\[(?P<cdata>.*?)\]\]>)
+  | (?P<SKIP>
+        <!--.*?-->
+      | <\?.*?\?>
+      | <!DOCTYPE[^\[>]*>
+    )
+  | (?P<ERROR><)
+''' % dict(name=NAME)
+TOKEN_RE = re.compile(TOKEN_PATTERN, re.S | re.X)
+
+ATTR_RE = re.compile(r'''(%s)\s*=\s*(?:"([^"]*)"|'([^']*)')''' % NAME)
+
+ENTITY_RE = re.compile(r'&(?:#([0-9]+);|#x([0-9a-fA-F]+);|(amp|lt|gt|quot|apos);|)')
+ENTITIES = dict(amp='&', lt='<', gt='>', quot='"', apos="'")
+
+ENCODING_RE = re.compile(br'''^<\?xml[^>]*?encoding=["']([\w.-]+)["']''')
+
+SCALARS = frozenset(('key', 'string', 'integer', 'real', 'date', 'data', 'true', 'false'))
+
+
+# Reuse the SAX parser's implementation, it does not depend on its state
+_to_datetime = XmlPropertyListParser()._to_datetime
+
+
+def _to_bool(value):
+    def convert(content):
+        if content.strip():
+            raise ValueError("must be empty")
+        return value
+    return convert
+
+
+# Convert the text of scalar elements (except for <key> and <string>)
+CONVERTERS = {
+    'integer': lambda content: int(content.strip()),
+    'real': lambda content: float(content.strip()),
+    'date': lambda content: _to_datetime(content.strip()),
+    'data': base64.b64decode,
+    'true': _to_bool(True),
+    'false': _to_bool(False),
+}
+
+
+def _decode(raw):
+    if raw.startswith(b'\xef\xbb\xbf'):
+        return raw[3:].decode('utf-8')
+    match = ENCODING_RE.match(raw)
+    return raw.decode(match.group(1).decode('ascii') if match else 'utf-8')
+
+
+def _unescape(content, text, pos):
+    """Replaces character references in ``content``, which starts at ``pos``
+    in ``text``.
+    """
+    def replace(m):
+        if m.group(3):
+            return ENTITIES[m.group(3)]
+        elif m.group(1) or m.group(2):
+            return unichr_(int(m.group(1), 10) if m.group(1) else int(m.group(2), 16))
+        raise PlistSyntaxError("undefined entity", text, pos + m.start())
+
+    return ENTITY_RE.sub(replace, content)
+
+
+def parse(text):
+    """Parses the XML Property List ``text`` (``str`` or ``bytes``) and
+    returns the contained value.
+    """
+    if isinstance(text, bytes):
+        text = _decode(text)
+    if '\r' in text:
+        # Line breaks are normalized before parsing (XML 1.0, 2.11)
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+    elements = []  # tags and positions of the open elements
+    stack = []  # open containers
+    container = plist = key = None
+    in_dict = False
+    # The content of the open scalar element, if any
+    parts = None
+    done = False
+
+    for m in TOKEN_RE.finditer(text):
+        kind = m.lastgroup
+        pos = m.start()
+
+        if kind == 'SIMPLE':
+            if parts is not None or done:
+                raise PlistSyntaxError("junk after document element" if done
+                                       else "unexpected element", text, pos)
+            tag, content = m.group('stag', 'stext')
+            if '&' in content:
+                content = _unescape(content, text, m.start('stext'))
+            if tag == 'key':
+                if not in_dict:
+                    raise PlistSyntaxError("<key> element must be in <dict> element", text, pos)
+                if key is not None:
+                    raise PlistSyntaxError("missing value for key '%s'" % key, text, pos)
+                key = content
+                continue
+            elif tag == 'string':
+                value = content
+            else:
+                try:
+                    value = CONVERTERS[tag](content)
+                except (ValueError, binascii.Error, PropertyListParseError) as e:
+                    raise PlistSyntaxError("invalid <%s> value (%s)" % (tag, e), text, pos)
+
+        elif kind == 'OPEN':
+            tag = m.group('otag')
+            if parts is not None or done:
+                raise PlistSyntaxError("junk after document element" if done
+                                       else "unexpected element", text, pos)
+            value = None
+            if tag in SCALARS:
+                if tag == 'key' and not in_dict:
+                    raise PlistSyntaxError("<key> element must be in <dict> element", text, pos)
+                # The whitespace following the start tag is content
+                parts = [] if m.group('empty') else [m.group('otail')]
+            elif tag == 'dict':
+                value = {}
+            elif tag == 'array':
+                value = []
+            elif tag == 'plist':
+                if elements or plist is not None:
+                    raise PlistSyntaxError("<plist> more than once", text, pos)
+                for name, v1, v2 in ATTR_RE.findall(m.group('attrs')):
+                    version = v1 or v2
+                    if name == 'version' and version != '1.0':
+                        raise PlistSyntaxError("version 1.0 is only supported, but was '%s'"
+                                               % version, text, pos)
+            else:
+                raise PlistSyntaxError("unknown element <%s>" % tag, text, pos)
+
+            elements.append((tag, pos))
+            if m.group('empty'):
+                # Handle it like an immediately following close tag
+                m = None
+            elif value is None:
+                continue
+
+            if value is not None:
+                if in_dict:
+                    if key is None:
+                        raise PlistSyntaxError("missing key for dictionary", text, pos)
+                    container[key] = value
+                    key = None
+                elif container is not None:
+                    container.append(value)
+                elif plist is None:
+                    plist = value
+                else:
+                    raise PlistSyntaxError("multiple objects at top level", text, pos)
+                stack.append(value)
+                container = value
+                in_dict = tag == 'dict'
+
+            if m is not None:
+                continue
+            kind = 'CLOSE'
+
+        if kind == 'CLOSE':
+            if m is not None:
+                tag = m.group('ctag')
+                if not elements or elements[-1][0] != tag:
+                    raise PlistSyntaxError("mismatched tag", text, pos)
+            elements.pop()
+            if not elements:
+                done = True
+
+            if tag == 'dict' or tag == 'array':
+                if key is not None:
+                    raise PlistSyntaxError("missing value for key '%s'" % key, text, pos)
+                stack.pop()
+                container = stack[-1] if stack else None
+                in_dict = isinstance(container, dict)
+                continue
+            elif tag not in SCALARS:
+                # </plist>
+                continue
+
+            content = ''.join(parts)
+            parts = None
+            if tag == 'key':
+                if key is not None:
+                    raise PlistSyntaxError("missing value for key '%s'" % key, text, pos)
+                key = content
+                continue
+            elif tag == 'string':
+                value = content
+            else:
+                try:
+                    value = CONVERTERS[tag](content)
+                except (ValueError, binascii.Error, PropertyListParseError) as e:
+                    raise PlistSyntaxError("invalid <%s> value (%s)" % (tag, e), text, pos)
+
+        elif kind == 'TEXT' or kind == 'CDATA':
+            if parts is not None:
+                if kind == 'CDATA':
+                    parts.append(m.group('cdata'))
+                else:
+                    content = m.group()
+                    parts.append(_unescape(content, text, pos) if '&' in content else content)
+            elif not m.group().isspace():
+                raise PlistSyntaxError("junk after document element" if done
+                                       else "unexpected text", text, pos)
+            continue
+
+        elif kind == 'SKIP':
+            continue
+
+        elif kind == 'ERROR':
+            raise PlistSyntaxError("not well-formed (invalid token)", text, pos)
+
+        # A scalar value has been completed
+        if in_dict:
+            if key is None:
+                raise PlistSyntaxError("missing key for dictionary", text, pos)
+            container[key] = value
+            key = None
+        elif container is not None:
+            container.append(value)
+        elif plist is None:
+            plist = value
+            # Only for slices of a document (see ``fileconv.plist_index``)
+            done = not elements
+        else:
+            raise PlistSyntaxError("multiple objects at top level", text, pos)
+
+    if elements:
+        raise PlistSyntaxError("unclosed token", text, elements[-1][1])
+    if not done or plist is None:
+        raise PlistSyntaxError("no element found", text, len(text))
+    return plist
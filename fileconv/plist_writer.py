@@ -0,0 +1,225 @@
+"""A streaming writer for XML Property Lists.
+
+Unlike ``plistlib.writePlist`` (or ``plistlib.dump``) this does not build the
+whole document in memory and keeps the order of ``OrderedDict``s, and of
+plain dicts where Python preserves their insertion order (3.7+). Output is
+collected in small chunks and written to any text stream.
+
+    with io.open(path, 'w', encoding='utf-8', newline='\\n') as f:
+        PlistWriter(f, indent='\\t').write(data)
+
+The output is identical to plistlib's for the default parameters, except for
+the key order.
+"""
+import base64
+import datetime
+import re
+import sys
+from collections import OrderedDict
+
+from .compact import FrozenDict
+
+
+__all__ = ['PlistWriter', 'write_plist']
+
+
+PLIST_HEADER = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" '
+                '"http://www.apple.com/DTDs/PropertyList-1.0.dtd">\n')
+
+# Plain dicts keep their insertion order since Python 3.7
+DICTS_ORDERED = sys.version_info >= (3, 7)
+
+if sys.version_info < (3,):
+    str_types = (str, unicode)  # NOQA
+    bytes_types = (bytearray,)
+    int_types = (int, long)  # NOQA
+else:
+    str_types = (str,)
+    bytes_types = (bytes, bytearray)
+    int_types = (int,)
+
+# Characters that need to be escaped or are not allowed at all
+re_special = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f&<>\r]')
+re_control = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def escape(text):
+    if not re_special.search(text):
+        return text
+    if re_control.search(text):
+        raise ValueError("strings can't contain control characters; use bytes instead")
+    text = text.replace("\r\n", "\n")       # convert DOS line endings
+    text = text.replace("\r", "\n")         # convert Mac line endings
+    text = text.replace("&", "&amp;")       # escape '&'
+    text = text.replace("<", "&lt;")        # escape '<'
+    text = text.replace(">", "&gt;")        # escape '>'
+    return text
+
+
+class PlistWriter(object):
+    """Writes Python objects as XML Property List to the text stream ``fp``.
+
+        PlistWriter(fp, indent='\\t', sort_keys=None, skipkeys=False,
+                    chunk_size=1024)
+
+            * indent (str, int or None)
+                The string to indent nested elements with, or a number of
+                spaces. ``None`` writes the document without any indentation
+                and line breaks (after the header), which results in the
+                smallest output.
+
+            * sort_keys (bool or None)
+                ``True`` sorts all dicts' keys like plistlib does, ``False``
+                keeps their order. ``None`` keeps the order of
+                ``OrderedDict``s and of plain dicts when they are ordered
+                (Python 3.7+), and sorts the keys of unordered dicts to get
+                reproducible output.
+
+            * skipkeys (bool)
+                Skip dict keys that are not strings instead of raising a
+                TypeError.
+
+            * chunk_size (int)
+                Number of elements that are collected before they are
+                written to ``fp``.
+    """
+
+    def __init__(self, fp, indent='\t', sort_keys=None, skipkeys=False, chunk_size=1024):
+        self.fp = fp
+        if isinstance(indent, int_types) and not isinstance(indent, bool):
+            indent = ' ' * indent
+        self.indent = indent
+        self.sort_keys = sort_keys
+        self.skipkeys = skipkeys
+        self.chunk_size = chunk_size
+
+    def write(self, value):
+        """Writes ``value`` as a complete plist document.
+        """
+        self._write_document(value)
+
+    def write_array(self, values):
+        """Writes an array with the items of the iterable ``values`` as a
+        complete plist document. Each item is written as soon as it is
+        produced, so ``values`` can be a generator of big items.
+        """
+        self._write_document(values, array=True)
+
+    def _write_document(self, value, array=False):
+        fp_write = self.fp.write
+        indent = self.indent
+        nl = '' if indent is None else '\n'
+        sort_keys, skipkeys, chunk_size = self.sort_keys, self.skipkeys, self.chunk_size
+
+        pads = ['']
+        parts = []
+        append = parts.append
+
+        def pad(level):
+            if indent is None:
+                return ''
+            while len(pads) <= level:
+                pads.append(indent * len(pads))
+            return pads[level]
+
+        def flush():
+            fp_write(''.join(parts))
+            del parts[:]
+
+        def should_sort(d):
+            if sort_keys is None:
+                return not (DICTS_ORDERED or isinstance(d, (OrderedDict, FrozenDict)))
+            return sort_keys
+
+        def write_value(value, level):
+            if isinstance(value, str_types):
+                append(pad(level) + '<string>' + escape(value) + '</string>' + nl)
+
+            elif value is True:
+                append(pad(level) + '<true/>' + nl)
+
+            elif value is False:
+                append(pad(level) + '<false/>' + nl)
+
+            elif isinstance(value, int_types):
+                append(pad(level) + '<integer>%d</integer>' % value + nl)
+
+            elif isinstance(value, float):
+                append(pad(level) + '<real>' + repr(value) + '</real>' + nl)
+
+            elif isinstance(value, (dict, FrozenDict)):
+                if not value:
+                    append(pad(level) + '<dict/>' + nl)
+                    return
+                append(pad(level) + '<dict>' + nl)
+                items = sorted(value.items()) if should_sort(value) else value.items()
+                key_pad = pad(level + 1)
+                for key, sub_value in items:
+                    if not isinstance(key, str_types):
+                        if skipkeys:
+                            continue
+                        raise TypeError("keys must be strings")
+                    append(key_pad + '<key>' + escape(key) + '</key>' + nl)
+                    write_value(sub_value, level + 1)
+                append(pad(level) + '</dict>' + nl)
+
+            elif isinstance(value, (list, tuple)):
+                if not value:
+                    append(pad(level) + '<array/>' + nl)
+                    return
+                append(pad(level) + '<array>' + nl)
+                for sub_value in value:
+                    write_value(sub_value, level + 1)
+                append(pad(level) + '</array>' + nl)
+
+            elif isinstance(value, datetime.datetime):
+                append(pad(level) + '<date>%04d-%02d-%02dT%02d:%02d:%02dZ</date>'
+                       % (value.year, value.month, value.day,
+                          value.hour, value.minute, value.second) + nl)
+
+            elif isinstance(value, bytes_types) or hasattr(value, 'data'):
+                # bytes or plistlib.Data
+                data = value.data if hasattr(value, 'data') else value
+                write_data(data, level)
+
+            else:
+                raise TypeError("unsupported type: %s" % type(value))
+
+            if len(parts) >= chunk_size:
+                flush()
+
+        def write_data(data, level):
+            encoded = base64.b64encode(bytes(data)).decode('ascii')
+            if indent is None:
+                append('<data>' + encoded + '</data>')
+                return
+            # Same line length as plistlib
+            line_length = max(16, 76 - len(pad(level).replace('\t', ' ' * 8)))
+            line_length -= line_length % 4
+            append(pad(level) + '<data>' + nl)
+            for i in range(0, len(encoded), line_length):
+                append(pad(level) + encoded[i:i + line_length] + nl)
+            append(pad(level) + '</data>' + nl)
+
+        append(PLIST_HEADER)
+        append('<plist version="1.0">' + nl)
+        if not array:
+            write_value(value, 0)
+        else:
+            empty = True
+            for item in value:
+                if empty:
+                    append('<array>' + nl)
+                    empty = False
+                write_value(item, 1)
+                flush()
+            append('<array/>' + nl if empty else '</array>' + nl)
+        append('</plist>' + nl)
+        flush()
+
+
+def write_plist(value, fp, **params):
+    """Shortcut for ``PlistWriter(fp, **params).write(value)``.
+    """
+    PlistWriter(fp, **params).write(value)
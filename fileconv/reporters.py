@@ -0,0 +1,61 @@
+"""Diagnostic sinks for the sublime-independent parts of ``fileconv``.
+
+Everything that reports progress or problems (``fileconv.api``, the command
+line interface, the loaders and dumpers) only ever calls ``write(text)`` and
+``write_line(text='')`` on its output object. ``sublime_lib.view.OutputPanel``
+implements both, so any of the classes below can take its place when no
+Sublime Text window is around and vice versa.
+"""
+import sys
+
+
+__all__ = ['Reporter', 'StreamReporter', 'BufferReporter']
+
+
+class Reporter(object):
+    """Base reporter that silently discards everything.
+
+    Derive from this class (or just implement the two methods) to redirect
+    diagnostics somewhere else.
+    """
+
+    def write(self, text):
+        pass
+
+    def write_line(self, text=''):
+        self.write(text + "\n")
+
+
+class StreamReporter(Reporter):
+    """Writes diagnostics to a file-like object, ``sys.stderr`` by default.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def write(self, text):
+        stream = self.stream or sys.stderr
+        stream.write(text)
+        stream.flush()
+
+
+class BufferReporter(Reporter):
+    """Collects diagnostics in memory so that they can be passed around
+    (e.g. from a worker process) and replayed later.
+    """
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+
+    def getvalue(self):
+        return ''.join(self.parts)
+
+    def replay(self, reporter):
+        """Writes all collected text to ``reporter``.
+        """
+        text = self.getvalue()
+        if text:
+            reporter.write(text)
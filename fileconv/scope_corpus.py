@@ -0,0 +1,99 @@
+"""Scope names used by the grammars of installed packages.
+
+The naming conventions in ``scope_data`` only know the top levels of scope
+names. A ``ScopeCorpus`` counts the scope names that the ``name`` and
+``contentName`` values of real grammars (rules and captures) use, so
+completions can suggest them as well:
+
+    corpus = ScopeCorpus(path)
+    corpus.update(packages_dir)
+    counts = corpus.counts()  # {'string.quoted.double': 1234, ...}
+
+``update`` parses all grammar files below a directory, also the ones in
+``.sublime-package`` archives (see ``grammar_index.GrammarFiles`` for the
+arguments). The result is stored per file together with its modification
+time and size, so the next ``update`` only parses new and changed files.
+If ``path`` is given, the corpus is persisted there.
+
+The last part of a scope name is removed if it is the suffix of the
+grammar's ``scopeName`` (``string.quoted.double.python`` is counted as
+``string.quoted.double``). Names with placeholders (``$1``) are ignored.
+"""
+import re
+import sys
+
+from . import api
+from .grammar_index import GrammarFiles, grammar_format
+
+if sys.version_info < (3,):
+    str_types = (str, unicode)  # NOQA
+else:
+    str_types = (str,)
+
+
+__all__ = ['ScopeCorpus', 'extract_scopes', 'grammar_format']
+
+
+SCOPE_KEYS = frozenset(('name', 'contentName'))
+
+SCOPE_RE = re.compile(r'^[\w+\-]+(?:\.[\w+\-]+)*$')
+
+
+def extract_scopes(data, counts=None):
+    """Counts the scope names in the parsed grammar ``data`` and returns
+    ``counts``, a dict of scope name -> number of uses.
+    """
+    counts = {} if counts is None else counts
+    if not isinstance(data, dict):
+        return counts
+
+    scope_name = data.get('scopeName')
+    suffix = '.' + scope_name.rpartition('.')[2] if isinstance(scope_name, str_types) else None
+    # The top-level name is the grammar's display name
+    stack = [value for key, value in data.items() if key not in ('name', 'scopeName')]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, dict):
+            for key, value in obj.items():
+                if key in SCOPE_KEYS and isinstance(value, str_types):
+                    for scope in value.split():
+                        if suffix and scope.endswith(suffix) and scope != suffix[1:]:
+                            scope = scope[:-len(suffix)]
+                        if SCOPE_RE.match(scope):
+                            counts[scope] = counts.get(scope, 0) + 1
+                else:
+                    stack.append(value)
+        elif isinstance(obj, list):
+            stack.extend(obj)
+    return counts
+
+
+def _scan(path, raw=None):
+    try:
+        if raw is None:
+            data = api.load(path, grammar_format(path))
+        else:
+            data = api.loads(raw, grammar_format(path), file_path=path)
+    except Exception:
+        # Not decodable or malformed in a way the parsers don't report;
+        # counted as a grammar without scopes
+        return {}
+    return extract_scopes(data)
+
+
+class ScopeCorpus(GrammarFiles):
+    """Counts the scope names of the grammars below a folder. See the
+    module's documentation and ``GrammarFiles`` for the arguments.
+    """
+    scan = staticmethod(_scan)
+    version = 1
+
+    def counts(self):
+        """Returns the number of uses of every scope name in all grammars.
+        """
+        with self._lock:
+            result = {}
+            for _, _, counts in self.files.values():
+                for scope, count in counts.items():
+                    result[scope] = result.get(scope, 0) + count
+            return result
@@ -0,0 +1,121 @@
+"""Line-based differences between two texts.
+
+Replacing a whole buffer with new text makes Sublime Text highlight
+everything again, adds the complete text to the undo history and moves
+markers and selections. ``line_hunks`` instead returns the regions of the
+old text that need to change, so only those can be replaced:
+
+    for begin, end, text in reversed(line_hunks(old, new)):
+        view.replace(edit, sublime.Region(begin, end), text)
+
+Applying the hunks back to front keeps the offsets of the remaining ones
+valid.
+
+The lines are matched with the "patience diff" algorithm: lines that occur
+exactly once in both texts are used as anchors (the longest sequence of
+them that is in the same order in both) and the gaps between them are
+matched the same way. This needs O(n log n) time, unlike ``difflib``,
+which is too slow for buffers with thousands of changed lines. Scope names
+and patterns make most lines of a syntax definition unique.
+"""
+import bisect
+
+
+__all__ = ['line_hunks']
+
+
+def _anchors(a, alo, ahi, b, blo, bhi):
+    """Returns the longest increasing sequence of ``(i, j)`` pairs where
+    ``a[i] == b[j]`` and the line occurs exactly once in ``a[alo:ahi]``
+    and ``b[blo:bhi]``.
+    """
+    counts = {}
+    for i in range(alo, ahi):
+        entry = counts.get(a[i])
+        counts[a[i]] = [i, None] if entry is None else [-1, None]
+    for j in range(blo, bhi):
+        entry = counts.get(b[j])
+        if entry is not None and entry[0] >= 0:
+            entry[1] = j if entry[1] is None else -1
+    pairs = sorted((i, j) for i, j in counts.values() if i >= 0 and j is not None and j >= 0)
+
+    # Patience sorting: ``tails[k]`` is the smallest j that ends an
+    # increasing sequence of length k + 1
+    tails, tail_index, previous = [], [], []
+    for index, (i, j) in enumerate(pairs):
+        k = bisect.bisect_left(tails, j)
+        if k == len(tails):
+            tails.append(j)
+            tail_index.append(index)
+        else:
+            tails[k] = j
+            tail_index[k] = index
+        previous.append(tail_index[k - 1] if k else -1)
+
+    result = []
+    index = tail_index[-1] if tail_index else -1
+    while index >= 0:
+        result.append(pairs[index])
+        index = previous[index]
+    result.reverse()
+    return result
+
+
+def _diff(a, b):
+    """Returns the ``(alo, ahi, blo, bhi)`` ranges of lines that differ,
+    sorted.
+    """
+    result = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        # Strip the common head and tail first, most edits are local
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            alo += 1
+            blo += 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+        if alo == ahi and blo == bhi:
+            continue
+        anchors = _anchors(a, alo, ahi, b, blo, bhi) if alo < ahi and blo < bhi else []
+        if not anchors:
+            result.append((alo, ahi, blo, bhi))
+            continue
+        # The gaps around and between the anchors, in reverse order
+        gaps = []
+        for i, j in anchors:
+            gaps.append((alo, i, blo, j))
+            alo, blo = i + 1, j + 1
+        gaps.append((alo, ahi, blo, bhi))
+        stack.extend(reversed(gaps))
+    return result
+
+
+def line_hunks(old, new):
+    """Returns the changes that turn ``old`` into ``new`` as a list of
+    ``(begin, end, text)`` tuples sorted by ``begin``: ``old[begin:end]``
+    is to be replaced with ``text``. Only whole lines are replaced.
+    """
+    a = old.splitlines(True)
+    b = new.splitlines(True)
+    ranges = _diff(a, b)
+    if not ranges:
+        return []
+
+    offsets = [0]
+    offset = 0
+    for line in a:
+        offset += len(line)
+        offsets.append(offset)
+
+    hunks = []
+    for alo, ahi, blo, bhi in ranges:
+        text = ''.join(b[blo:bhi])
+        if hunks and hunks[-1][1] == offsets[alo]:
+            # Adjacent to the previous hunk
+            begin, _, previous_text = hunks.pop()
+            hunks.append((begin, offsets[ahi], previous_text + text))
+        else:
+            hunks.append((offsets[alo], offsets[ahi], text))
+    return hunks
@@ -0,0 +1,125 @@
+"""Resource limits for loading YAML.
+
+PyYAML constructs every alias as a reference to the same object, so a
+"billion laughs" document like
+
+    a: &a [x, x, x, x, x, x, x, x, x, x]
+    b: &b [*a, *a, *a, *a, *a, *a, *a, *a, *a, *a]
+    c: &c [*b, *b, *b, *b, *b, *b, *b, *b, *b, *b]
+    ...
+
+loads quickly, but everything that walks the result (validation,
+conversion to JSON or plist) expands it to its full size.
+
+Loaders using ``LimitsMixin`` check the composed node graph of each document
+before constructing it. The check visits every node once and counts
+
+    * the nodes of the document with all aliases expanded (``max_nodes``),
+    * the aliases, i.e. references to nodes that were seen before
+      (``max_aliases``),
+    * the nesting depth, also with aliases expanded (``max_depth``).
+
+Exceeding a limit raises a ``ConstructorError`` that points to the
+offending node, like any other YAML error. The nesting depth is also
+enforced while composing, which would otherwise fail with a
+``RecursionError`` for deeply nested documents.
+"""
+import yaml
+from yaml.composer import ComposerError
+from yaml.constructor import ConstructorError
+
+
+__all__ = ['LimitsMixin', 'limited', 'SafeLoader']
+
+
+class LimitsMixin(object):
+    """Mix into a ``yaml.Loader`` class before the loader itself. The limits
+    are class attributes, ``None`` disables one.
+    """
+    max_nodes = 5 * 1000 * 1000
+    max_aliases = 100 * 1000
+    max_depth = 100
+
+    _compose_depth = 0
+
+    def compose_node(self, parent, index):
+        # No need to restore the depth on errors, the loader is done then
+        depth = self._compose_depth = self._compose_depth + 1
+        if self.max_depth is not None and depth > self.max_depth:
+            raise ComposerError(None, None,
+                                "found a node nested deeper than %d levels" % self.max_depth,
+                                self.peek_event().start_mark)
+        node = super(LimitsMixin, self).compose_node(parent, index)
+        self._compose_depth = depth - 1
+        return node
+
+    def construct_document(self, node):
+        self.check_limits(node)
+        return super(LimitsMixin, self).construct_document(node)
+
+    def check_limits(self, root):
+        max_nodes, max_aliases, max_depth = self.max_nodes, self.max_aliases, self.max_depth
+
+        def error(problem, node):
+            return ConstructorError(None, None, problem, node.start_mark)
+
+        # id(node) -> (size, height) with aliases expanded
+        done = {}
+        in_progress = set()
+        aliases = 0
+        # (node, depth, children or None if not yet expanded)
+        stack = [(root, 1, None)]
+        while stack:
+            node, depth, children = stack.pop()
+            key = id(node)
+            if children is None:
+                if key in done:
+                    aliases += 1
+                    if max_aliases is not None and aliases > max_aliases:
+                        raise error("found more than %d aliases" % max_aliases, node)
+                    if max_depth is not None and depth + done[key][1] - 1 > max_depth:
+                        raise error("found an alias nested deeper than %d levels when expanded"
+                                    % max_depth, node)
+                    continue
+                if key in in_progress:
+                    raise error("found a recursive alias", node)
+                if max_depth is not None and depth > max_depth:
+                    raise error("found a node nested deeper than %d levels when aliases "
+                                "are expanded" % max_depth, node)
+
+                if isinstance(node, yaml.MappingNode):
+                    children = [n for pair in node.value for n in pair]
+                elif isinstance(node, yaml.SequenceNode):
+                    children = node.value
+                else:
+                    done[key] = (1, 1)
+                    continue
+                in_progress.add(key)
+                stack.append((node, depth, children))
+                # In document order, so anchors are seen before their aliases
+                stack.extend((child, depth + 1, None) for child in reversed(children))
+            else:
+                in_progress.discard(key)
+                size, height = 1, 0
+                for child in children:
+                    child_size, child_height = done[id(child)]
+                    size += child_size
+                    height = max(height, child_height)
+                if max_nodes is not None and size > max_nodes:
+                    raise error("found more than %d nodes with all aliases expanded"
+                                % max_nodes, node)
+                done[key] = (size, height + 1)
+
+
+def limited(Loader, **limits):
+    """Returns a subclass of ``Loader`` that enforces ``limits``
+    (``max_nodes``, ``max_aliases`` and ``max_depth``, see ``LimitsMixin``).
+    """
+    for name in limits:
+        if not hasattr(LimitsMixin, name) or not name.startswith('max_'):
+            raise TypeError("unknown limit %r" % name)
+    bases = (Loader,) if issubclass(Loader, LimitsMixin) else (LimitsMixin, Loader)
+    return type("Limited" + Loader.__name__, bases, limits)
+
+
+SafeLoader = limited(yaml.SafeLoader)
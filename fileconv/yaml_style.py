@@ -0,0 +1,57 @@
+"""Scalar styles for dumping syntax definitions as YAML.
+
+``scalar_style`` decides how a string is written by
+``syntax_def_dev.YAMLLanguageDevDumper``:
+
+    * multi-line strings use the literal block style (``|``),
+    * multi-line ``(?x)`` patterns are dedented,
+    * strings that would need escapes or could not be plain otherwise are
+      single-quoted, because that has the simpler escape sequences.
+
+All of this is found with one scan of a precompiled regular expression.
+Grammars repeat the same scope names and patterns many times, so the
+results are kept in a bounded LRU cache.
+"""
+import re
+import textwrap
+from collections import OrderedDict
+
+
+__all__ = ['scalar_style']
+
+
+STYLE_RE = re.compile(u"(?P<quote>^[][{#\"'}@,]| #|: )"
+                      u"|(?P<block>[\n\r\x1c\x1d\x1e\x85\u2028\u2029])")
+
+# Number of strings to remember
+MAX_CACHE_SIZE = 16 * 1024
+
+_cache = OrderedDict()
+
+
+def _classify(value):
+    groups = set(m.lastgroup for m in STYLE_RE.finditer(value))
+    style = '|' if 'block' in groups else None
+
+    # Do some special replacements of leading tabs or spaces in (?x) patterns
+    if value.startswith("(?x)") and ('\n' in value or '\r' in value):
+        value = value.strip()
+        lines = value.splitlines()
+        value = lines[0] + '\n' + textwrap.dedent('\n'.join(lines[1:]))
+    elif 'quote' in groups:
+        style = "'"
+
+    return value, style
+
+
+def scalar_style(value):
+    """Returns the string to write for ``value`` and its style (``None``
+    for the dumper's choice).
+    """
+    entry = _cache.pop(value, None)
+    if entry is None:
+        entry = _classify(value)
+        if len(_cache) >= MAX_CACHE_SIZE:
+            _cache.popitem(last=False)
+    _cache[value] = entry
+    return entry
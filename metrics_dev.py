@@ -0,0 +1,53 @@
+import sys
+
+import sublime
+import sublime_plugin
+
+if sys.version_info < (3,):
+    from sublime_lib.view import OutputPanel
+    from fileconv.metrics import metrics
+else:
+    from .sublime_lib.view import OutputPanel
+    from .fileconv.metrics import metrics
+
+
+SETTINGS_NAME = "PackageDev.sublime-settings"
+
+
+def update_enabled():
+    settings = sublime.load_settings(SETTINGS_NAME)
+    metrics.enabled = bool(settings.get('record_metrics', False))
+
+
+def plugin_loaded():
+    settings = sublime.load_settings(SETTINGS_NAME)
+    settings.clear_on_change('record_metrics')
+    settings.add_on_change('record_metrics', update_enabled)
+    update_enabled()
+
+
+if sys.version_info < (3,):
+    # ST2 does not call plugin_loaded but its API is available on import
+    plugin_loaded()
+
+
+class PackageDevShowMetricsCommand(sublime_plugin.WindowCommand):
+    """Shows the latency percentiles and the slowest samples of the
+    instrumented listeners and commands (see `fileconv.metrics`) in an
+    output panel. Nothing is recorded unless the `record_metrics` setting
+    is true.
+    """
+
+    def run(self, reset=False):
+        lines = metrics.report()
+        with OutputPanel(self.window, "package_dev_metrics") as output:
+            output.show()
+            if not metrics.enabled:
+                output.write_line('Recording is disabled, set "record_metrics": true in %s.'
+                                  % SETTINGS_NAME)
+            for line in lines:
+                output.write_line(line)
+            if not lines:
+                output.write_line("Nothing recorded yet.")
+        if reset:
+            metrics.reset()
@@ -1,10 +1,12 @@
 # https://manual.macromates.com/en/language_grammars#naming_conventions
+import heapq
 import sys
 
 if sys.version_info[0] > 2:
     basestring = str
 
-__all__ = ["COMPILED_NODES", "COMPILED_HEADS"]
+__all__ = ["COMPILED_NODES", "COMPILED_HEADS", "TrieNode", "ScopeTrie", "get_trie",
+           "set_corpus"]
 
 DATA = """
     comment
@@ -210,3 +212,177 @@ for line in lines:
         COMPILED_HEADS.append(node)
 
     COMPILED_NODES.append(node)
+
+
+#######################################
+
+class TrieNode(object):
+    """
+    A node of a `ScopeTrie`.
+
+    Attributes:
+        * name
+        * scope: the full dotted scope name (empty for the root)
+        * children: dict of name -> TrieNode
+        * completions: list of completions for the children, in order
+        * scopes: tuple of the scope names in this subtree, in order
+        * rank: position in the naming conventions, None for other scopes
+        * count: number of uses of the scope and its descendants in a corpus
+        * chars: frozenset of the characters that the descendants' scope
+          names add to this one
+    """
+    __slots__ = ('name', 'scope', 'children', 'completions', 'scopes', 'rank', 'count',
+                 'chars')
+
+    def __init__(self, name, scope, rank=None):
+        self.name = name
+        self.scope = scope
+        self.children = {}
+        self.completions = []
+        self.scopes = ()
+        self.rank = rank
+        self.count = 0
+        self.chars = frozenset()
+
+    def sort_key(self):
+        # Naming conventions first in the order of DATA, then by frequency
+        return (self.rank is None, self.rank, -self.count, self.name)
+
+
+class ScopeTrie(object):
+    """
+    The naming conventions as a dict-based trie, optionally with the scope
+    names of a corpus (dict of scope name -> number of uses, see
+    `fileconv.scope_corpus`). Completions are computed when it is built.
+
+    Methods:
+        * find(scope)
+        * complete(prefix)
+        * fuzzy(query, limit)
+    """
+    __slots__ = ('root', '_order')
+
+    def __init__(self, heads, counts=None):
+        self.root = TrieNode("", "", -1)
+        self._add_nodes(self.root, heads, [0])
+        for scope, count in (counts or {}).items():
+            self._add_scope(scope, count)
+        self._finish(self.root)
+        self._order = dict((scope, i) for i, scope in enumerate(self.root.scopes))
+
+    def _add_nodes(self, node, children, rank):
+        for child in children:
+            scope = node.scope + '.' + child.name if node.scope else child.name
+            trie_node = node.children[child.name] = TrieNode(child.name, scope, rank[0])
+            rank[0] += 1
+            self._add_nodes(trie_node, child.children, rank)
+
+    def _add_scope(self, scope, count):
+        node = self.root
+        for token in scope.split('.'):
+            child = node.children.get(token)
+            if child is None:
+                scope = node.scope + '.' + token if node.scope else token
+                child = node.children[token] = TrieNode(token, scope)
+            child.count += count
+            node = child
+
+    def _finish(self, node):
+        scopes = []
+        chars = set('.' if node.scope and node.children else '')
+        for child in sorted(node.children.values(), key=TrieNode.sort_key):
+            if child.rank is None:
+                node.completions.append(("%s\t%d uses" % (child.name, child.count), child.name))
+            else:
+                node.completions.append((child.name, child.name))
+            self._finish(child)
+            scopes.append(child.scope)
+            scopes.extend(child.scopes)
+            chars.update(child.name)
+            chars.update(child.chars)
+        node.scopes = tuple(scopes)
+        node.chars = frozenset(chars)
+
+    def find(self, scope):
+        """Returns the node of a dotted scope name or None."""
+        node = self.root
+        for token in scope.split('.'):
+            node = node.children.get(token)
+            if node is None:
+                return None
+        return node
+
+    def complete(self, prefix):
+        """Returns the scope names starting with a dotted prefix, e.g.
+        "punctuation.definition.s" -> ["punctuation.definition.string", ...].
+        """
+        head, _, last = prefix.rpartition('.')
+        node = self.find(head) if head else self.root
+        if node is None:
+            return []
+        result = []
+        for child in node.children.values():
+            if child.name.startswith(last):
+                result.append(child.scope)
+                result.extend(child.scopes)
+        result.sort(key=self._order.get)
+        return result
+
+    def fuzzy(self, query, limit=None, max_gaps=None):
+        """Returns the scope names that contain the characters of `query` in
+        order, best matches (fewest skipped characters, then shortest) first,
+        skipping at most `max_gaps` characters if given.
+
+        The trie is walked best first with the part of `query` matched so
+        far, so the walk ends after `limit` matches. Subtrees that lack one
+        of the remaining characters or skip too many are not entered.
+        """
+        rest = [frozenset(query[i:]) for i in range(len(query) + 1)]
+        result = []
+        # (skipped characters or a lower bound, length, order, scope, node,
+        #  matched characters, whether all of query is matched)
+        heap = [(0, 0, -1, "", self.root, 0, not query)]
+        while heap and (limit is None or len(result) < limit):
+            gaps, _, _, scope, node, pos, done = heapq.heappop(heap)
+            if done and node is not self.root:
+                result.append(scope)
+            for child in node.children.values():
+                i, child_done = pos, done
+                if not done:
+                    for end in range(len(node.scope), len(child.scope)):
+                        if child.scope[end] == query[i]:
+                            i += 1
+                            if i == len(query):
+                                child_done = True
+                                break
+                    # Descendants skip at least the characters skipped so far
+                    gaps = end + 1 - i if child_done else len(child.scope) - i
+                    if not child_done and not rest[i] <= child.chars:
+                        continue
+                if max_gaps is not None and gaps > max_gaps:
+                    continue
+                heapq.heappush(heap, (gaps, len(child.scope), self._order[child.scope],
+                                      child.scope, child, i, child_done))
+        return result
+
+
+_trie = None
+_corpus = None
+
+
+def get_trie():
+    """Returns the `ScopeTrie` of the naming conventions and the corpus set
+    with `set_corpus`, built on first use."""
+    global _trie
+    if _trie is None:
+        _trie = ScopeTrie(COMPILED_HEADS, _corpus)
+    return _trie
+
+
+def set_corpus(counts):
+    """Merges the scope names of a corpus (dict of scope name -> number of
+    uses) into the trie returned by `get_trie`. Builds the new trie right
+    away, so it can be called from a background thread."""
+    global _trie, _corpus
+    trie = ScopeTrie(COMPILED_HEADS, counts)
+    _corpus, _trie = counts, trie
@@ -0,0 +1,195 @@
+"""Scope selector matching without the Sublime Text API.
+
+Every ``view.match_selector(pt, selector)`` call crosses into Sublime Text.
+``ViewScopes`` fetches the scope name of a point once with
+``view.scope_name(pt)`` and matches any number of selectors against it in
+Python:
+
+    scopes = ViewScopes(view)
+    scopes.match(loc, "source.yaml-tmlanguage - comment")
+    scopes.match(loc - 1, "meta.name meta.value string")
+
+Supported are descendant paths (``meta.name string``), unions (``,`` and
+``|``), intersections (``&``), exclusions (``a - b`` and ``-a``) and
+groups (``(a, b) - c``). ``|``, ``&`` and ``-`` bind stronger than ``,``
+and are evaluated from left to right. A scope in a path matches a scope of
+the scope name if it is equal to it or one of its dot-separated prefixes,
+like ``string`` for ``string.quoted``.
+
+Compiled selectors are cached. Since only strings are involved, code that
+uses ``ViewScopes`` can be tested with recorded scope names instead of a
+view, see ``RecordedScopes``.
+"""
+import re
+
+
+__all__ = ['compile_selector', 'match_selector', 'ViewScopes', 'RecordedScopes']
+
+
+TOKEN_RE = re.compile(r'\s*(?:([\w.*+:][\w.\-*+:]*)|([(),|&-]))')
+
+# Number of compiled selectors to keep
+MAX_CACHED = 256
+
+_compiled = {}
+
+
+class _Parser(object):
+
+    def __init__(self, selector):
+        self.selector = selector
+        self.tokens = []
+        pos = 0
+        for m in TOKEN_RE.finditer(selector):
+            if m.start() != pos:
+                break
+            self.tokens.append(('scope', m.group(1)) if m.group(1) else ('op', m.group(2)))
+            pos = m.end()
+        if selector[pos:].strip():
+            self.error("unexpected %r" % selector[pos:].strip()[0])
+        self.tokens.append(('end', None))
+        self.index = 0
+
+    def error(self, problem):
+        raise ValueError("Invalid selector %r: %s" % (self.selector, problem))
+
+    def peek(self):
+        return self.tokens[self.index]
+
+    def next(self):
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def parse(self):
+        func = self.union()
+        if self.peek()[0] != 'end':
+            self.error("unexpected %r" % self.peek()[1])
+        return func
+
+    def union(self):
+        funcs = [self.composite()]
+        while self.peek() == ('op', ','):
+            self.next()
+            funcs.append(self.composite())
+        if len(funcs) == 1:
+            return funcs[0]
+        return lambda scopes: any(func(scopes) for func in funcs)
+
+    def composite(self):
+        func = self.expression()
+        while self.peek()[0] == 'op' and self.peek()[1] in '|&-':
+            op = self.next()[1]
+            func = self._combine(op, func, self.expression())
+        return func
+
+    @staticmethod
+    def _combine(op, left, right):
+        if op == '|':
+            return lambda scopes: left(scopes) or right(scopes)
+        elif op == '&':
+            return lambda scopes: left(scopes) and right(scopes)
+        return lambda scopes: left(scopes) and not right(scopes)
+
+    def expression(self):
+        if self.peek() == ('op', '-'):
+            self.next()
+            func = self.group()
+            return lambda scopes: not func(scopes)
+        return self.group()
+
+    def group(self):
+        kind, value = self.peek()
+        if (kind, value) == ('op', '('):
+            self.next()
+            func = self.union()
+            if self.next() != ('op', ')'):
+                self.error("missing ')'")
+            return func
+        path = []
+        while self.peek()[0] == 'scope':
+            path.append(self.next()[1])
+        if not path:
+            self.error("expected a scope, found %r" % (value or "end"))
+        return _path_matcher(path)
+
+
+def _path_matcher(path):
+    # (scope, scope + '.') for prefix matches
+    elements = [(scope, scope + '.') for scope in path]
+
+    def match(scopes):
+        i, n = 0, len(scopes)
+        for scope, prefix in elements:
+            while i < n and scopes[i] != scope and not scopes[i].startswith(prefix):
+                i += 1
+            if i == n:
+                return False
+            i += 1
+        return True
+    return match
+
+
+def compile_selector(selector):
+    """Returns a function that takes a list of scopes (a split scope name)
+    and returns whether ``selector`` matches them. Raises ``ValueError`` for
+    invalid selectors.
+    """
+    func = _compiled.get(selector)
+    if func is None:
+        func = _Parser(selector).parse()
+        if len(_compiled) >= MAX_CACHED:
+            _compiled.clear()
+        _compiled[selector] = func
+    return func
+
+
+def match_selector(scope_name, selector):
+    """Returns whether ``selector`` matches ``scope_name``, a space-separated
+    string of scopes like ``view.scope_name(pt)`` returns.
+    """
+    return compile_selector(selector)(scope_name.split())
+
+
+class ViewScopes(object):
+    """The scope names of a view's points, fetched once per point. Create a
+    new instance after the view was modified.
+    """
+
+    def __init__(self, view):
+        self.view = view
+        # point -> list of scopes
+        self._scopes = {}
+
+    def scopes(self, pt):
+        scopes = self._scopes.get(pt)
+        if scopes is None:
+            scopes = self._scopes[pt] = self.scope_name(pt).split()
+        return scopes
+
+    def scope_name(self, pt):
+        return self.view.scope_name(pt)
+
+    def match(self, pt, selector):
+        """Like ``view.match_selector(pt, selector)``.
+        """
+        return compile_selector(selector)(self.scopes(pt))
+
+    def base_scope(self):
+        """The scope of the syntax, the first scope of the first point.
+        """
+        scopes = self.scopes(0)
+        return scopes[0] if scopes else ''
+
+
+class RecordedScopes(ViewScopes):
+    """``ViewScopes`` for recorded scope names (a dict of point -> scope
+    name), e.g. for tests.
+    """
+
+    def __init__(self, scope_names):
+        super(RecordedScopes, self).__init__(None)
+        self.scope_names = scope_names
+
+    def scope_name(self, pt):
+        return self.scope_names.get(pt, '')
@@ -16,6 +16,7 @@ __all__ = [
     "root_at_packages",
     "data_path",
     "root_at_data",
+    "root_at_cache",
     "file_path_tuple",
     "get_module_path",
     "get_package_name"
@@ -52,6 +53,17 @@ def root_at_data(*leafs):
     return os.path.join(data, *leafs)
 
 
+def root_at_cache(*leafs):
+    """Combines leafs with Sublime's ``Cache`` folder.
+
+    Uses ``sublime.cache_path()`` where available (ST3) and the ``Cache``
+    folder in the ``Data`` folder otherwise.
+    """
+    if hasattr(sublime, 'cache_path'):
+        return os.path.join(sublime.cache_path(), *leafs)
+    return root_at_data('Cache', *leafs)
+
+
 FilePath = namedtuple("FilePath", "file_path path file_name base_name ext no_ext")
 
 
@@ -1,6 +1,8 @@
+import bisect
 from contextlib import contextmanager
 
 from sublime import Region, View
+from sublime_plugin import EventListener
 
 from .. import Settings
 from ..edit import Edit
@@ -9,6 +11,7 @@ __all__ = ['ViewSettings', 'unset_read_only', 'append', 'clear', 'has_sels',
            'has_file_ext', 'base_scope', 'rowcount', 'rowwidth',
            'relative_point', 'coorded_region', 'coorded_substr', 'get_text',
            'get_viewport_point', 'get_viewport_coords', 'set_viewport',
+           'SelectorCache', 'SelectorCacheListener', 'selector_cache', 'find_by_selector',
            'extract_selector']
 
 
@@ -239,6 +242,99 @@ def set_viewport(view, row, col=None):
     view.set_viewport_position(view.text_to_layout(pos))
 
 
+class SelectorCache(object):
+    """Caches the results of ``view.find_by_selector`` for each view until
+    the view's text (``view.change_count()``) or syntax changes, together
+    with the regions' begin and end points for binary searches.
+
+    Defines the following methods:
+
+        find(view, selector)
+        containing(view, selector, point)
+        evict(view_id)
+        clear()
+
+    ``hits`` and ``misses`` count the lookups. A syntax definition that is
+    reloaded without changing the view's text or syntax setting can not be
+    detected; ``SelectorCacheListener`` evicts the views of the shared
+    ``selector_cache`` when they are activated or closed.
+    """
+
+    def __init__(self):
+        # view id -> ((change count, syntax), {selector: (regions, begins, ends)})
+        self._views = {}
+        self.hits = self.misses = 0
+
+    def _entry(self, view, selector):
+        key = (view.change_count(), view.settings().get('syntax'))
+        cached = self._views.get(view.id())
+        if cached is None or cached[0] != key:
+            cached = self._views[view.id()] = (key, {})
+        entry = cached[1].get(selector)
+        if entry is None:
+            self.misses += 1
+            regions = view.find_by_selector(selector)
+            entry = cached[1][selector] = (regions,
+                                           [r.begin() for r in regions],
+                                           [r.end() for r in regions])
+        else:
+            self.hits += 1
+        return entry
+
+    def find(self, view, selector):
+        """Returns ``view.find_by_selector(selector)``. Don't modify the
+        list.
+        """
+        return self._entry(view, selector)[0]
+
+    def containing(self, view, selector, point):
+        """Returns the first region matching ``selector`` that contains
+        ``point`` or ``None``.
+        """
+        regions, begins, ends = self._entry(view, selector)
+        # Regions are sorted and don't overlap, so the first one ending at
+        # or after point is the only candidate
+        i = bisect.bisect_left(ends, point)
+        if i < len(regions) and begins[i] <= point:
+            return regions[i]
+        return None
+
+    def evict(self, view_id):
+        self._views.pop(view_id, None)
+
+    def clear(self):
+        self._views.clear()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / float(lookups) if lookups else 0.0
+
+
+# Shared by all helpers of this module
+selector_cache = SelectorCache()
+
+
+class SelectorCacheListener(EventListener):
+    """Evicts views from ``selector_cache`` when they are closed, and when
+    they are activated, e.g. after the syntax definition was edited in
+    another view and reloaded. Import it into a plugin module to register
+    it.
+    """
+
+    def on_activated(self, view):
+        selector_cache.evict(view.id())
+
+    def on_close(self, view):
+        selector_cache.evict(view.id())
+
+
+def find_by_selector(view, selector):
+    """Cached ``view.find_by_selector(selector)``, see ``SelectorCache``.
+    """
+    return selector_cache.find(view, selector)
+
+
 def extract_selector(view, selector, point):
     """Works similar to view.extract_scope except that you may define the
     selector (scope) on your own and it does not use the point's scope by
@@ -250,8 +346,4 @@ def extract_selector(view, selector, point):
     Returns the Region for the out-most "source string" which contains the
     beginning of the first selection.
     """
-    regs = view.find_by_selector(selector)
-    for reg in regs:
-        if reg.contains(point):
-            return reg
-    return None
+    return selector_cache.containing(view, selector, point)
@@ -1,11 +1,10 @@
 import uuid
+import os
 import re
 import sys
-import textwrap
+import threading
 import time
 
-import yaml
-
 import sublime
 import sublime_plugin
 
@@ -13,22 +12,38 @@ if sys.version_info < (3,):
     from ordereddict import OrderedDict
 
     from sublime_lib.path import root_at_packages, get_package_name
-    from sublime_lib.view import (OutputPanel, base_scope, get_viewport_coords, set_viewport,
-                                  extract_selector)
-
-    from fileconv import dumpers, loaders
-    from scope_data import COMPILED_HEADS
+    from sublime_lib.view import (OutputPanel, base_scope, get_text, get_viewport_coords,
+                                  set_viewport, extract_selector, find_by_selector)
+    # Registers the listener
+    from sublime_lib.view import SelectorCacheListener  # NOQA
+
+    from fileconv import api, dumpers, loaders, textdiff
+    from fileconv.emit_cache import EmitCache
+    from fileconv.grammar_model import GrammarModel, DEFINITION, INCLUDE
+    from fileconv.key_index import KeyIndex
+    from fileconv.metrics import timed, timer
+    from fileconv.yaml_style import scalar_style
+    from scope_data import get_trie, set_corpus
+    from scope_data.selector import ViewScopes
     from ordereddict_yaml import OrderedDictSafeDumper
 
 else:
     from collections import OrderedDict
 
     from .sublime_lib.path import root_at_packages, get_package_name
-    from .sublime_lib.view import (OutputPanel, base_scope, get_viewport_coords, set_viewport,
-                                   extract_selector)
-
-    from .fileconv import dumpers, loaders
-    from .scope_data import COMPILED_HEADS
+    from .sublime_lib.view import (OutputPanel, base_scope, get_text, get_viewport_coords,
+                                   set_viewport, extract_selector, find_by_selector)
+    # Registers the listener
+    from .sublime_lib.view import SelectorCacheListener  # NOQA
+
+    from .fileconv import api, dumpers, loaders, textdiff
+    from .fileconv.emit_cache import EmitCache
+    from .fileconv.grammar_model import GrammarModel, DEFINITION, INCLUDE
+    from .fileconv.key_index import KeyIndex
+    from .fileconv.metrics import timed, timer
+    from .fileconv.yaml_style import scalar_style
+    from .scope_data import get_trie, set_corpus
+    from .scope_data.selector import ViewScopes
     from .ordereddict_yaml import OrderedDictSafeDumper
 
 
@@ -112,7 +127,7 @@ class NewSyntaxDefCommand(sublime_plugin.WindowCommand):
         else:
             view.set_syntax_file(SYNTAX_LANGUAGE_TMPL % fmt.upper())
 
-        view.run_command('insert_snippet', {'contents': boilerplates[fmt] % uuid.uuid4()})
+        view.run_command('insert_snippet', {'contents': boilerplates[fmt] % uuid_pool.get()})
 
 
 ###############################################################################
@@ -121,21 +136,10 @@ class NewSyntaxDefCommand(sublime_plugin.WindowCommand):
 class YAMLLanguageDevDumper(OrderedDictSafeDumper):
     def represent_scalar(self, tag, value, style=None):
         if tag == u'tag:yaml.org,2002:str':
-            # Block style for multiline strings
-            if any(c in value for c in u"\u000a\u000d\u001c\u001d\u001e\u0085\u2028\u2029"):
-                style = '|'
-
-            # Do some special replacements of leading tabs or spaces in (?x) patterns
-            if value.startswith("(?x)") and ('\n' in value or '\r' in value):
-                value = value.strip()
-                lines = value.splitlines()
-                value = lines[0] + '\n' + textwrap.dedent('\n'.join(lines[1:]))
-
-            # Use ' to denote string if it contains illegal plain sequences
-            # since it has easier escape sequences
-            elif (value[0] in "[]{#\"'}@,"
-                  or any(s in value for s in (' #', ': '))):
-                style = "'"
+            # Block style for multiline strings, ' for strings with illegal plain
+            # sequences (see `fileconv.yaml_style`)
+            value, new_style = scalar_style(value)
+            style = new_style or style
 
         return super(YAMLLanguageDevDumper, self).represent_scalar(tag, value, style)
 
@@ -153,44 +157,17 @@ class YAMLLanguageDevDumper(OrderedDictSafeDumper):
 class YAMLOrderedTextDumper(dumpers.YAMLDumper):
     default_params = dict(Dumper=OrderedDictSafeDumper)
 
-    def __init__(self, window=None, output=None):
+    def __init__(self, window=None, output=None, emit_cache=None):
         if isinstance(output, OutputPanel):
             self.output = output
         elif window:
             self.output = OutputPanel(window, self.output_panel_name)
+        self.emit_cache = emit_cache
 
     def sort_keys(self, data, sort_order, sort_numeric):
-        def do_sort(obj):
-            od = OrderedDict()
-            # The usual order
-            if sort_order:
-                for key in sort_order:
-                    if key in obj:
-                        od[key] = obj[key]
-                        del obj[key]
-            # The number order
-            if sort_numeric:
-                nums = []
-                for key in obj:
-                    if key.isdigit():
-                        nums.append(int(key))
-                nums.sort()
-                for num in nums:
-                    key = str(num)
-                    od[key] = obj[key]
-                    del obj[key]
-            # The remaining stuff (in alphabetical order)
-            keys = sorted(obj.keys())
-            for key in keys:
-                od[key] = obj[key]
-                del obj[key]
-
-            assert len(obj) == 0
-            return od
-
-        return self._validate_data(data, (
-            (lambda x: isinstance(x, dict), do_sort),
-        ))
+        # The usual order, then the number order, then the remaining stuff
+        # (in alphabetical order). See `api.key_ranks`.
+        return api.sort_keys(data, sort_order, sort_numeric, OrderedDict)
 
     def dump(self, data, sort=True, sort_order=None, sort_numeric=True, *args, **kwargs):
         self.output.write_line("Sorting %s..." % self.name)
@@ -200,21 +177,75 @@ class YAMLOrderedTextDumper(dumpers.YAMLDumper):
         params = self.validate_params(kwargs)
 
         self.output.write_line("Dumping %s..." % self.name)
-        return yaml.dump(data, **params)
+        if self.emit_cache is None:
+            return api.write_yaml(data, None, params)
+
+        text = self.emit_cache.dump(data, params, OrderedDict)
+        if self.emit_cache.reused:
+            self.output.write_line("Re-used %d unchanged parts, dumped %d"
+                                   % (self.emit_cache.reused, self.emit_cache.emitted))
+        return text
+
+
+# view id -> EmitCache of the last rearrangement
+emit_caches = {}
+
+# A key at the top level and a key of the top-level "repository" dict
+# (like the "meta.repository-key" scope of the syntax definition)
+TOP_LEVEL_KEY_RE = re.compile(r'''(["']?)([-\w]+)\1:''')
+REPOSITORY_KEY_RE = re.compile(r'''  (["']?)[-\w]+\1:''')
+
+
+def insert_blank_lines(text):
+    """Inserts blank lines into a dumped syntax definition to make it
+    appear better organized: before the global "patterns" and "repository"
+    keys, between the items of the global "patterns" list and between the
+    repository's keys.
+    """
+    result = []
+    # The top-level key whose value is on the current line, if interesting
+    block = None
+    first = False
+    for line in text.splitlines(True):
+        if line[:1] not in ' -#\r\n':
+            # A new top-level key
+            match = TOP_LEVEL_KEY_RE.match(line)
+            block = match and match.group(2)
+            if block in ('patterns', 'repository'):
+                result.append('\n')
+                first = True
+        elif ((block == 'patterns' and line.startswith('- '))
+              or (block == 'repository' and REPOSITORY_KEY_RE.match(line))):
+            if not first:
+                result.append('\n')
+            first = False
+        result.append(line)
+    return ''.join(result)
 
 
 class RearrangeYamlSyntaxDefCommand(sublime_plugin.TextCommand):
     """Parses YAML and sorts all the dict keys reasonably.
     Does not write to the file, only to the buffer.
+
+    The text of unchanged repository entries and other top-level items is
+    re-used from the previous run in the same view (see
+    ``fileconv.emit_cache``).
     """
     default_order = """comment
         name scopeName contentName fileTypes uuid
         begin beginCaptures end endCaptures match captures include
         patterns repository""".split()
 
+    def get_scopes(self):
+        """Returns the ``ViewScopes`` of the view (see
+        ``SyntaxDefCompletions.get_scopes``).
+        """
+        return ViewScopes(self.view)
+
     def is_enabled(self):
-        return base_scope(self.view) in ('source.yaml', 'source.yaml-tmlanguage')
+        return self.get_scopes().base_scope() in ('source.yaml', 'source.yaml-tmlanguage')
 
+    @timed('RearrangeYamlSyntaxDefCommand.run')
     def run(self, edit,
             sort=True, sort_numeric=True, sort_order=None, remove_single_line_maps=True,
             insert_newlines=True, save=False,
@@ -259,8 +290,12 @@ class RearrangeYamlSyntaxDefCommand(sublime_plugin.TextCommand):
                 Essentially add a new line:
                 - before global "patterns" key
                 - before global "repository" key
+                - before every item of the global "patterns" list except for the first
                 - before every repository key except for the first
 
+                This is done on the dumped text, the syntax highlighting is
+                not used.
+
             save (bool) = False
                 Save the view after processing is done.
 
@@ -319,7 +354,8 @@ class RearrangeYamlSyntaxDefCommand(sublime_plugin.TextCommand):
                 return
 
             # Dump
-            dumper = YAMLOrderedTextDumper(output=output)
+            emit_cache = emit_caches.setdefault(self.view.id(), EmitCache())
+            dumper = YAMLOrderedTextDumper(output=output, emit_cache=emit_cache)
             if remove_single_line_maps:
                 kwargs["Dumper"] = YAMLLanguageDevDumper
 
@@ -335,48 +371,20 @@ class RearrangeYamlSyntaxDefCommand(sublime_plugin.TextCommand):
                 status("Error re-dumping the data (no output).", True)
                 return
 
-            # Replace the whole buffer (with default options)
-            self.view.replace(
-                edit,
-                sublime.Region(0, self.view.size()),
+            if insert_newlines:
+                output.write_line("Inserting newlines...")
+                text = insert_blank_lines(text)
+
+            # Replace the buffer (with default options), but only the lines that changed
+            hunks = textdiff.line_hunks(
+                get_text(self.view),
                 "# [PackageDev] target_format: plist, ext: tmLanguage\n"
                 + text
             )
-
-            # Insert the new lines using the syntax definition (which has hopefully been set)
-            if insert_newlines:
-                output.write_line("Inserting newlines...")
-                find = self.view.find_by_selector
-
-                def select(l, only_first=True, not_first=True):
-                    # 'only_first' has priority
-                    if not l:
-                        return l  # empty
-                    elif only_first:
-                        return l[:1]
-                    elif not_first:
-                        return l[1:]
-                    return l
-
-                def filter_pattern_regs(reg):
-                    # Only use those keys where the region starts at column 0 and begins with '-'
-                    # because these are apparently the first keys of a 1-scope list
-                    beg = reg.begin()
-                    return self.view.rowcol(beg)[1] == 0 and self.view.substr(beg) == '-'
-
-                regs = (
-                    select(find('meta.patterns - meta.repository-block'))
-                    + select(find('meta.repository-block'))
-                    + select(find('meta.repository-block meta.repository-key'), False)
-                    + select(list(filter(filter_pattern_regs, find('meta'))), False)
-                )
-
-                # Iterate in reverse order to not clash the regions
-                # because we will be modifying the source
-                regs.sort()
-                regs.reverse()
-                for reg in regs:
-                    self.view.insert(edit, reg.begin(), '\n')
+            # Back to front, so that the regions of the other hunks stay valid
+            for begin, end, new_text in reversed(hunks):
+                self.view.replace(edit, sublime.Region(begin, end), new_text)
+            output.write_line("Replaced %d region(s)" % len(hunks))
 
             if save:
                 output.write_line("Saving...")
@@ -388,34 +396,393 @@ class RearrangeYamlSyntaxDefCommand(sublime_plugin.TextCommand):
             output.write("[Finished in %.3fs]" % (time.time() - self.start_time))
 
 
+class RearrangeYamlSyntaxDefListener(sublime_plugin.EventListener):
+    def on_close(self, view):
+        emit_caches.pop(view.id(), None)
+
+
 ###############################################################################
 
 
+# Seconds between two scans of the installed grammars
+GRAMMAR_SCAN_INTERVAL = 5 * 60
+
+scope_corpus_state = dict(thread=None, time=0, merged=False)
+grammar_index_state = dict(thread=None, time=0)
+
+
+def scan_in_background(state, func):
+    """Runs `func` in a background thread, unless it is still running or
+    was started less than `GRAMMAR_SCAN_INTERVAL` seconds ago.
+    """
+    if ((state['thread'] and state['thread'].is_alive())
+            or time.time() - state['time'] < GRAMMAR_SCAN_INTERVAL):
+        return
+    state['time'] = time.time()
+    state['thread'] = threading.Thread(target=func)
+    state['thread'].daemon = True
+    state['thread'].start()
+
+
+def grammar_roots():
+    """Returns the folders with the installed grammars: the packages folder,
+    the installed packages and the packages shipped with Sublime Text.
+    """
+    return [root_at_packages(), sublime.installed_packages_path(),
+            os.path.join(os.path.dirname(sublime.executable_path()), "Packages")]
+
+
+def refresh_scope_corpus():
+    """Scans the grammars in the packages folder for scope names that are
+    new since the last scan in a background thread and merges them into
+    the naming conventions (see `fileconv.scope_corpus`).
+    """
+    corpus = loaders.get_scope_corpus()
+    if corpus is None:
+        return
+    state = scope_corpus_state
+
+    def run():
+        changed = sum(corpus.update(root) for root in grammar_roots())
+        if changed or not state['merged']:
+            set_corpus(corpus.counts())
+            state['merged'] = True
+
+    scan_in_background(state, run)
+
+
+def refresh_grammar_index():
+    """Updates the index of the installed grammars' repository keys in a
+    background thread (see `fileconv.grammar_index`) and returns it. It may
+    not be up to date yet. Returns `None` on ST2.
+    """
+    index = loaders.get_grammar_index()
+    if index is not None:
+        def run():
+            for root in grammar_roots():
+                index.update(root)
+
+        scan_in_background(grammar_index_state, run)
+    return index
+
+
+def show_position(view, row, col):
+    """Selects and shows the 1-based `row` and `col` in `view`, once it is
+    loaded.
+    """
+    if view.is_loading():
+        sublime.set_timeout(lambda: show_position(view, row, col), 50)
+        return
+    pt = view.text_point(row - 1, col - 1)
+    view.sel().clear()
+    view.sel().add(sublime.Region(pt))
+    view.show_at_center(pt)
+
+
+def open_grammar(window, path, row, col):
+    """Opens the grammar at `path`, which may be in a `.sublime-package`
+    archive (read-only then), at the 1-based `row` and `col`. ST3 only.
+    """
+    from .fileconv.grammar_index import archive_member
+    member = archive_member(path)
+    if not member:
+        window.open_file("%s:%d:%d" % (path, row, col), sublime.ENCODED_POSITION)
+        return
+    archive, name = member
+    package = os.path.splitext(os.path.basename(archive))[0]
+    window.run_command('open_file', {'file': "${packages}/%s/%s" % (package, name)})
+    show_position(window.active_view(), row, col)
+
+
+# An include of another grammar's repository key, up to the key's beginning
+OTHER_INCLUDE_RE = re.compile(r'''(["']?)include\1:\s+["']?([-\w.+]+)#[-\w]*$''')
+# An include's value
+INCLUDE_VALUE_RE = re.compile(r'''(["']?)include\1:\s+(["']?)([^"'\s,}]+)\2''')
+
+
+class GotoSyntaxDefIncludeCommand(sublime_plugin.TextCommand):
+    """Shows the definition of the repository key the include at the cursor
+    refers to: "#key" in the current view, "source.x#key" and "source.x" in
+    the installed grammar with this scope name.
+    """
+
+    def is_enabled(self):
+        return base_scope(self.view) == 'source.yaml-tmlanguage'
+
+    def run(self, edit):
+        view = self.view
+        if not view.sel():
+            return
+        pt = view.sel()[0].begin()
+        model = get_grammar_model(view)
+        item = model.at(pt)
+        if item and item[2] == INCLUDE:
+            target = item[3]
+        else:
+            # The include's entry may not be valid YAML yet
+            line = view.line(pt)
+            for m in INCLUDE_VALUE_RE.finditer(view.substr(line)):
+                if m.start() <= pt - line.begin() <= m.end():
+                    target = m.group(3)
+                    break
+            else:
+                status("No include found at the cursor")
+                return
+
+        key = model.target(target)
+        if key:
+            # Fall back to the keys' text if their entry is not valid YAML
+            region = model.definition(key) or get_key_index(view).find(key)
+            if not region:
+                status("Repository key `%s` not found" % key)
+                return
+            view.sel().clear()
+            view.sel().add(sublime.Region(*region))
+            view.show_at_center(region[0])
+            return
+        if target.startswith('$'):
+            return
+
+        index = refresh_grammar_index()
+        if index is None:
+            status("Other grammars are not indexed on ST2")
+            return
+        scope_name, _, key = target.partition('#')
+        if key:
+            found = index.find(scope_name, key)
+        else:
+            paths = index.paths(scope_name)
+            found = paths and (paths[0], 1, 1)
+        if not found:
+            status("`%s` not found in the installed grammars" % target)
+            return
+        open_grammar(view.window(), *found)
+
+
+class FindSyntaxDefIncludeReferencesCommand(sublime_plugin.TextCommand):
+    """Lists the includes that refer to the repository key at the cursor,
+    its definition or an include of it, in a quick panel.
+    """
+
+    def is_enabled(self):
+        return base_scope(self.view) == 'source.yaml-tmlanguage'
+
+    def run(self, edit):
+        view = self.view
+        if not view.sel():
+            return
+        model = get_grammar_model(view)
+        item = model.at(view.sel()[0].begin())
+        key = None
+        if item and item[2] == DEFINITION:
+            key = item[3]
+        elif item and item[2] == INCLUDE:
+            key = model.target(item[3])
+        if not key:
+            status("No repository key found at the cursor")
+            return
+
+        regions = [sublime.Region(*region) for region in model.references(key)]
+        if not regions:
+            status("Repository key `%s` is not included anywhere" % key)
+            return
+        items = ["%d: %s" % (view.rowcol(region.begin())[0] + 1,
+                             view.substr(view.line(region)).strip())
+                 for region in regions]
+
+        def on_done(i):
+            if i < 0:
+                return
+            view.sel().clear()
+            view.sel().add(regions[i])
+            view.show_at_center(regions[i])
+
+        view.window().show_quick_panel(items, on_done)
+
+
+# Seconds without modifications before the indexes of a view are updated
+IDLE_DELAY = 0.5
+
+
+def when_idle(view, func):
+    """Calls `func(view)` in the async thread once the view was not
+    modified for `IDLE_DELAY` seconds. Only the change count is read now,
+    so this is cheap enough for every keystroke (ST3 only).
+    """
+    change_count = view.change_count()
+
+    def run():
+        # Only after the last of several modifications
+        if view.is_valid() and view.change_count() == change_count:
+            func(view)
+
+    sublime.set_timeout_async(run, int(IDLE_DELAY * 1000))
+
+
+# view id -> [change count, KeyIndex of the view's text]
+key_indexes = {}
+key_indexes_lock = threading.Lock()
+# view id -> [change count, GrammarModel of the view's text]
+grammar_models = {}
+grammar_models_lock = threading.Lock()
+
+
+def get_view_index(view, indexes, lock, cls):
+    """Returns the index of the view's current text in `indexes`, an
+    instance of `cls`. It is built on the first call and updated with the
+    changed text afterwards.
+    """
+    with lock:
+        change_count = view.change_count()
+        entry = indexes.get(view.id())
+        if entry is None:
+            entry = indexes[view.id()] = [change_count, cls(get_text(view))]
+        elif entry[0] != change_count:
+            entry[1].update(get_text(view))
+            entry[0] = change_count
+        return entry[1]
+
+
+def get_key_index(view):
+    """Returns the `KeyIndex` of the view's current text.
+    """
+    return get_view_index(view, key_indexes, key_indexes_lock, KeyIndex)
+
+
+def get_grammar_model(view):
+    """Returns the `GrammarModel` of the view's current text. Only the
+    changed entries are composed again.
+    """
+    return get_view_index(view, grammar_models, grammar_models_lock, GrammarModel)
+
+
+class UnusedRepositoryKeysListener(sublime_plugin.EventListener):
+    """Underlines the repository keys that no include of the grammar refers
+    to, unless the `highlight_unused_repository_keys` setting is false
+    (ST3 only). Keys included by other grammars are underlined as well.
+    """
+
+    def enabled(self, view):
+        return (base_scope(view) == 'source.yaml-tmlanguage'
+                and view.settings().get('highlight_unused_repository_keys', True))
+
+    def highlight(self, view):
+        model = get_grammar_model(view)
+        if model.errors:
+            # Includes in the broken entries are unknown, keep the old regions
+            return
+        regions = [sublime.Region(begin, end) for begin, end, _ in model.unused_keys()]
+        view.add_regions('unused_repository_keys', regions, 'comment', '',
+                         sublime.DRAW_NO_FILL | sublime.DRAW_NO_OUTLINE
+                         | sublime.DRAW_STIPPLED_UNDERLINE)
+
+    def on_load_async(self, view):
+        if self.enabled(view):
+            self.highlight(view)
+
+    on_activated_async = on_load_async
+
+    def on_modified_async(self, view):
+        if self.enabled(view):
+            when_idle(view, self.highlight)
+
+    def on_close(self, view):
+        with grammar_models_lock:
+            grammar_models.pop(view.id(), None)
+
+
+class UUIDPool(object):
+    """Hands out pre-generated random UUIDs and generates `size` new ones
+    when it runs empty.
+    """
+
+    def __init__(self, size=64):
+        self.size = size
+        self._uuids = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if not self._uuids:
+                self._uuids = [str(uuid.uuid4()) for _ in range(self.size)]
+            return self._uuids.pop()
+
+
+uuid_pool = UUIDPool()
+
+
+def _base_completions():
+    base_keys = "match,end,begin,name,contentName,comment,scopeName,include".split(',')
+    dict_keys = "repository,captures,beginCaptures,endCaptures".split(',')
+    list_keys = "fileTypes,patterns".split(',')
+
+    completions = [
+        ("include\tinclude: '#...'", "include: '#$0'"),
+        ('include\tinclude: $self',  "include: \$self")
+    ]
+    for ex in ((("{0}\t{0}:".format(s), "%s: "    % s) for s in base_keys),
+               (("{0}\t{0}:".format(s), "%s:\n  " % s) for s in dict_keys),
+               (("{0}\t{0}:".format(s), "%s:\n- " % s) for s in list_keys)):
+        completions.extend(ex)
+    return tuple(completions)
+
+
+# Characters a "did you mean" suggestion for an unknown scope may skip
+MAX_SUGGESTION_GAPS = 3
+
+
 class SyntaxDefCompletions(sublime_plugin.EventListener):
-    def __init__(self):
-        base_keys = "match,end,begin,name,contentName,comment,scopeName,include".split(',')
-        dict_keys = "repository,captures,beginCaptures,endCaptures".split(',')
-        list_keys = "fileTypes,patterns".split(',')
+    base_completions = _base_completions()
 
-        completions = [
-            ("include\tinclude: '#...'", "include: '#$0'"),
-            ('include\tinclude: $self',  "include: \$self")
-        ]
-        for ex in ((("{0}\t{0}:".format(s), "%s: "    % s) for s in base_keys),
-                   (("{0}\t{0}:".format(s), "%s:\n  " % s) for s in dict_keys),
-                   (("{0}\t{0}:".format(s), "%s:\n- " % s) for s in list_keys)):
-            completions.extend(ex)
+    def __init__(self):
+        # view id -> whether the view is a YAML syntax definition
+        self.syntax_defs = {}
 
-        self.base_completions = completions
+    def get_scopes(self, view):
+        """Returns the ``ViewScopes`` that selectors are matched with. Tests
+        override it to return ``RecordedScopes`` instead.
+        """
+        return ViewScopes(view)
 
+    def is_syntax_def(self, view):
+        """Returns whether the view is a YAML syntax definition. The result
+        is cached per view until its settings (and thus its syntax) change.
+        """
+        view_id = view.id()
+        result = self.syntax_defs.get(view_id)
+        if result is None:
+            result = self.get_scopes(view).base_scope() == 'source.yaml-tmlanguage'
+            self.syntax_defs[view_id] = result
+            settings = view.settings()
+            settings.clear_on_change('package_dev.syntax_def_completions')
+            settings.add_on_change('package_dev.syntax_def_completions',
+                                   lambda: self.syntax_defs.pop(view_id, None))
+        return result
+
+    def on_modified_async(self, view):
+        # Keep the index of views that used it up to date while typing
+        # pauses (ST3 only, ST2 updates it when the completions are queried)
+        if view.id() in key_indexes:
+            when_idle(view, get_key_index)
+
+    def on_close(self, view):
+        with key_indexes_lock:
+            key_indexes.pop(view.id(), None)
+        self.syntax_defs.pop(view.id(), None)
+
+    @timed('SyntaxDefCompletions.on_query_completions')
     def on_query_completions(self, view, prefix, locations):
         # We can't work with multiple selections here
-        if len(locations) > 1:
+        if len(locations) > 1 or not self.is_syntax_def(view):
             return []
 
         loc = locations[0]
-        # Do not bother if not in yaml-tmlanguage scope and within or at the end of a comment
-        if not view.match_selector(loc, "source.yaml-tmlanguage - comment"):
+        # Match all selectors locally, with one API call per point
+        scopes = self.get_scopes(view)
+        # Do not bother if within or at the end of a comment
+        with timer('SyntaxDefCompletions.scope_lookup'):
+            in_syntax_def = scopes.match(loc, "source.yaml-tmlanguage - comment")
+        if not in_syntax_def:
             return []
 
         def inhibit(ret):
@@ -423,16 +790,19 @@ class SyntaxDefCompletions(sublime_plugin.EventListener):
 
         # Extend numerics into `'123': {name: $0}`, as used in captures,
         # but only if they are not in a string scope
-        word = view.substr(view.word(loc))
-        if word.isdigit() and not view.match_selector(loc, "string"):
-            return inhibit([(word, "'%s': {name: $0}" % word)])
+        # (the prefix is checked first, it needs no API call)
+        if not prefix or prefix.isdigit():
+            word = view.substr(view.word(loc))
+            if word.isdigit() and not scopes.match(loc, "string"):
+                return inhibit([(word, "'%s': {name: $0}" % word)])
 
         # Provide a selection of naming convention from TextMate + the base scope appendix
         if (
-            view.match_selector(loc, "meta.name meta.value string")
-            or view.match_selector(loc - 1, "meta.name meta.value string")
-            or view.match_selector(loc - 2, "meta.name keyword.control.definition")
+            scopes.match(loc, "meta.name meta.value string")
+            or scopes.match(loc - 1, "meta.name meta.value string")
+            or scopes.match(loc - 2, "meta.name keyword.control.definition")
         ):
+            refresh_scope_corpus()
             reg = extract_selector(view, "meta.name meta.value string", loc)
             if reg:
                 # Tokenize the current selector (only to the cursor)
@@ -445,24 +815,27 @@ class SyntaxDefCompletions(sublime_plugin.EventListener):
                     del tokens[-1]  # The last token is either incomplete or empty
 
                     # Browse the nodes and their children
-                    nodes = COMPILED_HEADS
-                    for i, token in enumerate(tokens):
-                        node = nodes.find(token)
-                        if not node:
-                            status("Warning: `%s` not found in scope naming conventions"
-                                   % '.'.join(tokens[:i + 1]))
-                            break
-                        nodes = node.children
-                        if not nodes:
-                            break
-
-                    if nodes and node:
-                        return inhibit(nodes.to_completion())
+                    with timer('SyntaxDefCompletions.trie_walk'):
+                        node = get_trie().root
+                        for i, token in enumerate(tokens):
+                            node = node.children.get(token)
+                            if not node:
+                                scope = '.'.join(tokens[:i + 1])
+                                similar = get_trie().fuzzy(scope, 1, MAX_SUGGESTION_GAPS)
+                                hint = "; did you mean `%s`?" % similar[0] if similar else ""
+                                status("Warning: `%s` not found in scope naming conventions%s"
+                                       % (scope, hint))
+                                break
+                            if not node.children:
+                                break
+
+                    if node and node.children:
+                        return inhibit(node.completions)
                     else:
                         status("No nodes available in scope naming conventions after `%s`"
                                % '.'.join(tokens))
                         # Search for the base scope appendix/suffix
-                        regs = view.find_by_selector("meta.scope-name meta.value string")
+                        regs = find_by_selector(view, "meta.scope-name meta.value string")
                         if not regs:
                             status("Warning: Could not find base scope")
                             return []
@@ -477,15 +850,26 @@ class SyntaxDefCompletions(sublime_plugin.EventListener):
                         return inhibit([(base_suffix,) * 2])
 
             # Just return all the head nodes
-            return inhibit(COMPILED_HEADS.to_completion())
+            return inhibit(get_trie().root.completions)
 
         # Check if triggered by a "."
         if view.substr(loc - 1) == ".":
             # Due to "." being set as a trigger this should not be computed after the block above
             return []
 
+        # Auto-completion for includes of other grammars' repository keys
+        # ("source.x#key"), which are not scoped as a whole
+        m = OTHER_INCLUDE_RE.search(view.substr(sublime.Region(view.line(loc).begin(), loc)))
+        if m:
+            index = refresh_grammar_index()
+            with timer('SyntaxDefCompletions.include_scan'):
+                variables = index.keys(m.group(2)) if index else []
+            status("Found %d repository keys of `%s` to be used in includes"
+                   % (len(variables), m.group(2)))
+            return inhibit([(key, key) for key in variables])
+
         # Auto-completion for include values using the repository keys
-        if view.match_selector(loc, "meta.include meta.value string, variable.other.include"):
+        if scopes.match(loc, "meta.include meta.value string, variable.other.include"):
             # Search for the whole include string which contains the current location
             reg = extract_selector(view, "meta.include meta.value string", loc)
             include_text = view.substr(reg)
@@ -497,23 +881,18 @@ class SyntaxDefCompletions(sublime_plugin.EventListener):
             ):
                 return []
 
-            variables = [view.substr(r)
-                         for r in view.find_by_selector("variable.other.repository-key")]
+            with timer('SyntaxDefCompletions.include_scan'):
+                variables = [key for _, _, key in get_key_index(view).repository_keys()]
             status("Found %d local repository keys to be used in includes" % len(variables))
-            return inhibit(zip(variables, variables))
+            return inhibit([(key, key) for key in variables])
 
         # Do not bother if the syntax def already matched the current position,
         # except in the main repository
-        scope = view.scope_name(loc).strip()
         if (
-            view.match_selector(loc, "meta")
-            and not scope.endswith("meta.repository-block.yaml-tmlanguage")
+            scopes.match(loc, "meta")
+            and scopes.scopes(loc)[-1] != "meta.repository-block.yaml-tmlanguage"
         ):
             return []
 
         # Otherwise, use the default completions + generated uuid
-        completions = [
-            ('uuid\tuuid: ...', "uuid: %s" % uuid.uuid4())
-        ]
-
-        return inhibit(self.base_completions + completions)
+        return inhibit(self.base_completions + (('uuid\tuuid: ...', "uuid: " + uuid_pool.get()),))
@@ -0,0 +1,22 @@
+"""Makes the plugin importable without Sublime Text.
+
+``sublime`` and ``sublime_plugin`` are the stubs in this folder. The
+plugin's modules import each other relatively, so the repository is also
+importable as the package ``PackageDev``, from a ``Packages`` folder like
+``sublime_lib.path.get_package_name`` expects:
+
+    from PackageDev import syntax_def_dev
+"""
+import os
+import sys
+import tempfile
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TESTS)
+
+sys.path.insert(0, TESTS)
+
+_packages = os.path.join(tempfile.mkdtemp(prefix='sublime-'), 'Packages')
+os.mkdir(_packages)
+os.symlink(ROOT, os.path.join(_packages, 'PackageDev'))
+sys.path.insert(0, _packages)
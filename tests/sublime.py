@@ -0,0 +1,132 @@
+"""The parts of Sublime Text's ``sublime`` module the plugin uses, for
+tests. Views and windows are ``mock`` objects in the tests themselves.
+"""
+import os
+import tempfile
+
+INHIBIT_WORD_COMPLETIONS = 8
+ENCODED_POSITION = 1
+DRAW_NO_FILL = 32
+DRAW_NO_OUTLINE = 256
+DRAW_STIPPLED_UNDERLINE = 512
+
+# Sublime Text's folders, created on first use
+_data = tempfile.mkdtemp(prefix='sublime-')
+
+
+class Region(object):
+
+    def __init__(self, a, b=None):
+        self.a = a
+        self.b = a if b is None else b
+
+    def begin(self):
+        return min(self.a, self.b)
+
+    def end(self):
+        return max(self.a, self.b)
+
+    def size(self):
+        return abs(self.b - self.a)
+
+    def empty(self):
+        return self.a == self.b
+
+    def contains(self, x):
+        if isinstance(x, Region):
+            return self.begin() <= x.begin() and x.end() <= self.end()
+        return self.begin() <= x <= self.end()
+
+    def __eq__(self, other):
+        return isinstance(other, Region) and (self.a, self.b) == (other.a, other.b)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __lt__(self, other):
+        return (self.begin(), self.end()) < (other.begin(), other.end())
+
+    def __repr__(self):
+        return "Region(%d, %d)" % (self.a, self.b)
+
+
+class View(object):
+    pass
+
+
+class Window(object):
+    pass
+
+
+class Settings(object):
+
+    def __init__(self, values=None):
+        self._values = dict(values or {})
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def set(self, key, value):
+        self._values[key] = value
+
+    def has(self, key):
+        return key in self._values
+
+    def erase(self, key):
+        self._values.pop(key, None)
+
+    def add_on_change(self, key, on_change):
+        pass
+
+    def clear_on_change(self, key):
+        pass
+
+
+_settings = {}
+
+
+def load_settings(base_name):
+    return _settings.setdefault(base_name, Settings())
+
+
+def save_settings(base_name):
+    pass
+
+
+def version():
+    return '3126'
+
+
+def packages_path():
+    return os.path.join(_data, 'Packages')
+
+
+def installed_packages_path():
+    return os.path.join(_data, 'Installed Packages')
+
+
+def cache_path():
+    return os.path.join(_data, 'Cache')
+
+
+def executable_path():
+    return os.path.join(_data, 'sublime_text')
+
+
+def active_window():
+    return None
+
+
+def set_timeout(callback, delay=0):
+    callback()
+
+
+set_timeout_async = set_timeout
+
+
+def status_message(msg):
+    pass
+
+
+def error_message(msg):
+    pass
@@ -0,0 +1,27 @@
+"""The base classes of Sublime Text's ``sublime_plugin`` module, for
+tests.
+"""
+
+
+class EventListener(object):
+    pass
+
+
+class ApplicationCommand(object):
+    pass
+
+
+class WindowCommand(object):
+
+    def __init__(self, window):
+        self.window = window
+
+
+class TextCommand(object):
+
+    def __init__(self, view):
+        self.view = view
+
+
+# Commands registered by sublime_lib.edit
+text_command_classes = []
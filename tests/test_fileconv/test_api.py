@@ -0,0 +1,122 @@
+import io
+import os
+
+import fileconv.api as api
+from fileconv.cache import ParseCache
+from fileconv.reporters import BufferReporter
+
+
+def test_loads_dumps_roundtrip():
+    data = {"name": "Test", "patterns": [{"include": "#main"}], "uuid": "123"}
+    for fmt in api.FORMATS:
+        text = api.dumps(data, fmt)
+        assert api.loads(text, fmt) == data
+        assert api.loads(text.encode('utf-8'), fmt) == data
+
+
+def test_loads_reports_errors():
+    reporter = BufferReporter()
+    assert api.loads('{"a": [1,', 'json', reporter, "foo.json") is None
+    assert reporter.getvalue().startswith('Error parsing JSON "foo.json": ')
+
+
+def test_detect_format():
+    assert api.detect_format("foo.json") == 'json'
+    assert api.detect_format("foo.YAML-tmLanguage") == 'yaml'
+    assert api.detect_format("foo.tmLanguage") is None
+    assert api.detect_format("foo.tmLanguage", b'<?xml version="1.0"?>\n'
+                                               b'<!DOCTYPE plist PUBLIC "">\n') == 'plist'
+
+
+def test_new_file_path():
+    assert api.new_file_path("a.YAML-tmLanguage", 'yaml', 'plist') == "a.tmLanguage"
+    assert api.new_file_path("a.json", 'json', 'yaml') == "a.yaml"
+    assert api.new_file_path("a.json", 'json', 'yaml', ext="foo") == "a.foo"
+    assert (api.new_file_path("a.tmLanguage", 'plist', 'json', head=b'<!DOCTYPE plist')
+            == "a.JSON-tmLanguage")
+
+
+def test_convert(tmpdir):
+    path = str(tmpdir.join("a.YAML-tmLanguage"))
+    with open(path, 'w') as f:
+        f.write("# [PackageDev] target_format: plist, ext: tmLanguage\n"
+                "name: Test\nscopeName: source.test\n")
+
+    new_path = api.convert(path)
+    assert new_path == os.path.join(str(tmpdir), "a.tmLanguage")
+    assert api.load(new_path) == {"name": "Test", "scopeName": "source.test"}
+
+
+def test_loads_single_yaml_document():
+    assert api.loads("%YAML 1.1\n---\na: |\n  ---\n...\n# end\n", 'yaml') == {"a": "---\n"}
+    reporter = BufferReporter()
+    assert api.loads("a: 1\n---\nb: 2\n", 'yaml', reporter, "foo.yaml") is None
+    assert "expected a single document" in reporter.getvalue()
+
+
+def test_convert_uses_cache(tmpdir):
+    path = str(tmpdir.join("a.yaml"))
+    with open(path, 'w') as f:
+        f.write("---\na: [1]\n...\n")
+    cache = ParseCache()
+    assert api.load(api.convert(path, 'json', cache=cache)) == {"a": [1]}
+    assert api.load(api.convert(path, 'json', cache=cache)) == {"a": [1]}
+    assert cache.hits == 1
+
+
+def test_convert_documents(tmpdir):
+    path = str(tmpdir.join("log.yaml"))
+    with open(path, 'w') as f:
+        f.write("a: 1\n---\n- b\n- 2\n--- text\n")
+    docs = [{"a": 1}, ["b", 2], "text"]
+    # Not a document marker
+    with open(str(tmpdir.join("block.yaml")), 'w') as f:
+        f.write("a: |\n  ---\n  b\n")
+    assert api.load(api.convert(str(tmpdir.join("block.yaml")), 'json')) == {"a": "---\nb\n"}
+
+    new_path = api.convert(path, 'json')
+    with open(new_path) as f:
+        assert f.read() == api.dumps(docs, 'json')
+
+    assert api.load(api.convert(path, 'plist')) == docs
+
+    new_path = api.convert(path, 'json', documents='files')
+    assert new_path == os.path.join(str(tmpdir), "log.1.json")
+    assert [api.load(str(tmpdir.join("log.%d.json" % i))) for i in (1, 2, 3)] == docs
+
+
+def test_load_documents():
+    cache = ParseCache()
+    assert api.load_documents("a: 1\n", cache=cache) == ({"a": 1}, None)
+    assert api.load_documents("a: 1\n", cache=cache) == ({"a": 1}, None)
+    assert cache.hits == 1
+
+    data, docs = api.load_documents(io.StringIO(u"a: 1\n---\nb: 2\n--- 3\n"))
+    assert data is None
+    assert list(docs) == [{"a": 1}, {"b": 2}, 3]
+
+    reporter = BufferReporter()
+    assert api.load_documents("a: [1\n", reporter, "foo.yaml") == (None, None)
+    assert 'foo.yaml", line 2' in reporter.getvalue()
+
+
+def test_convert_documents_reports_errors(tmpdir):
+    path = str(tmpdir.join("log.yaml"))
+    with open(path, 'w') as f:
+        f.write("a: 1\n---\n[b\n")
+    reporter = BufferReporter()
+    assert api.convert(path, 'json', reporter=reporter) is None
+    assert 'log.yaml", line 4' in reporter.getvalue()
+
+
+def test_sort_keys():
+    captures = {"10": {"name": "b"}, "2": {"name": "a"}, "0": {"name": "c"}}
+    data = {"patterns": [{"captures": captures, "match": "x", "comment": "c", "a": 1}],
+            "name": "Test"}
+    copy = {"patterns": [dict(data["patterns"][0])], "name": "Test"}
+    result = api.sort_keys(data, ["comment", "name", "match"])
+    assert data == copy
+    assert list(result) == ["name", "patterns"]
+    assert list(result["patterns"][0]) == ["comment", "match", "a", "captures"]
+    assert list(result["patterns"][0]["captures"]) == ["0", "2", "10"]
+    assert list(api.sort_keys(captures, sort_numeric=False)) == ["0", "10", "2"]
@@ -0,0 +1,43 @@
+import datetime
+import os
+
+import fileconv.api as api
+from fileconv.cache import DiskParseCache, ParseCache
+
+
+def test_disk_cache_roundtrip(tmpdir):
+    cache = DiskParseCache(str(tmpdir))
+    data = {"name": "Test", "date": datetime.date(2016, 1, 1), "list": [1, 2.5, None]}
+    key = cache.key(b"source", 'yaml', api.LOADER_VERSION)
+    assert cache.get(key) is None
+    cache.set(key, data)
+    assert cache.get(key) == data
+    assert cache.get(key) is not cache.get(key)
+
+
+def test_disk_cache_invalid_entry(tmpdir):
+    cache = DiskParseCache(str(tmpdir))
+    cache.set("key", {"a": 1})
+    path = os.path.join(str(tmpdir), "key" + cache.ext)
+    with open(path, 'r+b') as f:
+        f.seek(-1, os.SEEK_END)
+        f.write(b'X')
+
+    assert cache.get("key") is None
+    assert not os.path.exists(path)
+
+
+def test_disk_cache_eviction(tmpdir):
+    cache = DiskParseCache(str(tmpdir), max_size=2000)
+    for i in range(20):
+        cache.set("key%d" % i, ["x" * 100])
+    assert cache.size <= 2000
+    assert 0 < len(os.listdir(str(tmpdir))) < 20
+
+
+def test_loads_uses_cache():
+    cache = ParseCache()
+    data = api.loads(b"a: [1, 2]", 'yaml', cache=cache)
+    data['a'].append(3)  # must not change the cached entry
+    assert api.loads(b"a: [1, 2]", 'yaml', cache=cache) == {'a': [1, 2]}
+    assert cache.hits == 1
@@ -0,0 +1,59 @@
+import pickle
+from collections import OrderedDict
+
+import fileconv.api as api
+from fileconv.compact import FrozenDict, FrozenList, Freezer, freeze, thaw, intern_strings
+
+
+DATA = {
+    "name": "Test",
+    "patterns": [{"match": "a", "name": "keyword.test"},
+                 {"match": "b", "name": "keyword.test"},
+                 {"include": "#main"}],
+    "repository": {"main": {"patterns": [], "1": True}},
+}
+
+
+def test_freeze():
+    frozen = freeze(DATA)
+    assert isinstance(frozen, FrozenDict)
+    assert isinstance(frozen["patterns"], FrozenList)
+    assert frozen == DATA and DATA == frozen and not frozen != DATA
+    assert frozen["patterns"][0].layout is frozen["patterns"][1].layout
+    assert frozen["patterns"][0]["name"] is frozen["patterns"][1]["name"]
+    assert "name" in frozen and "scopeName" not in frozen
+    assert frozen.get("scopeName", 1) == 1
+    assert list(frozen) == list(DATA)
+    assert thaw(frozen) == DATA
+    assert pickle.loads(pickle.dumps(frozen)) == DATA
+
+
+def test_big_layout():
+    data = dict((str(i), i) for i in range(20))
+    frozen = freeze(data)
+    assert frozen["19"] == 19 and frozen == data
+    assert thaw(frozen, OrderedDict) == OrderedDict(sorted(data.items(), key=lambda x: x[1]))
+
+
+def test_shared_freezer():
+    freezer = Freezer()
+    a, b = freeze({"x": ["scope.a"]}, freezer), freeze({"x": ["scope.a"]}, freezer)
+    assert a.layout is b.layout and a["x"][0] is b["x"][0]
+
+
+def test_intern_strings():
+    data = intern_strings(DATA)
+    assert data == DATA and type(data["patterns"]) is list
+    assert data["patterns"][0]["name"] is data["patterns"][1]["name"]
+
+
+def test_dump_frozen():
+    frozen = freeze(DATA)
+    for fmt in api.FORMATS:
+        assert api.dumps(frozen, fmt) == api.dumps(DATA, fmt)
+    assert api.dumps(frozen, 'yaml', dedup=2) == api.dumps(DATA, 'yaml', dedup=2)
+
+
+def test_loads_compact():
+    data = api.loads(api.dumps(DATA, 'json'), 'json', compact=True)
+    assert isinstance(data, FrozenDict) and data == DATA
@@ -0,0 +1,33 @@
+from collections import OrderedDict
+
+import yaml
+
+import fileconv.api as api
+from fileconv.dedup import deduplicate
+
+CAPTURES = {"1": {"name": "punctuation.definition.string.begin"},
+            "2": {"name": "punctuation.definition.string.end"}}
+DATA = {"patterns": [{"include": "#a"}, {"include": "#a"}],
+        "repository": {"a": {"match": "a", "captures": dict(CAPTURES)},
+                       "b": {"match": "b", "captures": dict(CAPTURES)},
+                       "c": {"match": "c", "captures": OrderedDict(sorted(CAPTURES.items()))}}}
+
+
+def test_deduplicate():
+    data = deduplicate(DATA)
+    assert data == DATA
+    repository = data['repository']
+    assert repository['a']['captures'] is repository['b']['captures']
+    # Different type, too small
+    assert repository['a']['captures'] is not repository['c']['captures']
+    assert data['patterns'][0] is not data['patterns'][1]
+    patterns = deduplicate(DATA, min_size=1)['patterns']
+    assert patterns[0] is patterns[1]
+
+
+def test_dumps_dedup():
+    data = dict(DATA, repository={"a": DATA['repository']['a'], "b": DATA['repository']['b']})
+    text = api.dumps(data, 'yaml', dedup=True)
+    assert text.count('&') == 1 and text.count('*') == 1
+    assert yaml.safe_load(text) == data
+    assert len(text) < len(api.dumps(data, 'yaml'))
@@ -0,0 +1,67 @@
+import copy
+from collections import OrderedDict
+
+import yaml
+
+from fileconv.emit_cache import EmitCache
+
+
+def od(*items):
+    return OrderedDict(items)
+
+
+class OrderedDumper(yaml.SafeDumper):
+    def represent_ordereddict(self, data):
+        return self.represent_mapping(u'tag:yaml.org,2002:map', list(data.items()))
+
+    def represent_mapping(self, tag, mapping, flow_style=False):
+        # Like syntax_def_dev.YAMLLanguageDevDumper
+        if len(mapping) == 1:
+            flow_style = (mapping[0][0] == 'name')
+        return super(OrderedDumper, self).represent_mapping(tag, mapping, flow_style)
+
+
+OrderedDumper.add_representer(OrderedDict, OrderedDumper.represent_ordereddict)
+
+
+MAIN = od(("match", "a: # b " * 20),
+          ("captures", od(("1", od(("name", "x"))))))
+OTHER = od(("begin", "'"), ("end", "\n"), ("patterns", []))
+DATA = od(("name", "Test"),
+          ("scopeName", "source.test"),
+          ("fileTypes", ["test"]),
+          ("patterns", [od(("include", "#main")), od(("name", "keyword.test"))]),
+          ("repository", od(("main", MAIN), ("other", OTHER))),
+          ("uuid", "123"))
+
+
+def test_dump_identical():
+    for params in (dict(Dumper=OrderedDumper),
+                   dict(Dumper=OrderedDumper, default_flow_style=None, indent=4, width=30),
+                   dict(Dumper=OrderedDumper, line_break='\r\n', default_style='"')):
+        cache = EmitCache()
+        text = cache.dump(DATA, params, OrderedDict)
+        assert text == yaml.dump(DATA, **params)
+        assert cache.dump(DATA, params, OrderedDict) == text
+        assert cache.emitted == 0 and cache.reused == 8
+
+
+def test_dump_changed_entry():
+    params = dict(Dumper=OrderedDumper)
+    cache = EmitCache()
+    cache.dump(DATA, params, OrderedDict)
+    data = copy.deepcopy(DATA)
+    data["repository"]["other"]["end"] = "b"
+    assert cache.dump(data, params, OrderedDict) == yaml.dump(data, **params)
+    assert cache.emitted == 1
+
+
+def test_dump_not_split():
+    params = dict(Dumper=OrderedDumper)
+    cache = EmitCache()
+    data = copy.deepcopy(DATA)
+    data["patterns"].append(data["repository"]["main"])
+    assert cache.dump(data, params, OrderedDict) == yaml.dump(data, **params)
+    assert cache.dump(DATA, dict(params, explicit_start=True), OrderedDict) \
+        == yaml.dump(DATA, explicit_start=True, **params)
+    assert cache.emitted == 1 and cache.reused == 0
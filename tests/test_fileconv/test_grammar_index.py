@@ -0,0 +1,104 @@
+import json
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from fileconv import api
+from fileconv.grammar_index import GrammarIndex, archive_member, index_grammar
+
+
+YAML = """\
+name: Test
+scopeName: source.test  # comment
+patterns:
+- include: '#main'
+repository:
+  main:
+    match: a
+  'other': {match: b}
+"""
+
+GRAMMAR = {'name': 'JSON Test', 'scopeName': 'source.json-test',
+           'patterns': [{'name': 'repository', 'patterns': []}],
+           'repository': {'first': {'match': 'a', 'repository': {'nested': {}}},
+                          'second': {'patterns': [{'match': '"\\"'}]}}}
+
+
+def test_index_grammar(tmpdir):
+    path = tmpdir.join("Test.YAML-tmLanguage")
+    path.write(YAML)
+    assert index_grammar(str(path)) == ('source.test', {'main': (6, 3), 'other': (8, 4)})
+
+    path = tmpdir.join("Test.JSON-tmLanguage")
+    path.write("// comment {\n" + json.dumps(GRAMMAR, indent=2, sort_keys=True))
+    scope_name, keys = index_grammar(str(path))
+    assert scope_name == 'source.json-test'
+    assert sorted(keys) == ['first', 'second']
+    row, col = keys['second']
+    assert str(path.read()).splitlines()[row - 1][col - 1:].startswith('second"')
+
+    path = tmpdir.join("Test.tmLanguage")
+    with open(str(path), 'w') as f:
+        api.dump(GRAMMAR, 'plist', f)
+    scope_name, keys = index_grammar(str(path))
+    assert scope_name == 'source.json-test'
+    assert sorted(keys) == ['first', 'second']
+    row, col = keys['first']
+    assert str(path.read()).splitlines()[row - 1][col - 1:] == '<dict>'
+
+    path = tmpdir.join("Broken.tmLanguage")
+    path.write("")
+    assert index_grammar(str(path)) == (None, {})
+
+
+def test_grammar_index(tmpdir):
+    packages = tmpdir.mkdir("Packages")
+    packages.mkdir("A").join("A.YAML-tmLanguage").write(YAML)
+    packages.mkdir("B").join("B.YAML-tmLanguage").write(
+        YAML.replace("main", "third").replace("Test", "B"))
+    store = str(tmpdir.join("cache", "index"))
+
+    index = GrammarIndex(store, workers=2)
+    assert index.update(str(packages)) == 2
+    assert index.scope_names() == ['source.test']
+    assert index.keys('source.test') == ['main', 'other', 'third']
+    assert index.find('source.test', 'main') == (str(packages.join("A", "A.YAML-tmLanguage")),
+                                                 6, 3)
+    assert index.find('source.test', 'missing') is None
+    assert index.keys('source.unknown') == []
+
+    # Restored from the store, with threads
+    index = GrammarIndex(store, executor_class=ThreadPoolExecutor)
+    packages.join("B", "B.YAML-tmLanguage").remove()
+    assert index.update(str(packages)) == 1
+    assert index.keys('source.test') == ['main', 'other']
+    assert len(index.paths('source.test')) == 1
+
+
+def test_grammar_index_archives(tmpdir):
+    installed = tmpdir.mkdir("Installed Packages")
+    archive = str(installed.join("C.sublime-package"))
+    zf = zipfile.ZipFile(archive, 'w')
+    zf.writestr("Syntaxes/C.YAML-tmLanguage", YAML.replace("source.test", "source.c"))
+    zf.writestr("C.sublime-settings", "{}")
+    zf.close()
+    installed.join("Broken.sublime-package").write("not a zip")
+    store = str(tmpdir.join("cache", "index"))
+
+    index = GrammarIndex(store, workers=0)
+    assert index.update(str(installed)) == 1
+    path, row, col = index.find('source.c', 'main')
+    assert (row, col) == (6, 3)
+    assert archive_member(path) == (archive, "Syntaxes/C.YAML-tmLanguage")
+    assert archive_member(archive) is None
+    # Grammars in unchanged archives are not scanned again
+    assert GrammarIndex(store, workers=0).update(str(installed)) == 0
+
+    zf = zipfile.ZipFile(archive, 'w')
+    zf.writestr("C.tmLanguage", "")
+    zf.close()
+    os.utime(archive, (1, 1))
+    index = GrammarIndex(store, workers=0)
+    assert index.update(str(installed)) == 2
+    assert index.scope_names() == []
+    assert index.paths('source.c') == []
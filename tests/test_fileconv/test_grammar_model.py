@@ -0,0 +1,94 @@
+from fileconv.grammar_model import GrammarModel, DEFINITION, INCLUDE, SCOPE
+
+
+TEXT = """\
+# [PackageDev] target_format: plist, ext: tmLanguage
+---
+name: Test
+scopeName: source.test
+patterns:
+- include: '#main'
+- include: source.test#other
+- include: $self
+repository:
+  main:
+    name: meta.main.test
+    patterns:
+    - include: "#main"
+    - {match: a, captures: {'1': {name: keyword.test}}}
+  other: {match: b, contentName: string.test}
+  unused:
+    match: c
+  'quoted':
+    include: source.other#unused
+...
+"""
+
+
+def test_items():
+    model = GrammarModel(TEXT)
+    assert model.errors == 0
+    assert model.scope_name() == 'source.test'
+    items = list(model.items())
+    assert items == sorted(items)
+    for begin, end, kind, value in items:
+        assert TEXT[begin:end] == value
+    assert [value for _, _, kind, value in items if kind == DEFINITION] == \
+        ['main', 'other', 'unused', 'quoted']
+    assert [value for _, _, kind, value in items if kind == SCOPE] == \
+        ['source.test', 'meta.main.test', 'keyword.test', 'string.test']
+    assert len([kind for _, _, kind, _ in items if kind == INCLUDE]) == 5
+
+
+def test_lookups():
+    model = GrammarModel(TEXT)
+    assert model.at(TEXT.index("- include: $self")) is None
+    begin = TEXT.index("source.test#other")
+    assert model.at(begin + 3) == (begin, begin + 17, INCLUDE, 'source.test#other')
+    assert model.at(0) is None
+
+    begin, end = model.definition('other')
+    assert TEXT[begin:end] == 'other'
+    assert model.definition('missing') is None
+    assert [TEXT[b:e] for b, e in model.references('main')] == ['#main', '#main']
+    assert [TEXT[b:e] for b, e in model.references('other')] == ['source.test#other']
+    assert model.references('unused') == []
+    assert [key for _, _, key in model.unused_keys()] == ['unused', 'quoted']
+
+
+def test_update():
+    model = GrammarModel(TEXT)
+    assert model.update(TEXT) == 0
+
+    text = TEXT.replace("    match: c\n", "    match: c\n    include: '#quoted'\n")
+    assert model.update(text) == 1
+    assert [key for _, _, key in model.unused_keys()] == ['unused']
+    # Offsets of the following entries moved
+    begin, end = model.definition('quoted')
+    assert text[begin:end] == 'quoted'
+
+    # While an entry is being edited
+    broken = text.replace("  other: {match: b,", "  other: {match: b")
+    assert model.update(broken) == 1
+    assert model.errors == 1
+    assert model.definition('other') is None
+    assert model.definition('unused')
+
+    assert model.update(text) == 1
+    assert model.errors == 0
+    assert list(model.items()) == list(GrammarModel(text).items())
+
+
+def test_incremental_update():
+    parts = ["name: Test\nscopeName: source.test\nrepository:\n"]
+    for i in range(500):
+        parts.append("  key%d:\n    patterns:\n    - include: '#key%d'\n" % (i, i + 1))
+    text = ''.join(parts)
+    model = GrammarModel(text)
+    assert len(model.unused_keys()) == 1
+
+    pos = text.index("  key250:")
+    text = text[:pos] + "  new:\n    match: b\n" + text[pos:]
+    assert model.update(text) == 1
+    assert [key for _, _, key in model.unused_keys()] == ['key0', 'new']
+    assert model.at(text.index("  key499:") + 3)[2:] == (DEFINITION, 'key499')
@@ -0,0 +1,94 @@
+import random
+import time
+
+from fileconv.key_index import KeyIndex, _common_prefix, _common_suffix
+
+
+TEXT = """\
+name: Test
+scopeName: source.test
+patterns:
+- include: '#main'
+  name: not-a-key
+repository:
+  main:
+    patterns:
+    - include: '#other'
+  "other": {match: a}
+  'third':
+    match: b
+uuid: 1234
+"""
+
+
+def keys(index):
+    return [key for _, _, key in index.repository_keys()]
+
+
+def test_key_index():
+    index = KeyIndex(TEXT)
+    assert keys(index) == ['main', 'other', 'third']
+    begin, end = index.find('other')
+    assert TEXT[begin:end] == 'other'
+    assert index.find('not-a-key') is None
+    entries = index.entries()
+    assert [(key, top_level) for _, key, top_level in entries] == [
+        ('name', True), ('scopeName', True), ('patterns', True), ('repository', True),
+        ('main', False), ('other', False), ('third', False), ('uuid', True)]
+    assert TEXT[entries[5][0]:].startswith('  "other":')
+
+    text = TEXT.replace("  'third':", "  third:\n  fourth: {}\n")
+    assert index.update(text) < 40
+    assert keys(index) == ['main', 'other', 'third', 'fourth']
+    assert index.repository_keys() == KeyIndex(text).repository_keys()
+
+    assert index.update(text.replace("repository:", "repo:")) > 0
+    assert keys(index) == []
+    assert index.update("") == 0
+    assert keys(index) == []
+
+
+def test_common_prefix_and_suffix():
+    a = "x" * 10000 + "a" + "y" * 5000
+    b = "x" * 10000 + "bc" + "y" * 5000
+    assert _common_prefix(a, b) == 10000
+    assert _common_suffix(a, b, 5001) == 5000
+    assert _common_suffix(a, a, 3) == 3
+    assert _common_prefix("", "a") == 0
+
+
+def test_key_index_random_edits():
+    rand = random.Random(0)
+    lines = TEXT.splitlines(True)
+    index = KeyIndex(TEXT)
+    for _ in range(300):
+        i = rand.randrange(len(lines) + 1)
+        if rand.random() < 0.5 and i < len(lines):
+            del lines[i]
+        else:
+            lines.insert(i, rand.choice(["  key%d:\n" % i, "top%d:\n" % i, "repository:\n",
+                                         "    nested:\n", "  x", "\n"]))
+        text = ''.join(lines)
+        index.update(text)
+        assert index.repository_keys() == KeyIndex(text).repository_keys()
+
+
+def test_key_index_latency():
+    # A 20,000 line grammar
+    parts = ["name: Test\nscopeName: source.test\nrepository:\n"]
+    for i in range(5000):
+        parts.append("  key%d:\n    match: a\n    name: keyword.test\n\n" % i)
+    text = ''.join(parts)
+    index = KeyIndex(text)
+    assert len(index.repository_keys()) == 5000
+
+    pos = text.index("  key2500:")
+    start = time.perf_counter()
+    for i in range(100):
+        text = text[:pos] + "  new%d:\n    match: b\n" % i + text[pos:]
+        index.update(text)
+        index.repository_keys()
+    per_edit = (time.perf_counter() - start) / 100
+    assert len(index.repository_keys()) == 5100
+    # Budget for one keystroke
+    assert per_edit < 0.010
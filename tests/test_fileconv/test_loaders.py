@@ -0,0 +1,81 @@
+import os
+
+import sublime
+
+from PackageDev.fileconv import api, dumpers, loaders
+from PackageDev.sublime_lib.view import OutputPanel
+
+
+class Output(OutputPanel):
+    """Collects the written lines instead of showing them in a panel."""
+    def __init__(self):
+        self.lines = []
+
+    def set_path(self, *args, **kwargs):
+        pass
+
+    def write_line(self, text=''):
+        self.lines.append(text)
+
+    def show(self):
+        pass
+
+
+class View(object):
+    """A buffer of ``text`` that is saved at ``path``."""
+    def __init__(self, path, text):
+        self.path = path
+        self.text = text
+
+    def file_name(self):
+        return self.path
+
+    def window(self):
+        return None
+
+    def size(self):
+        return len(self.text)
+
+    def rowcol(self, point):
+        lines = self.text[:point].split("\n")
+        return len(lines) - 1, len(lines[-1])
+
+    def text_point(self, row, col):
+        return sum(len(line) + 1 for line in self.text.split("\n")[:row]) + col
+
+    def line(self, point):
+        end = self.text.find("\n", point)
+        return sublime.Region(self.text.rfind("\n", 0, point) + 1,
+                              len(self.text) if end < 0 else end)
+
+    def substr(self, region):
+        return self.text[region.begin():region.end()]
+
+
+class YAMLLoader(loaders.YAMLLoader):
+    def get_cache(self):
+        return None
+
+
+def test_convert_documents(tmpdir):
+    output = Output()
+    view = View(str(tmpdir.join("log.yaml")), "a: 1\n---\n- b\n--- text\n")
+    data, docs = YAMLLoader(None, view, output=output).load_documents()
+    assert data is None
+    assert "Found multiple documents, converting them one by one." in output.lines
+
+    new_path = str(tmpdir.join("log.json"))
+    dumper = dumpers.JSONDumper(None, view, new_path, output=output)
+    assert dumper.dump_documents(docs, 'files') == str(tmpdir.join("log.1.json"))
+    assert sorted(os.listdir(str(tmpdir))) == ["log.1.json", "log.2.json", "log.3.json"]
+    assert api.load(str(tmpdir.join("log.2.json"))) == ["b"]
+
+
+def test_load_single_document(tmpdir):
+    output = Output()
+    view = View(str(tmpdir.join("a.yaml")), "---\na: [1]\n...\n")
+    assert YAMLLoader(None, view, output=output).load_documents() == ({"a": [1]}, None)
+
+    view.text = "a: 1\n---\n[b\n"
+    assert YAMLLoader(None, view, output=output).load_documents() == (None, None)
+    assert any('a.yaml", line 4' in line for line in output.lines)
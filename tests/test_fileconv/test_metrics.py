@@ -0,0 +1,55 @@
+import pytest
+
+from fileconv.metrics import Histogram, Metrics, bucket_index, bucket_range, timed, timer
+
+
+def test_buckets():
+    previous = -1
+    for value in list(range(200)) + [1000, 12345, 10 ** 6, 10 ** 9]:
+        index = bucket_index(value)
+        low, high = bucket_range(index)
+        assert low <= value <= high
+        assert high - low <= max(1, value / 32.0)
+        assert index >= previous
+        previous = index
+
+
+def test_percentiles():
+    histogram = Histogram()
+    assert histogram.percentile(50) == 0.0
+    for ms in range(1, 101):
+        histogram.record(ms / 1000.0)
+    assert histogram.count == 100
+    assert abs(histogram.percentile(50) - 0.050) < 0.050 * 0.04
+    assert abs(histogram.percentile(99) - 0.099) < 0.099 * 0.04
+    assert histogram.percentile(100) == histogram.max == 0.1
+    assert sorted(seconds for seconds, _ in histogram.slowest) == [0.096, 0.097, 0.098, 0.099, 0.1]
+
+
+def test_timed():
+    registry = Metrics()
+
+    @timed('func', registry)
+    def func(fail=False):
+        """Docs"""
+        with timer('branch', registry):
+            if fail:
+                raise ValueError
+        return 1
+
+    assert func() == 1
+    assert func.__doc__ == "Docs"
+    assert registry.histograms == {}
+
+    registry.enabled = True
+    func()
+    with pytest.raises(ValueError):
+        func(fail=True)
+    assert registry.histograms['func'].count == 2
+    assert registry.histograms['branch'].count == 2
+    report = registry.report()
+    assert report[0].startswith("branch: 2 calls, p50 ")
+    assert len(report) == 6
+
+    registry.reset()
+    assert registry.report() == []
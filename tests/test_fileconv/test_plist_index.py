@@ -0,0 +1,38 @@
+import io
+import plistlib
+
+from fileconv.plist_index import PlistIndex
+from fileconv.plist_writer import PlistWriter
+
+DATA = {"name": "Test", "fileTypes": ["test"], "patterns": [{"include": "#main"}],
+        "repository": {"main": {"match": "a &amp; b", "name": "keyword"}, "empty": {},
+                       "nested": {"patterns": [{"include": "#main"}]}}}
+
+
+def write(path, data):
+    with io.open(path, 'w', encoding='utf-8', newline='\n') as f:
+        PlistWriter(f).write(data)
+
+
+def test_lookup(tmpdir):
+    path = str(tmpdir.join("a.tmLanguage"))
+    write(path, DATA)
+    index = PlistIndex(str(tmpdir.join("index")))
+    assert sorted(index.keys(path, 'repository')) == ["empty", "main", "nested"]
+    for key, value in DATA['repository'].items():
+        assert index.lookup(path, 'repository', key) == value
+    assert index.lookup(path, 'fileTypes') == ["test"]
+    assert index.lookup(path, 'repository', 'nested', 'patterns', 0) == {"include": "#main"}
+
+
+def test_lookup_persisted_and_modified(tmpdir):
+    path = str(tmpdir.join("a.tmLanguage"))
+    with open(path, 'wb') as f:
+        f.write(plistlib.dumps(DATA))
+    cache_dir = str(tmpdir.join("index"))
+    PlistIndex(cache_dir).get(path)
+    assert tmpdir.join("index").listdir()
+    assert PlistIndex(cache_dir).lookup(path, 'name') == "Test"
+
+    write(path, dict(DATA, name="Changed name"))
+    assert PlistIndex(cache_dir).lookup(path, 'name') == "Changed name"
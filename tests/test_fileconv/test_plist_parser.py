@@ -0,0 +1,29 @@
+import datetime
+import io
+import plistlib
+
+import pytest
+
+from fileconv import plist_parser
+
+DATA = {"name": "Test ä", "list": [1, 2.5, True, False, {}, []], "data": b"\x00" * 80,
+        "date": datetime.datetime(2016, 1, 1, 12, 30)}
+
+
+@pytest.mark.parametrize('xml_input', [
+    plistlib.dumps(DATA),
+    plistlib.dumps(DATA).decode('utf-8'),
+    io.BytesIO(plistlib.dumps(DATA)),
+])
+def test_parse(xml_input):
+    assert plist_parser.parse_string(xml_input) == DATA
+
+
+def test_parse_sax():
+    parser = plist_parser.XmlPropertyListParser()
+    assert parser._parse_using_sax_parser(plistlib.dumps(DATA)) == DATA
+
+
+def test_parse_error():
+    with pytest.raises(plist_parser.PropertyListParseError):
+        plist_parser.parse_string(b'<plist version="1.0"><dict><key>a</key></dict></plist>')
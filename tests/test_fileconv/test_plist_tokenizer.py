@@ -0,0 +1,36 @@
+import datetime
+import plistlib
+
+import pytest
+
+from fileconv import plist_tokenizer
+
+DATA = {"name": "Test & <ä>", "list": [1, 2.5, True, False, {}, [], ""], "data": b"\x00" * 80,
+        "date": datetime.datetime(2016, 1, 1, 12, 30), "multiline": "\n  a\n"}
+
+
+def test_parse():
+    assert plist_tokenizer.parse(plistlib.dumps(DATA)) == DATA
+    assert plist_tokenizer.parse(plistlib.dumps(DATA).decode('utf-8')) == DATA
+
+
+def test_parse_markup_in_content():
+    text = ('<?xml version="1.0" encoding="UTF-8"?>\n<!-- comment -->\n'
+            '<plist version="1.0"><array><string>a<![CDATA[<&>]]> &#65;&#x42;<!-- c --></string>'
+            '<string/><true/><integer> 3 </integer></array></plist>')
+    assert plist_tokenizer.parse(text) == ['a<&> AB', '', True, 3]
+
+
+@pytest.mark.parametrize('text,msg,lineno,colno', [
+    ('<plist>\n<dict>\n  <key>a</key>\n  <string>b</strin>', "mismatched tag", 4, 11),
+    ('<plist>\n<array>\n  <key>a</key>', "<key> element must be in <dict> element", 3, 2),
+    ('<plist>\n<array>\n  <integer>x</integer>', "invalid <integer> value", 3, 2),
+    ('<plist>\n<array>\n  <string>a &b; c</string>', "undefined entity", 3, 12),
+    ('<plist>\n<array>\n  <string>a</string>\n', "unclosed token", 2, 0),
+])
+def test_parse_error(text, msg, lineno, colno):
+    with pytest.raises(plist_tokenizer.PlistSyntaxError) as excinfo:
+        plist_tokenizer.parse(text)
+    e = excinfo.value
+    assert e.msg.startswith(msg)
+    assert (e.lineno, e.colno) == (lineno, colno)
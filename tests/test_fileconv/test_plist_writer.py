@@ -0,0 +1,31 @@
+import io
+import plistlib
+from collections import OrderedDict
+
+from fileconv.plist_writer import PlistWriter
+
+
+def write(data, **params):
+    f = io.StringIO()
+    PlistWriter(f, **params).write(data)
+    return f.getvalue()
+
+
+def test_same_as_plistlib():
+    data = {"name": "Test & <more>", "list": [1, 2.5, True, {}, []], "data": b"\x00" * 80}
+    assert write(data, sort_keys=True) == plistlib.dumps(data).decode('utf-8')
+
+
+def test_keeps_order():
+    data = OrderedDict([("name", "Test"), ("scopeName", "source.test"), ("fileTypes", [])])
+    text = write(data, indent=None)
+    assert text.index("<key>name") < text.index("<key>scopeName") < text.index("<key>fileTypes")
+    assert plistlib.loads(text.encode('utf-8')) == data
+
+
+def test_write_array():
+    items = [{"a": 1}, "b", []]
+    for values in (items, []):
+        f = io.StringIO()
+        PlistWriter(f).write_array(iter(values))
+        assert f.getvalue() == plistlib.dumps(values).decode('utf-8')
@@ -0,0 +1,82 @@
+import json
+import os
+
+from fileconv.scope_corpus import ScopeCorpus, extract_scopes, grammar_format
+
+
+GRAMMAR = {
+    'name': 'Test',
+    'scopeName': 'source.test',
+    'patterns': [
+        {'match': 'a', 'name': 'keyword.control.test'},
+        {'begin': '"', 'end': '"', 'name': 'string.quoted.double.test',
+         'contentName': 'meta.string.test other.scope',
+         'captures': {'0': {'name': 'punctuation.definition.string.test'}}},
+        {'match': 'b', 'name': 'keyword.control.$1.test'},
+    ],
+    'repository': {'name': {'match': 'c', 'name': 'keyword.control.test'}},
+}
+
+
+def write(path, data):
+    path.write(json.dumps(data))
+    return str(path)
+
+
+def test_extract_scopes():
+    assert extract_scopes(GRAMMAR) == {
+        'keyword.control': 2,
+        'string.quoted.double': 1,
+        'meta.string': 1,
+        'other.scope': 1,
+        'punctuation.definition.string': 1,
+    }
+    assert extract_scopes(None) == {}
+
+
+def test_grammar_format():
+    assert grammar_format("a/Test.tmLanguage") == 'plist'
+    assert grammar_format("Test.YAML-tmLanguage") == 'yaml'
+    assert grammar_format("Test.JSON-tmLanguage") == 'json'
+    assert grammar_format("Test.json") is None
+
+
+def test_scope_corpus(tmpdir):
+    packages = tmpdir.mkdir("Packages")
+    first = write(packages.mkdir("A").join("A.JSON-tmLanguage"), GRAMMAR)
+    second = write(packages.mkdir("B").join("B.JSON-tmLanguage"),
+                   {'scopeName': 'source.b', 'patterns': [{'name': 'keyword.control.b'}]})
+    packages.join("B", "notes.json").write("{}")
+    store = str(tmpdir.join("cache", "corpus"))
+
+    corpus = ScopeCorpus(store, workers=2)
+    assert corpus.update(str(packages)) == 2
+    assert corpus.counts()['keyword.control'] == 3
+    assert corpus.update(str(packages)) == 0
+
+    # Only changed and removed files are updated, also after a restart
+    corpus = ScopeCorpus(store)
+    write(packages.join("A", "A.JSON-tmLanguage"), {'patterns': [{'name': 'new.scope'}]})
+    os.utime(first, (1, 1))
+    os.remove(second)
+    assert corpus.update(str(packages)) == 2
+    assert corpus.counts() == {'new.scope': 1}
+
+
+def test_scope_corpus_broken_grammars(tmpdir):
+    packages = tmpdir.mkdir("Packages")
+    write(packages.join("A.JSON-tmLanguage"), GRAMMAR)
+    packages.join("B.YAML-tmLanguage").write(b"name: \xe9\n", 'wb')
+    packages.join("C.tmLanguage").write('<plist version="1.0"><dict><key>a</key>'
+                                        '<date>x</date></dict></plist>')
+    corpus = ScopeCorpus(workers=0)
+    assert corpus.update(str(packages)) == 3
+    assert corpus.counts()['keyword.control'] == 2
+
+
+def test_scope_corpus_broken_store(tmpdir):
+    store = tmpdir.join("corpus")
+    store.write("garbage")
+    corpus = ScopeCorpus(str(store))
+    assert corpus.update(str(tmpdir.mkdir("Packages"))) == 0
+    assert corpus.counts() == {}
@@ -0,0 +1,30 @@
+import random
+
+from fileconv.textdiff import line_hunks
+
+
+def apply(old, hunks):
+    for begin, end, text in reversed(hunks):
+        old = old[:begin] + text + old[end:]
+    return old
+
+
+def test_line_hunks():
+    old = "a\nb\nc\nd\ne\n"
+    assert line_hunks(old, old) == []
+    assert line_hunks(old, "a\nb\nX\nd\ne\n") == [(4, 6, "X\n")]
+    assert line_hunks(old, "a\nb\nc\nd\ne\nf") == [(10, 10, "f")]
+    assert line_hunks(old, "b\nc\nd\ne\n") == [(0, 2, "")]
+    assert line_hunks("", "a\n") == [(0, 0, "a\n")]
+
+
+def test_line_hunks_random():
+    rand = random.Random(0)
+    for _ in range(50):
+        lines = ["%d\n" % rand.randrange(10) for _ in range(30)]
+        old = ''.join(lines)
+        for _ in range(3):
+            lines.insert(rand.randrange(len(lines)), "new\n")
+            del lines[rand.randrange(len(lines))]
+        new = ''.join(lines)
+        assert apply(old, line_hunks(old, new)) == new
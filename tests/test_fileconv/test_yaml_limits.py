@@ -0,0 +1,43 @@
+import re
+
+import pytest
+import yaml
+
+import fileconv.api as api
+from fileconv.reporters import BufferReporter
+from fileconv.yaml_limits import SafeLoader, limited
+from ordereddict_yaml import OrderedDictSafeLoader
+
+LAUGHS = "a: &a [x, x, x, x, x, x, x, x, x, x]\n" + "".join(
+    "%s: &%s [%s]\n" % (name, name, ", ".join(["*" + prev] * 10))
+    for prev, name in zip("abcdefgh", "bcdefghi"))
+
+
+def test_normal_document():
+    text = "a: &a {b: [1, 2]}\nc: *a\n"
+    assert yaml.load(text, Loader=SafeLoader) == yaml.safe_load(text)
+
+
+@pytest.mark.parametrize('text,limits,problem', [
+    (LAUGHS, {}, "found more than 5000000 nodes"),
+    (LAUGHS, dict(max_aliases=20), "found more than 20 aliases"),
+    ("a: &a [x, [*a]]", {}, "found a recursive alias"),
+    ("a: " + "[" * 30 + "]" * 30, dict(max_depth=20), "found a node nested deeper than 20"),
+    ("a: &a [[[[[x]]]]]\nb: [[[[*a]]]]", dict(max_depth=8), "found an alias nested deeper"),
+])
+def test_limits(text, limits, problem):
+    with pytest.raises(yaml.YAMLError) as excinfo:
+        yaml.load(text, Loader=limited(SafeLoader, **limits))
+    assert excinfo.value.problem.startswith(problem)
+
+
+def test_limits_ordered_loader():
+    with pytest.raises(yaml.YAMLError):
+        yaml.load(LAUGHS, Loader=limited(OrderedDictSafeLoader, max_nodes=1000))
+
+
+def test_error_is_navigable():
+    reporter = BufferReporter()
+    assert api.loads(LAUGHS, 'yaml', reporter, "laughs.yaml") is None
+    assert re.search(api.FILE_REGEX['yaml'], reporter.getvalue(), re.M).groups() == \
+        ("laughs.yaml", "7", "4")
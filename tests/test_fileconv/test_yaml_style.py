@@ -0,0 +1,36 @@
+import yaml
+
+from fileconv import yaml_style
+from fileconv.yaml_style import scalar_style
+
+
+def test_scalar_style():
+    assert scalar_style(u"keyword.control") == (u"keyword.control", None)
+    assert scalar_style(u"") == (u"", None)
+    assert scalar_style(u"a\nb") == (u"a\nb", '|')
+    assert scalar_style(u"a b") == (u"a b", '|')
+    assert scalar_style(u"#comments") == (u"#comments", "'")
+    assert scalar_style(u"'") == (u"'", "'")
+    assert scalar_style(u"a: b") == (u"a: b", "'")
+    assert scalar_style(u"a #b") == (u"a #b", "'")
+    assert scalar_style(u"a#b") == (u"a#b", None)
+    # ' is preferred to block style, except for (?x) patterns
+    assert scalar_style(u"[\n") == (u"[\n", "'")
+    assert scalar_style(u"(?x)\n  a: b\n") == (u"(?x)\na: b", '|')
+
+
+def test_scalar_style_x_patterns():
+    value = u"(?x)\n    a\n      b  \n    c\n"
+    assert scalar_style(value) == (u"(?x)\na\n  b  \nc", '|')
+    assert yaml.safe_load(yaml.dump({'match': scalar_style(value)[0]})) \
+        == {'match': u"(?x)\na\n  b  \nc"}
+    # Not multi-line
+    assert scalar_style(u"(?x) a: b") == (u"(?x) a: b", "'")
+
+
+def test_scalar_style_cache(monkeypatch):
+    monkeypatch.setattr(yaml_style, 'MAX_CACHE_SIZE', 3)
+    monkeypatch.setattr(yaml_style, '_cache', yaml_style.OrderedDict())
+    for value in (u"a", u"b", u"c", u"a", u"d"):
+        scalar_style(value)
+    assert list(yaml_style._cache) == [u"c", u"a", u"d"]
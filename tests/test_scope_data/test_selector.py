@@ -0,0 +1,61 @@
+import pytest
+
+from scope_data.selector import RecordedScopes, ViewScopes, compile_selector, match_selector
+
+
+SCOPE = ("source.yaml-tmlanguage meta.name.yaml-tmlanguage meta.value.yaml-tmlanguage "
+         "string.unquoted.yaml ")
+
+
+def test_match_selector():
+    assert match_selector(SCOPE, "source.yaml-tmlanguage")
+    assert match_selector(SCOPE, "source")
+    assert not match_selector(SCOPE, "sour")
+    assert not match_selector(SCOPE, "source.yaml")
+    assert match_selector(SCOPE, "meta.name meta.value string")
+    assert match_selector(SCOPE, "source string")
+    assert not match_selector(SCOPE, "string meta.name")
+    assert not match_selector(SCOPE, "meta.include meta.value string")
+    assert match_selector(SCOPE, "source.yaml-tmlanguage - comment")
+    assert not match_selector(SCOPE, "source - string")
+    assert match_selector(SCOPE, "comment, string")
+    assert match_selector(SCOPE, "comment | meta.name & string")
+    assert not match_selector(SCOPE, "comment & string")
+    assert match_selector(SCOPE, "-comment")
+    assert not match_selector(SCOPE, "source - (comment, string)")
+    assert match_selector(SCOPE, "(comment, string) - meta.include")
+    assert not match_selector("", "source")
+
+
+@pytest.mark.parametrize('selector', ["", "a,", "(a", "a)", "a - ", "a ! b"])
+def test_invalid_selector(selector):
+    with pytest.raises(ValueError):
+        compile_selector(selector)
+
+
+def test_compiled_selectors_are_cached():
+    assert compile_selector("a b - c") is compile_selector("a b - c")
+
+
+def test_view_scopes():
+    class View(object):
+        calls = 0
+
+        def scope_name(self, pt):
+            self.calls += 1
+            return SCOPE
+
+    view = View()
+    scopes = ViewScopes(view)
+    assert scopes.match(10, "source - comment")
+    assert scopes.match(10, "meta.name meta.value string")
+    assert not scopes.match(10, "meta.include")
+    assert view.calls == 1
+    assert scopes.scopes(10)[-1] == "string.unquoted.yaml"
+
+
+def test_recorded_scopes():
+    scopes = RecordedScopes({0: "source.yaml-tmlanguage comment.line"})
+    assert scopes.match(0, "source comment")
+    assert not scopes.match(0, "source.yaml-tmlanguage - comment")
+    assert not scopes.match(1, "source")
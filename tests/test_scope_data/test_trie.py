@@ -0,0 +1,72 @@
+from scope_data import COMPILED_HEADS, COMPILED_NODES, ScopeTrie, get_trie
+
+
+def test_trie_structure():
+    trie = get_trie()
+    assert trie is get_trie()
+    assert trie.root.completions == COMPILED_HEADS.to_completion()
+    assert len(trie.root.scopes) == len(COMPILED_NODES)
+    node = trie.find("punctuation.definition")
+    assert node.scope == "punctuation.definition"
+    assert node.completions == [("string", "string"), ("sequence", "sequence"),
+                                ("mapping", "mapping")]
+    assert trie.find("keyword.control").children == {}
+    assert trie.find("keyword.unknown") is None
+
+
+def test_trie_complete():
+    trie = ScopeTrie(COMPILED_HEADS)
+    assert trie.complete("punctuation.definition.s") == [
+        "punctuation.definition.string",
+        "punctuation.definition.string.begin",
+        "punctuation.definition.string.end",
+        "punctuation.definition.sequence",
+        "punctuation.definition.sequence.begin",
+        "punctuation.definition.sequence.end",
+    ]
+    assert trie.complete("keyword.control") == ["keyword.control"]
+    assert trie.complete("keyword.x") == []
+    assert trie.complete("unknown.c") == []
+    assert trie.complete("") == list(trie.root.scopes)
+
+
+def test_trie_fuzzy():
+    trie = get_trie()
+    assert trie.fuzzy("kwctrl") == ["keyword.control"]
+    assert trie.fuzzy("pdsb", 2) == ["punctuation.definition.string.begin",
+                                     "punctuation.definition.sequence.begin"]
+    assert trie.fuzzy("entity.name.fnction", 1) == ["entity.name.function"]
+    assert trie.fuzzy("xyz") == []
+
+
+def test_trie_fuzzy_bounds():
+    trie = ScopeTrie(COMPILED_HEADS, {'keyword.control.flow': 3, 'keyword.declaration': 5})
+    matches = trie.fuzzy("kwc")
+    assert matches[:3] == ["keyword.control", "keyword.control.flow", "keyword.declaration"]
+    assert trie.fuzzy("kwc", 2) == matches[:2]
+    assert trie.fuzzy("kwc", 0) == []
+    assert trie.fuzzy("keyword.contrl", None, 1) == ["keyword.control", "keyword.control.flow"]
+    assert trie.fuzzy("keyword.cntrl", None, 1) == []
+    assert trie.fuzzy("", 2) == ["meta", "entity"]
+
+
+def test_trie_corpus():
+    trie = ScopeTrie(COMPILED_HEADS, {'keyword.control.flow': 3, 'keyword.declaration': 5,
+                                      'keyword.operator.word': 1, 'source.x': 2})
+    node = trie.find("keyword")
+    assert node.count == 9
+    assert node.completions == [("control", "control"), ("operator", "operator"),
+                                ("other", "other"), ("declaration\t5 uses", "declaration")]
+    assert trie.root.completions[-1] == ("source\t2 uses", "source")
+    assert trie.complete("keyword.c") == ["keyword.control", "keyword.control.flow"]
+    assert trie.fuzzy("kwdecl") == ["keyword.declaration"]
+
+
+def test_set_corpus():
+    import scope_data
+    try:
+        scope_data.set_corpus({'keyword.control.flow': 1})
+        assert get_trie().find("keyword.control.flow").count == 1
+    finally:
+        scope_data.set_corpus(None)
+    assert get_trie().find("keyword.control.flow") is None
@@ -56,3 +56,43 @@ def test_has_sels():
     view.sel.return_value = range(1)
 
     assert su_lib_view.has_sels(view)
+
+
+def make_region(begin, end):
+    region = mock.Mock()
+    region.begin.return_value = begin
+    region.end.return_value = end
+    return region
+
+
+def test_selector_cache():
+    view = mock.Mock()
+    view.id.return_value = 1
+    view.change_count.return_value = 1
+    view.settings.return_value = {'syntax': 'A.tmLanguage'}
+    regions = [make_region(0, 5), make_region(5, 9), make_region(20, 30)]
+    view.find_by_selector.return_value = regions
+
+    cache = su_lib_view.SelectorCache()
+    assert cache.containing(view, "string", 0) is regions[0]
+    assert cache.containing(view, "string", 5) is regions[0]
+    assert cache.containing(view, "string", 6) is regions[1]
+    assert cache.containing(view, "string", 10) is None
+    assert cache.containing(view, "string", 30) is regions[2]
+    assert cache.containing(view, "string", 31) is None
+    assert cache.find(view, "string") is regions
+    assert view.find_by_selector.call_count == 1
+    assert (cache.hits, cache.misses) == (6, 1)
+
+    view.change_count.return_value = 2
+    cache.find(view, "string")
+    assert view.find_by_selector.call_count == 2
+
+    view.settings.return_value = {'syntax': 'B.tmLanguage'}
+    cache.find(view, "string")
+    assert view.find_by_selector.call_count == 3
+
+    cache.evict(1)
+    cache.find(view, "string")
+    assert view.find_by_selector.call_count == 4
+    assert cache.hit_rate == 6 / 10.0
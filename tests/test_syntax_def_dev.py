@@ -0,0 +1,201 @@
+import re
+
+import pytest
+import sublime
+
+from PackageDev import syntax_def_dev
+from PackageDev.scope_data import get_trie
+from PackageDev.scope_data.selector import RecordedScopes
+from PackageDev.sublime_lib.view import OutputPanel
+
+
+BASE = "source.yaml-tmlanguage "
+NAME = BASE + "meta.name.yaml-tmlanguage "
+INCLUDE = BASE + "meta.include.yaml-tmlanguage "
+KEYWORD = "keyword.control.definition.yaml-tmlanguage"
+VALUE = "meta.value.yaml-tmlanguage string.unquoted.yaml"
+
+
+class View(object):
+    """The text of ``(text, scope name)`` segments. Selectors are matched
+    with ``RecordedScopes``, the view itself has no scope names.
+    """
+    def __init__(self, *segments):
+        self.text = ""
+        scope_names = {}
+        for text, scope_name in segments:
+            # Including the end point, which the next segment overrides
+            for pt in range(len(self.text), len(self.text) + len(text) + 1):
+                scope_names[pt] = scope_name
+            self.text += text
+        self.scopes = RecordedScopes(scope_names)
+        self._settings = sublime.Settings({'syntax': "Sublime Text Syntax Def (YAML)"})
+
+    def id(self):
+        return id(self)
+
+    def change_count(self):
+        return 0
+
+    def settings(self):
+        return self._settings
+
+    def file_name(self):
+        return "Test.YAML-tmLanguage"
+
+    def window(self):
+        return None
+
+    def is_scratch(self):
+        return False
+
+    def is_loading(self):
+        return False
+
+    def size(self):
+        return len(self.text)
+
+    def substr(self, x):
+        if isinstance(x, int):
+            return self.text[x:x + 1]
+        return self.text[x.begin():x.end()]
+
+    def rowcol(self, point):
+        lines = self.text[:point].split("\n")
+        return len(lines) - 1, len(lines[-1])
+
+    def text_point(self, row, col):
+        return sum(len(line) + 1 for line in self.text.split("\n")[:row]) + col
+
+    def line(self, point):
+        end = self.text.find("\n", point)
+        return sublime.Region(self.text.rfind("\n", 0, point) + 1,
+                              len(self.text) if end < 0 else end)
+
+    def word(self, point):
+        begin = re.search(r"\w*$", self.text[:point]).start()
+        return sublime.Region(begin, point + re.match(r"\w*", self.text[point:]).end())
+
+    def find_by_selector(self, selector):
+        regions = []
+        for pt in range(len(self.text)):
+            if self.scopes.match(pt, selector):
+                if regions and regions[-1].end() == pt:
+                    regions[-1] = sublime.Region(regions[-1].begin(), pt + 1)
+                else:
+                    regions.append(sublime.Region(pt, pt + 1))
+        return regions
+
+    def replace(self, edit, region, text):
+        self.text = self.text[:region.begin()] + text + self.text[region.end():]
+
+    def viewport_position(self):
+        return (0, 0)
+
+    def layout_to_text(self, vector):
+        return 0
+
+    def text_to_layout(self, point):
+        return (0, 0)
+
+    def set_viewport_position(self, vector):
+        pass
+
+
+class Completions(syntax_def_dev.SyntaxDefCompletions):
+    def get_scopes(self, view):
+        return view.scopes
+
+
+class Rearrange(syntax_def_dev.RearrangeYamlSyntaxDefCommand):
+    def get_scopes(self):
+        return self.view.scopes
+
+
+class Output(OutputPanel):
+    """Collects the written text instead of showing it in a panel."""
+    def __init__(self, *args, **kwargs):
+        self.text = ""
+
+    def set_path(self, *args, **kwargs):
+        pass
+
+    def write(self, text):
+        self.text += text
+
+    def show(self):
+        pass
+
+    def finish(self):
+        pass
+
+
+@pytest.fixture
+def messages(monkeypatch):
+    messages = []
+    monkeypatch.setattr(sublime, 'status_message', messages.append)
+    monkeypatch.setattr(syntax_def_dev, 'refresh_scope_corpus', lambda: None)
+    return messages
+
+
+def complete(view, prefix=""):
+    return Completions().on_query_completions(view, prefix, [len(view.text)])
+
+
+def test_scope_name_completions(messages):
+    inhibit = sublime.INHIBIT_WORD_COMPLETIONS
+    view = View(("name:", NAME + KEYWORD), (" ", NAME))
+    assert complete(view) == (get_trie().root.completions, inhibit)
+
+    view = View(("name:", NAME + KEYWORD), (" ", NAME), ("keyword.con", NAME + VALUE))
+    assert complete(view, "con") == (get_trie().find("keyword").completions, inhibit)
+
+
+def test_unknown_scope_name(messages):
+    view = View(("scopeName:", BASE + KEYWORD), (" ", BASE),
+                ("source.test", BASE + "meta.scope-name.yaml-tmlanguage " + VALUE),
+                ("\nname:", NAME + KEYWORD), (" ", NAME), ("keyword.contrl.", NAME + VALUE))
+    assert complete(view) == ([("test", "test")], sublime.INHIBIT_WORD_COMPLETIONS)
+    assert messages[0] == ("[PackageDev] Warning: `keyword.contrl` not found in scope "
+                           "naming conventions; did you mean `keyword.control`?")
+
+
+def test_other_completions(messages):
+    view = View(("captures:", BASE + KEYWORD), ("\n  ", BASE), ("1", BASE + "constant.numeric"))
+    assert complete(view, "1") == ([("1", "'1': {name: $0}")], sublime.INHIBIT_WORD_COMPLETIONS)
+
+    view = View(("patterns:\n- ", BASE), ("include:", INCLUDE + KEYWORD), (" ", INCLUDE),
+                ("'#'", INCLUDE + "meta.value.yaml-tmlanguage string.quoted.single.yaml"),
+                ("\nrepository:\n  main:\n    match: a\n  other:\n    match: b\n", BASE))
+    loc = view.text.index("'#'") + 2
+    assert (Completions().on_query_completions(view, "", [loc])
+            == ([("main", "main"), ("other", "other")], sublime.INHIBIT_WORD_COMPLETIONS))
+
+    assert complete(View(("# name: ", BASE + "comment.line.number-sign.yaml"))) == []
+    assert complete(View(("name: ", "text.plain"))) == []
+
+
+def test_rearrange(monkeypatch):
+    monkeypatch.setattr(syntax_def_dev, 'OutputPanel', Output)
+    view = View(("name: Test\n"
+                 "patterns:\n"
+                 "- {include: '#main'}\n"
+                 "scopeName: source.test\n"
+                 "repository:\n"
+                 "  main: {match: a, name: keyword.test}\n", BASE))
+    command = Rearrange(view)
+    assert command.is_enabled()
+    command.run(None)
+    assert view.text == ("# [PackageDev] target_format: plist, ext: tmLanguage\n"
+                         "name: Test\n"
+                         "scopeName: source.test\n"
+                         "\n"
+                         "patterns:\n"
+                         "- include: '#main'\n"
+                         "\n"
+                         "repository:\n"
+                         "  main:\n"
+                         "    name: keyword.test\n"
+                         "    match: a\n")
+
+    assert not Rearrange(View(("name: Test\n", "text.plain"))).is_enabled()